@@ -0,0 +1,89 @@
+"""
+Throughput and memory of the hand evaluators.
+
+Compares, on the same random 7-card hands:
+
+    dict        Evaluator with the LookupTable dicts (_seven)
+    five_array  Evaluator over the five_card_table rank array
+    dag         DagEvaluator, one hand at a time
+    dag_batch   seven_card_dag.evaluate_batch over a NumPy array
+
+and reports evaluations per second, the on-disk size of the mmapped tables
+each one reads, and how much the process RSS grew while attaching them.
+
+    python bench_evaluators.py --hands 200000 > bench_output.txt
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+import table_store
+from eval_poker import Evaluator
+from five_card_table import CARD_INDEX, CARDS_BY_INDEX
+from seven_card_dag import DagEvaluator, evaluate_batch
+
+TABLES = {
+    "dict": [],
+    "five_array": ["five_card_ranks"],
+    "dag": ["dag_next", "dag_value", "flush_best"],
+    "dag_batch": ["dag_next", "dag_value", "flush_best"],
+}
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hands", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table_store.build_all()
+    rng = random.Random(args.seed)
+    hands = [rng.sample(CARDS_BY_INDEX, 7) for _ in range(args.hands)]
+    indices = np.array([[CARD_INDEX[c] for c in h] for h in hands], dtype=np.int64)
+
+    reference = Evaluator()
+    rss_before = rss_bytes()
+    evaluators = {
+        "dict": reference,
+        "five_array": Evaluator(reference.table, table_store.attach("five_card_ranks")),
+        "dag": DagEvaluator(reference.table),
+    }
+    # touch every page once so the RSS figure covers the whole tables
+    for name in ("five_card_ranks", "dag_next", "dag_value", "flush_best"):
+        np.frombuffer(table_store.attach(name), dtype=np.uint8).sum()
+    rss_attach = rss_bytes() - rss_before
+
+    expected = None
+    print("{:<11} {:>14} {:>14}".format("evaluator", "evals/sec", "table_bytes"))
+    for name in TABLES:
+        start = time.perf_counter()
+        if name == "dag_batch":
+            result = evaluate_batch(indices).tolist()
+        else:
+            evaluator = evaluators[name]
+            result = [evaluator.evaluate(h[:2], h[2:]) for h in hands]
+        elapsed = time.perf_counter() - start
+
+        if expected is None:
+            expected = result
+        assert result == expected, "{} disagrees with the dict evaluator".format(name)
+
+        size = sum(os.path.getsize(table_store.table_path(t)) for t in TABLES[name])
+        print("{:<11} {:>14,.0f} {:>14,}".format(name, args.hands / elapsed, size))
+
+    print("# RSS growth after attaching and touching all mmapped tables: {:,} bytes".format(rss_attach))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Error versus CPU time for the simulate_win_percent sampling modes.
+
+For each spot a reference equity is computed once with a long plain random
+run, then every mode is repeated at a few sample sizes. The table reports
+the RMSE against the reference and the mean CPU seconds per run, followed
+by the cheapest mode that meets --target for each spot.
+
+    python bench_sampling.py --target 1.0 > bench_output.txt
+"""
+import argparse
+import math
+import time
+
+from eval_poker import simulate_win_percent
+from sampling import SAMPLING_MODES
+
+SPOTS = {
+    "preflop": ([], ["as", "ks"]),
+    "flop": (["ah", "7d", "2c"], ["qs", "qd"]),
+    "turn": (["9h", "8h", "2c", "kd"], ["th", "jh"]),
+}
+
+
+def run(board, hand, num_sims, n_other_players, sampling, seed):
+    return simulate_win_percent(board, hand, num_sims, n_other_players=n_other_players,
+                                decimal_places=2, sampling=sampling, seed=seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sims", type=int, nargs="+", default=[100, 400, 1600])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--reference-sims", type=int, default=50000)
+    parser.add_argument("--players", type=int, default=3, help="number of other players")
+    parser.add_argument("--target", type=float, default=1.0, help="target RMSE in percentage points")
+    args = parser.parse_args()
+
+    print("{:<8} {:<11} {:>6} {:>8} {:>10}".format("spot", "mode", "sims", "rmse", "cpu_s"))
+    for name, (board, hand) in SPOTS.items():
+        reference = run(board, hand, args.reference_sims, args.players, "random", seed=0)
+
+        cheapest = None
+        for mode in SAMPLING_MODES:
+            for num_sims in args.sims:
+                sq_error = 0.0
+                cpu = 0.0
+                for r in range(args.repeats):
+                    start = time.process_time()
+                    estimate = run(board, hand, num_sims, args.players, mode, seed=r + 1)
+                    cpu += time.process_time() - start
+                    sq_error += (estimate - reference) ** 2
+                rmse = math.sqrt(sq_error / args.repeats)
+                cpu /= args.repeats
+                print("{:<8} {:<11} {:>6} {:>8.3f} {:>10.4f}".format(name, mode, num_sims, rmse, cpu))
+
+                if rmse <= args.target and (cheapest is None or cpu < cheapest[2]):
+                    cheapest = (mode, num_sims, cpu)
+
+        if cheapest:
+            print("# {}: reference {:.2f}%, cheapest under {} pts: {} with {} sims ({:.4f}s)\n".format(
+                name, reference, args.target, *cheapest))
+        else:
+            print("# {}: reference {:.2f}%, no mode reached {} pts\n".format(name, reference, args.target))
+
+
+if __name__ == "__main__":
+    main()
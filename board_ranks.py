@@ -0,0 +1,139 @@
+"""
+Every two-card holding ranked on a 5-card board in one call.
+
+rank_all_holdings(board) evaluates the 1326 holdings (holdings.HOLDINGS
+order) on a river board with one seven_card_dag.evaluate_batch call and
+returns them as a BoardRanks: a dense rank array with the holdings that
+use a board card set to MASKED_RANK, and the live holdings sorted from
+best to worst.
+
+Results are memoized per canonical board in an LRU of BOARD_CACHE_SIZE
+entries. Boards that differ only by which suit is which share an entry:
+the board is relabeled to the smallest of its 24 suit permutations, and
+the cached ranks are mapped back through the matching holding permutation
+(a single NumPy gather).
+"""
+import itertools
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from holdings import HOLDING_CARDS, NUM_HOLDINGS, blocked, holding_index
+from lookup import LookupTable
+from seven_card_dag import evaluate_batch
+
+# one worse than the worst real rank (7462)
+MASKED_RANK = LookupTable.MAX_HIGH_CARD + 1
+BOARD_CACHE_SIZE = int(os.environ.get("RS_BOARD_CACHE_SIZE", "1024"))
+
+SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+
+def _holding_permutations() -> np.ndarray:
+    """
+    (24, 1326) array: row p maps each holding to its index after relabeling
+    suit s to SUIT_PERMUTATIONS[p][s].
+    """
+    table = np.empty((len(SUIT_PERMUTATIONS), NUM_HOLDINGS), dtype=np.int64)
+    for p, perm in enumerate(SUIT_PERMUTATIONS):
+        for k, (a, b) in enumerate(HOLDING_CARDS.tolist()):
+            table[p, k] = holding_index((a & ~3) | perm[a & 3], (b & ~3) | perm[b & 3])
+    return table
+
+
+HOLDING_PERMUTATIONS = _holding_permutations()
+
+_CLASS_MAXIMA = sorted(LookupTable.MAX_TO_RANK_CLASS)
+
+
+def rank_class(rank: int) -> int:
+    """
+    Same as Evaluator.get_rank_class.
+    """
+    return LookupTable.MAX_TO_RANK_CLASS[_CLASS_MAXIMA[bisect_left(_CLASS_MAXIMA, rank)]]
+
+
+class BoardRanks:
+    """
+    ranks: (1326,) uint16, MASKED_RANK where the holding uses a board card
+    order: (live,) holding indices sorted by rank, best first
+    """
+    __slots__ = ("board", "ranks", "order")
+
+    def __init__(self, board: Tuple[int, ...], ranks: np.ndarray, order: np.ndarray) -> None:
+        self.board = board
+        self.ranks = ranks
+        self.order = order
+
+    @property
+    def live(self) -> np.ndarray:
+        return self.ranks != MASKED_RANK
+
+    @property
+    def nut_rank(self) -> int:
+        return int(self.ranks[self.order[0]])
+
+    def standing(self, hand: Sequence[int]) -> dict:
+        """
+        Where hand ranks among the holdings it does not block.
+        """
+        rank = int(self.ranks[holding_index(*hand)])
+        others = self.ranks[self.live & ~blocked(hand)]
+        better = int((others < rank).sum())
+        tied = int((others == rank).sum())
+        worse = len(others) - better - tied
+        return {
+            "rank": rank,
+            "rank_class": LookupTable.RANK_CLASS_TO_STRING[rank_class(rank)],
+            "nut_rank": self.nut_rank,
+            "is_nuts": better == 0,
+            "position": better + 1,
+            "combos_better": better,
+            "combos_tied": tied,
+            "combos_worse": worse,
+            "percentile": round((worse + tied / 2) / len(others) * 100, 2),
+        }
+
+
+def canonical_board(board: Sequence[int]) -> Tuple[Tuple[int, ...], int]:
+    """
+    The smallest suit relabeling of board, and the index of the permutation
+    that produces it.
+    """
+    return min(
+        (tuple(sorted((c & ~3) | perm[c & 3] for c in board)), p)
+        for p, perm in enumerate(SUIT_PERMUTATIONS)
+    )
+
+
+@lru_cache(maxsize=BOARD_CACHE_SIZE)
+def _canonical_ranks(board: Tuple[int, ...]) -> np.ndarray:
+    ranks = np.full(NUM_HOLDINGS, MASKED_RANK, dtype=np.uint16)
+    live = np.flatnonzero(~blocked(board))
+    cards = np.concatenate([HOLDING_CARDS[live], np.tile(np.array(board, dtype=np.int64), (len(live), 1))], axis=1)
+    ranks[live] = evaluate_batch(cards)
+    ranks.flags.writeable = False
+    return ranks
+
+
+def rank_all_holdings(board: Sequence[int], cache: bool = True) -> BoardRanks:
+    """
+    Ranks every holding on board (5 card indices). Pass cache=False for
+    one-off boards, such as sampled runouts, so they do not evict the
+    boards that are actually asked for again.
+    """
+    if len(board) != 5 or len(set(board)) != 5:
+        raise ValueError("board must be 5 distinct cards")
+    canonical, p = canonical_board(board)
+    compute = _canonical_ranks if cache else _canonical_ranks.__wrapped__
+    ranks = compute(canonical)[HOLDING_PERMUTATIONS[p]]
+    live = np.flatnonzero(ranks != MASKED_RANK)
+    order = live[np.argsort(ranks[live], kind="stable")]
+    return BoardRanks(tuple(board), ranks, order)
+
+
+def cache_info() -> dict:
+    return _canonical_ranks.cache_info()._asdict()
@@ -0,0 +1,123 @@
+"""
+Single-flight coalescing of identical win-rate computations.
+
+When many clients ask for the same spot at once (a featured hand, a
+traffic spike), only the first request starts simulate_win_percent. Every
+request with the same canonical key that arrives while it runs awaits the
+same task and gets the same result. With RS_COALESCE_WINDOW_MS > 0 the
+finished result is also handed to identical requests for that long after
+it completes. Errors are shared with the requests already waiting but
+never kept for the window.
+
+The computation itself runs in the threadpool, so a long simulation no
+longer blocks the event loop and the waiting requests cost nothing but an
+awaiting coroutine.
+
+RS_COALESCE_KEY picks how spots are normalized into keys:
+
+    exact       the query strings as sent
+    canonical   cards case-folded and sorted, so "Kd,Ah" == "ah,kd"
+    isomorphic  canonical, and suits relabeled to the smallest equivalent
+                order, so AhKh on 2h7c9d shares with AsKs on 2s7d9c.
+                Win rates do not depend on which suit is which, but
+                a seeded simulation's exact digits do, so /get_win_rate/
+                keys seeded requests (which carry an ETag) canonically.
+
+Coalescing is per process; each gunicorn worker keeps its own table.
+Counters are served from /coalescing_stats/.
+"""
+import asyncio
+import itertools
+import os
+from typing import Any, Callable, Dict, Hashable, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+KEY_MODES = ("exact", "canonical", "isomorphic")
+WINDOW_MS = float(os.environ.get("RS_COALESCE_WINDOW_MS", "0"))
+KEY_MODE = os.environ.get("RS_COALESCE_KEY", "canonical")
+if KEY_MODE not in KEY_MODES:
+    raise ValueError("RS_COALESCE_KEY must be one of {}".format(", ".join(KEY_MODES)))
+
+SUITS = "cdhs"
+
+
+def _cards(card_str: str) -> Tuple[str, ...]:
+    return tuple(sorted(c.strip().lower() for c in card_str.split(",") if c.strip()))
+
+
+def _relabel(cards: Sequence[str], mapping: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(sorted(c[0] + mapping.get(c[1], c[1]) for c in cards))
+
+
+def spot_key(my_hand: str, my_board_representation: str, mode: str = KEY_MODE) -> Hashable:
+    """
+    Normalized (hand, board) part of a coalescing key.
+    """
+    if mode == "exact":
+        return my_hand, my_board_representation
+    hand, board = _cards(my_hand), _cards(my_board_representation)
+    if mode == "canonical":
+        return hand, board
+    return min(
+        (_relabel(board, mapping), _relabel(hand, mapping))
+        for mapping in (dict(zip(SUITS, perm)) for perm in itertools.permutations(SUITS))
+    )
+
+
+class SingleFlight:
+    """
+    Map of in-flight (and, within the window, just finished) computations
+    keyed by request key.
+    """
+
+    def __init__(self, window_ms: float = WINDOW_MS) -> None:
+        self.window = window_ms / 1000.0
+        self.tasks: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"computations": 0, "coalesced": 0, "window_hits": 0, "errors": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Result of fn(), run in the threadpool unless a computation for key is
+        already in flight or finished within the window.
+        """
+        task = self.tasks.get(key)
+        if task is None:
+            self.stats["computations"] += 1
+            task = asyncio.ensure_future(run_in_threadpool(fn))
+            self.tasks[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        elif task.done():
+            self.stats["window_hits"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        # a disconnecting client must not cancel everybody else's result
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if task.cancelled() or task.exception() is not None:
+            self.stats["errors"] += 1
+            self._forget(key, task)
+        elif self.window > 0:
+            asyncio.get_running_loop().call_later(self.window, self._forget, key, task)
+        else:
+            self._forget(key, task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+
+    def snapshot(self) -> dict:
+        saved = self.stats["coalesced"] + self.stats["window_hits"]
+        requests = self.stats["computations"] + saved
+        return {
+            **self.stats,
+            "saved": saved,
+            "saved_ratio": round(saved / requests, 4) if requests else 0.0,
+            "in_flight": sum(1 for t in self.tasks.values() if not t.done()),
+            "window_ms": self.window * 1000,
+            "key_mode": KEY_MODE,
+        }
+
+
+win_rates = SingleFlight()
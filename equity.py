@@ -0,0 +1,104 @@
+"""
+Vectorized equity estimates on top of seven_card_dag.evaluate_batch.
+
+Cards here are indices in [0, 52) (five_card_table.CARD_INDEX). Every
+function works on a whole batch of deals at once, so the per-sample cost
+is a handful of NumPy gathers instead of Python-level evaluations.
+"""
+from typing import Sequence
+
+import numpy as np
+
+from five_card_table import CARD_INDEX
+from seven_card_dag import evaluate_batch
+
+
+def to_indices(cards: Sequence[int]) -> list:
+    """
+    Card ints => card indices.
+    """
+    return [CARD_INDEX[c] for c in cards]
+
+
+def deal_batch(dead: Sequence[int], count: int, samples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    (samples, count) array of card indices, each row drawn without
+    replacement from the cards not in dead.
+    """
+    dead = set(dead)
+    live = np.array([i for i in range(52) if i not in dead], dtype=np.int64)
+    if count == 0:
+        return np.empty((samples, 0), dtype=np.int64)
+    order = np.argsort(rng.random((samples, len(live))), axis=1)[:, :count]
+    return live[order]
+
+
+def showdown_shares(hero_ranks: np.ndarray, opp_ranks: np.ndarray) -> np.ndarray:
+    """
+    Hero's share of the pot in each sample, given hero ranks (N,) and
+    opponent ranks (N, players): 1 for a win, 1/k for a k-way tie, 0 for
+    a loss.
+    """
+    best_opp = opp_ranks.min(axis=1)
+    tied = (opp_ranks == hero_ranks[:, None]).sum(axis=1)
+    return np.where(hero_ranks < best_opp, 1.0,
+                    np.where(hero_ranks == best_opp, 1.0 / (1 + tied), 0.0))
+
+
+def sample_equity(hand: Sequence[int], board: Sequence[int], n_opponents: int, samples: int,
+                  rng: np.random.Generator) -> np.ndarray:
+    """
+    Deals samples random opponent hands and board completions around hand
+    and board (card indices) and returns hero's pot share in each sample.
+    """
+    need = 5 - len(board)
+    dealt = deal_batch(list(hand) + list(board), 2 * n_opponents + need, samples, rng)
+
+    full_board = np.concatenate([np.tile(np.asarray(board, dtype=np.int64), (samples, 1)),
+                                 dealt[:, 2 * n_opponents:]], axis=1)
+    hero = evaluate_batch(np.concatenate([np.tile(np.asarray(hand, dtype=np.int64), (samples, 1)), full_board], axis=1))
+    opp = np.stack([
+        evaluate_batch(np.concatenate([dealt[:, 2 * i:2 * i + 2], full_board], axis=1))
+        for i in range(n_opponents)
+    ], axis=1)
+    return showdown_shares(hero, opp)
+
+
+def equity_curve(hand: Sequence[int], board: Sequence[int], max_opponents: int, samples: int,
+                 rng: np.random.Generator) -> list:
+    """
+    Win, tie and loss rates and pot share of hand against every opponent
+    count from 1 to max_opponents, from one batch of deals.
+
+    Each sample deals max_opponents hands and evaluates each once; the
+    first k of them are the k-opponent game, so the best opponent rank
+    for every k is a running minimum along the opponents axis, and the
+    opponents tying hero a running count.
+    """
+    need = 5 - len(board)
+    dealt = deal_batch(list(hand) + list(board), 2 * max_opponents + need, samples, rng)
+
+    full_board = np.concatenate([np.tile(np.asarray(board, dtype=np.int64), (samples, 1)),
+                                 dealt[:, 2 * max_opponents:]], axis=1)
+    hero = evaluate_batch(np.concatenate([np.tile(np.asarray(hand, dtype=np.int64), (samples, 1)), full_board], axis=1))
+    opp = np.stack([
+        evaluate_batch(np.concatenate([dealt[:, 2 * i:2 * i + 2], full_board], axis=1))
+        for i in range(max_opponents)
+    ], axis=1)
+
+    best = np.minimum.accumulate(opp, axis=1)
+    tied = np.cumsum(opp == hero[:, None], axis=1)
+    hero = hero[:, None]
+    win = hero < best
+    tie = hero == best
+    share = np.where(win, 1.0, np.where(tie, 1.0 / (1 + tied), 0.0))
+    return [
+        {
+            "opponents": k + 1,
+            "win": float(win[:, k].mean()),
+            "tie": float(tie[:, k].mean()),
+            "loss": float(1 - win[:, k].mean() - tie[:, k].mean()),
+            "equity": float(share[:, k].mean()),
+        }
+        for k in range(max_opponents)
+    ]
@@ -1,9 +1,13 @@
+import math
+import os
 import random
-from tqdm import tqdm
+import time
 from card import Card
 import itertools
-from typing import Sequence, List
+from typing import Sequence, List, Optional
 from lookup import LookupTable
+from five_card_table import B1, B2, B3, B4, B5, CARD_INDEX, colex_index
+from sampling import SAMPLING_MODES, iter_deals
 
 
 class Evaluator:
@@ -20,15 +24,28 @@ class Evaluator:
     HAND_LENGTH = 2
     BOARD_LENGTH = 5
 
-    def __init__(self) -> None:
+    def __init__(self, table: Optional[LookupTable] = None, five_card_ranks: Optional[Sequence[int]] = None) -> None:
 
-        self.table = LookupTable()
-        
-        self.hand_size_map = {
-            5: self._five,
-            6: self._six,
-            7: self._seven
-        }
+        self.table = table if table is not None else LookupTable()
+
+        # exhaustive rank array from five_card_table, indexed by colex rank
+        self.five_card_ranks = five_card_ranks
+
+        # 7 card tables behind evaluate_on_board, see _seven_card_tables
+        self._seven_tables = None
+
+        if five_card_ranks is None:
+            self.hand_size_map = {
+                5: self._five,
+                6: self._six,
+                7: self._seven
+            }
+        else:
+            self.hand_size_map = {
+                5: self._from_array,
+                6: self._from_array,
+                7: self._from_array
+            }
 
     def evaluate(self, hand: List[int], board: List[int]) -> int:
         """
@@ -90,6 +107,101 @@ class Evaluator:
 
         return minimum
 
+    def _from_array(self, cards: Sequence[int]) -> int:
+        """
+        Same result as _five, _six and _seven, read from five_card_ranks.
+        The card indices are sorted once; combinations() keeps every
+        5 card subset in that order, so none of them needs sorting again.
+        """
+        ranks = self.five_card_ranks
+        indices = sorted([CARD_INDEX[c] for c in cards])
+        if len(indices) == 5:
+            a, b, c, d, e = indices
+            return ranks[B1[a] + B2[b] + B3[c] + B4[d] + B5[e]]
+
+        return min([
+            ranks[B1[a] + B2[b] + B3[c] + B4[d] + B5[e]]
+            for a, b, c, d, e in itertools.combinations(indices, 5)
+        ])
+
+    def _seven_card_tables(self) -> tuple:
+        """
+        Best non-flush rank of every 7 card rank multiset, keyed by its
+        prime product, and best flush of every rank mask with 5 to 7 bits.
+        Built from self.table on first use, which takes about half a second.
+        """
+        if self._seven_tables is None:
+            unsuited = {}
+            for ranks in itertools.combinations_with_replacement(range(13), 7):
+                if any(ranks.count(r) > 4 for r in set(ranks)):
+                    continue
+                primes = [Card.PRIMES[r] for r in ranks]
+                best = LookupTable.MAX_HIGH_CARD
+                for a, b, c, d, e in set(itertools.combinations(primes, 5)):
+                    score = self.table.unsuited_lookup[a * b * c * d * e]
+                    if score < best:
+                        best = score
+                unsuited[math.prod(primes)] = best
+
+            flushes = {}
+            for mask in range(1 << 13):
+                bits = [1 << r for r in range(13) if mask & (1 << r)]
+                if not 5 <= len(bits) <= 7:
+                    continue
+                flushes[mask] = min([
+                    self.table.flush_lookup[Card.prime_product_from_rankbits(sum(combo))]
+                    for combo in itertools.combinations(bits, 5)
+                ])
+            self._seven_tables = (unsuited, flushes)
+        return self._seven_tables
+
+    def board_state(self, board: List[int]) -> tuple:
+        """
+        Precomputes the part of a 5 card board evaluation that every hand
+        on that board shares, for evaluate_on_board: the prime product of
+        the board's ranks, and the one suit that can still make a flush
+        (3 or more on the board) with its rank mask.
+
+        Other board sizes, and the array mode, keep the plain board.
+        """
+        if len(board) != self.BOARD_LENGTH or self.five_card_ranks is not None:
+            return (board, None, 0, 0)
+
+        self._seven_card_tables()
+        flush_suit = 0
+        for suit in (0x1000, 0x2000, 0x4000, 0x8000):
+            if sum(1 for c in board if c & suit) >= 3:
+                flush_suit = suit
+        flush_mask = 0
+        for c in board:
+            if c & flush_suit:
+                flush_mask |= c >> 16
+        return (board, Card.prime_product_from_hand(board), flush_suit, flush_mask)
+
+    def evaluate_on_board(self, state: tuple, hand: List[int]) -> int:
+        """
+        Same as evaluate(hand, board) for a board_state(board). Folding in
+        the two hole cards is one probe of the 7 card table, plus one of the
+        flush table when the board has a flush suit.
+        """
+        board, product, flush_suit, flush_mask = state
+        if product is None:
+            return self.evaluate(hand, board)
+
+        unsuited, flushes = self._seven_tables
+        for c in hand:
+            product *= c & 0xFF
+        best = unsuited[product]
+
+        if flush_suit:
+            for c in hand:
+                if c & flush_suit:
+                    flush_mask |= c >> 16
+            flush = flushes.get(flush_mask)
+            if flush is not None and flush < best:
+                best = flush
+        return best
+
     def get_rank_class(self, hr: int) -> int:
         """
         Returns the class of hand given the hand hand_rank
@@ -190,9 +302,53 @@ class PLOEvaluator(Evaluator):
 
     HAND_LENGTH = 4
 
+    def board_state(self, board: List[int]) -> tuple:
+        """
+        Omaha plays exactly three board cards, so only the 3 card partials
+        are shared.
+        """
+        if self.five_card_ranks is not None:
+            return (board, None)
+
+        return (board, [
+            (Card.prime_product_from_hand(combo), combo[0] & combo[1] & combo[2] & 0xF000)
+            for combo in itertools.combinations(board, 3)
+        ])
+
+    def evaluate_on_board(self, state: tuple, hand: List[int]) -> int:
+        board, threes = state
+        if threes is None:
+            return self.evaluate(hand, board)
+
+        minimum = LookupTable.MAX_HIGH_CARD
+        flush_lookup = self.table.flush_lookup
+        unsuited_lookup = self.table.unsuited_lookup
+        for h1, h2 in itertools.combinations(hand, 2):
+            prime = (h1 & 0xFF) * (h2 & 0xFF)
+            hand_suits = h1 & h2
+            for product, suits in threes:
+                if suits & hand_suits:
+                    score = flush_lookup[product * prime]
+                else:
+                    score = unsuited_lookup[product * prime]
+                if score < minimum:
+                    minimum = score
+
+        return minimum
+
     def evaluate(self, hand: List[int], board: List[int]) -> int:
         minimum = LookupTable.MAX_HIGH_CARD
 
+        if self.five_card_ranks is not None:
+            ranks = self.five_card_ranks
+            board_combos = list(itertools.combinations([CARD_INDEX[c] for c in board], 3))
+            for hand_combo in itertools.combinations([CARD_INDEX[c] for c in hand], 2):
+                for board_combo in board_combos:
+                    score = ranks[colex_index(sorted(hand_combo + board_combo))]
+                    if score < minimum:
+                        minimum = score
+            return minimum
+
         for hand_combo in itertools.combinations(hand, 2):
             for board_combo in itertools.combinations(board, 3):
                 score = Evaluator._five(self, list(board_combo) + list(hand_combo))
@@ -202,9 +358,63 @@ class PLOEvaluator(Evaluator):
         return minimum
 
 
+LOOKUP_SNAPSHOT = os.environ.get(
+    "RS_LOOKUP_SNAPSHOT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lookup_snapshot.pkl")
+)
+
+_evaluator = None
+
+
+def _rebuild_snapshot() -> LookupTable:
+    table = LookupTable()
+    try:
+        table.write_snapshot(LOOKUP_SNAPSHOT)
+    except OSError:
+        # read-only deployments still get a working table, just not a fixed file
+        pass
+    return table
+
+
+def get_evaluator() -> Evaluator:
+    """
+    Process-wide Evaluator. With RS_SHARED_TABLES=1 the lookup tables are
+    mmapped from table_store so forked workers share them; otherwise they
+    are read from LOOKUP_SNAPSHOT when it exists and generated if not;
+    a corrupt or stale snapshot is regenerated and written back.
+    RS_FIVE_CARD_ARRAY=1 switches evaluation to the five_card_table array
+    and RS_SEVEN_CARD_DAG=1 to the seven_card_dag state machine.
+    Evaluator holds no per-call state, so one instance is shared by every
+    request.
+    """
+    global _evaluator
+    if _evaluator is None:
+        if os.environ.get("RS_SHARED_TABLES", "") not in ("", "0"):
+            from table_store import SharedLookupTable
+            table = SharedLookupTable()
+        elif os.path.exists(LOOKUP_SNAPSHOT):
+            try:
+                table = LookupTable.from_snapshot(LOOKUP_SNAPSHOT)
+            except ValueError:
+                table = _rebuild_snapshot()
+        else:
+            table = None
+
+        five_card_ranks = None
+        if os.environ.get("RS_FIVE_CARD_ARRAY", "") not in ("", "0"):
+            import table_store
+            five_card_ranks = table_store.attach("five_card_ranks")
+
+        if os.environ.get("RS_SEVEN_CARD_DAG", "") not in ("", "0"):
+            from seven_card_dag import DagEvaluator
+            _evaluator = DagEvaluator(table, five_card_ranks)
+        else:
+            _evaluator = Evaluator(table, five_card_ranks)
+    return _evaluator
+
+
 def _to_treys_representation(card_list):
     trey_cards = []
-    print(f"Card List: {card_list}")
     for x in card_list:
         st = str(x[0]).upper() + x[1]
         trey_cards.append(Card.new(st))
@@ -217,8 +427,30 @@ def _to_treys_representation(card_list):
     # Card.new('Jc')
 
 
+def parse_cards(card_str):
+    """
+    Parses a comma separated card list such as "as,Kd,7c" into card ints.
+    An empty string is an empty list. Raises ValueError on unknown or
+    repeated cards.
+    """
+    cards = []
+    for x in card_str.split(","):
+        x = x.strip()
+        if not x:
+            continue
+        if len(x) != 2 or x[0].upper() not in Card.CHAR_RANK_TO_INT_RANK or x[1].lower() not in Card.STR_SUITS:
+            raise ValueError("Invalid card {!r}".format(x))
+        cards.append(Card.new(x[0].upper() + x[1].lower()))
+    if len(set(cards)) != len(cards):
+        raise ValueError("Repeated card in {!r}".format(card_str))
+    return cards
+
+
 def get_deck(exclude_me=None):
     full_deck = []
+    # deck cards are lower case, callers pass cards as typed ("Kd")
+    if exclude_me:
+        exclude_me = {x.lower() for x in exclude_me}
     for suit in ["s", "c", "h", "d"]:
         for num in ["2", "3", "4", "5", "6", "7", "8", "9", "t", "j", "q", "k", "a"]:
             if exclude_me:
@@ -231,27 +463,39 @@ def get_deck(exclude_me=None):
 
 
 
-def get_random_hands(n_other_players, remaining_cards, needed_flop_cards=0):
-    random.shuffle(remaining_cards)
+def get_random_hands(n_other_players, remaining_cards, needed_flop_cards=0, rng=random):
+    rng.shuffle(remaining_cards)
     all_cards_copy = remaining_cards.copy()
     other_hands = []
     for _ in range(n_other_players):
         cards = [
-        all_cards_copy.pop(random.randint(0, len(all_cards_copy) - 1)) for _ in range(2)
+        all_cards_copy.pop(rng.randint(0, len(all_cards_copy) - 1)) for _ in range(2)
         ]
         other_hands.append(cards)
         
     if needed_flop_cards > 0:
         board_ext = [
-        all_cards_copy.pop(random.randint(0, len(all_cards_copy) - 1)) for _ in range(needed_flop_cards)
+        all_cards_copy.pop(rng.randint(0, len(all_cards_copy) - 1)) for _ in range(needed_flop_cards)
         ]
         return other_hands, board_ext
     return other_hands
 
+
+def random_deals(remaining_cards, n_other_players, needed_flop_cards, rng=random):
+    """
+    Plain Monte Carlo deals, in the same (stratum, other_hands, board_ext)
+    shape as the variance-reduced modes in sampling.py.
+    """
+    while True:
+        if needed_flop_cards > 0:
+            other_hands, board_ext = get_random_hands(n_other_players, remaining_cards, needed_flop_cards, rng=rng)
+        else:
+            other_hands, board_ext = get_random_hands(n_other_players, remaining_cards, rng=rng), []
+        yield None, other_hands, board_ext
+
 def generate_game_start_state(my_board_representation, my_hand):
     
     exclude_me = my_hand.copy()
-    print(f"my_board_representation1: {my_board_representation}")
     if my_board_representation == ['']:
         my_board_representation = None
     if my_board_representation is not None and my_board_representation != "" and my_board_representation != [""]:
@@ -276,13 +520,15 @@ def generate_game_start_state(my_board_representation, my_hand):
 
 
 def get_winner(hand, other_hands, board, evaluator):
-    player_score = evaluator.evaluate(board, hand)
+    # the board is shared by every player, only fold each hand into it
+    board_state = evaluator.board_state(board)
+    player_score = evaluator.evaluate_on_board(board_state, hand)
     player_rank = evaluator.get_rank_class(player_score)
     # other_hands = [_to_treys_representation(x) for x in other_hands]
     op_hand_scores = []
     op_hand_ranks = []
     for x in other_hands:
-        score = evaluator.evaluate(board, x)
+        score = evaluator.evaluate_on_board(board_state, x)
         rank_class = evaluator.get_rank_class(score)
         op_hand_ranks.append(rank_class)
     if min(op_hand_ranks) < player_rank:
@@ -312,47 +558,61 @@ def get_winner(hand, other_hands, board, evaluator):
     
     
 
-def simulate_win_percent(my_board_representation, my_hand, num_sims, n_other_players=5, print_sim=False, print_ravg=False, decimal_places=None):
+# budgeted runs: size of the first, timed batch, and the share of the
+# remaining budget each later batch is sized to fill
+CALIBRATION_SIMS = 16
+BATCH_SHARE = 0.75
+MIN_BATCH = 4
+
+
+def simulate_win_percent(my_board_representation, my_hand, num_sims, n_other_players=5, print_sim=False, print_ravg=False, decimal_places=None, sampling="random", seed=None,
+                         time_budget_ms=None):
+    """
+    Estimates the chance that my_hand wins against n_other_players random
+    hands, completing the board when fewer than 5 cards are given.
+
+    sampling picks how deals are drawn: "random" is plain Monte Carlo, the
+    other SAMPLING_MODES (see sampling.py) trade a little bookkeeping for
+    lower variance at the same num_sims. Pass seed for a reproducible run.
+
+    With time_budget_ms the run stops at that wall-clock budget instead
+    (num_sims, if not None, still caps it) and returns a dict with the
+    estimate, the number of sims performed and the 95% confidence
+    half-width, in the same units as the estimate. Sims run in batches
+    sized from the measured cost per sim, so the clock is read once per
+    batch rather than once per sim.
+    """
+    if num_sims is not None and num_sims < 1:
+        raise ValueError("num_sims must be at least 1, got {}".format(num_sims))
+    if sampling not in SAMPLING_MODES:
+        raise ValueError("Unknown sampling mode {!r}, expected one of {}".format(sampling, SAMPLING_MODES))
+
     remaining_cards, hand, board = generate_game_start_state(my_board_representation, my_hand)
+    og_board = board or []
+    needed_flop_cards = 5 - len(og_board)
+
+    rng = random.Random(seed)
+    if sampling == "random":
+        deals = random_deals(remaining_cards, n_other_players, needed_flop_cards, rng=rng)
+    else:
+        deals = iter_deals(sampling, remaining_cards, n_other_players, needed_flop_cards, rng)
 
+    evaluator = get_evaluator()
 
     wins = 0
     draws = 0
     losses = 0
-    # if not board or len(board) < 5:
-    #     print(f"Need to generate  {5-len(board)} board cards each sim")
-    
+    # stratum => [wins, trials], only filled by stratified sampling
+    strata = {}
+
     win_rates = []
 
-    og_board = board 
-    pbar = tqdm(range(num_sims))
-    for i in pbar:
-        if og_board:
-            temp_board = og_board.copy()
-        else:
-            temp_board = None
-                
-        # For each sim
-        if temp_board:
-            if len(temp_board) == 5:
-                other_hands = get_random_hands(5, remaining_cards)
-            else:
-                other_hands, board_ext = get_random_hands(n_other_players, remaining_cards, needed_flop_cards=5-len(temp_board))
-                # print(board_ext)
-                # board_ext = _to_treys_representation(board_ext)
-                temp_board.extend(board_ext)
-        else:
-            other_hands, board_ext = get_random_hands(n_other_players, remaining_cards, needed_flop_cards=5)
-            temp_board = board_ext
-                
-            # board_ext = _to_treys_representation(board_ext)
-            # if board:
-                
-            # else:
-            #     board = board_ext
-            assert len(temp_board) == 5
-        # from evaluator import Evaluator
-        evaluator = Evaluator()
+    def play():
+        nonlocal wins, draws, losses
+        stratum, other_hands, board_ext = next(deals)
+        temp_board = og_board + board_ext
+        assert len(temp_board) == 5
+
         if print_sim:
             print("\n")
             for x in other_hands:
@@ -374,19 +634,66 @@ def simulate_win_percent(my_board_representation, my_hand, num_sims, n_other_pla
             losses +=1
             if print_sim:
                 print("Loss\n")
+
+        if stratum is not None:
+            counts = strata.setdefault(stratum, [0, 0])
+            counts[0] += result == 1
+            counts[1] += 1
         
+        total_games = wins + draws + losses
+        return wins/total_games
+
+    if time_budget_ms is not None:
+        deadline = time.perf_counter() + time_budget_ms / 1000.0
+        started = time.perf_counter()
+        done = 0
+        batch = CALIBRATION_SIMS
+        while num_sims is None or done < num_sims:
+            if num_sims is not None:
+                batch = min(batch, num_sims - done)
+            for _ in range(batch):
+                play()
+            done += batch
+
+            now = time.perf_counter()
+            per_sim = (now - started) / done
+            batch = int((deadline - now) * BATCH_SHARE / per_sim)
+            if batch < MIN_BATCH:
+                break
+    else:
+        if print_ravg:
+            # tqdm is only needed for the progress bar, keep it off the import path
+            from tqdm import tqdm
+            pbar = tqdm(range(num_sims))
+        else:
+            pbar = range(num_sims)
+        for i in pbar:
+            avg = play()
+            win_rates.append(avg)
+            if print_ravg and i%10 == 0:
+                pbar.set_description(f"Running Average: {avg*100:{5}.{5}}%")
+
+    if strata:
+        # every board card is equally likely, so each stratum gets equal weight
+        avg = sum(w / n for w, n in strata.values()) / len(strata)
+        variance = sum((w / n) * (1 - w / n) / n for w, n in strata.values()) / len(strata) ** 2
+    else:
         total_games = wins + draws + losses
         avg = wins/total_games
-        win_rates.append(avg)
-        if print_ravg and i%10 == 0:
-            pbar.set_description(f"Running Average: {avg*100:{5}.{5}}%")
-        board=None
-    total_games = wins + draws + losses
-    avg = wins/total_games
+        # binomial variance; conservative for antithetic and quasi deals
+        variance = avg * (1 - avg) / total_games
 
-    if decimal_places > 0:
+    scale = 100 if decimal_places and decimal_places > 0 else 1
+    if decimal_places and decimal_places > 0:
         avg *= 100
         avg = round(avg, decimal_places)
+    if time_budget_ms is not None:
+        ci95 = 1.96 * math.sqrt(variance) * scale
+        return {
+            "win_percent": avg,
+            "num_sims": wins + draws + losses,
+            "ci95": round(ci95, decimal_places) if decimal_places else ci95,
+        }
     return avg
 
     
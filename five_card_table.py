@@ -0,0 +1,107 @@
+"""
+Exhaustive 5-card rank array.
+
+There are only C(52,5) = 2,598,960 five card hands, so every one of them
+gets a slot in a flat uint16 array (about 5 MB) holding its rank from
+LookupTable. The slot is the colex rank of the hand's sorted card indices:
+
+    index(a < b < c < d < e) = C(a,1) + C(b,2) + C(c,3) + C(d,4) + C(e,5)
+
+which is dense in [0, C(52,5)). A 5-card evaluation then becomes a few
+additions and a single array read, with no prime products or dict probes.
+
+The array is stored through table_store, so it is mmapped and shared
+between workers. Generate and check it with
+
+    python five_card_table.py --build --verify
+"""
+import itertools
+import sys
+from math import comb
+from typing import Dict, List, Sequence
+
+import table_store
+from card import Card
+from lookup import LookupTable
+
+NUM_HANDS = comb(52, 5)
+
+# card int => index in [0, 52), rank major so index // 4 is the rank
+CARDS_BY_INDEX: List[int] = [Card.new(r + s) for r in Card.STR_RANKS for s in Card.STR_SUITS]
+CARD_INDEX: Dict[int, int] = {c: i for i, c in enumerate(CARDS_BY_INDEX)}
+
+# BINOMIALS[k][n] = C(n, k + 1), the colex weight of the k-th smallest card
+BINOMIALS: List[List[int]] = [[comb(n, k + 1) for n in range(52)] for k in range(5)]
+B1, B2, B3, B4, B5 = BINOMIALS
+
+
+def colex_index(indices: Sequence[int]) -> int:
+    """
+    Position of a hand in the rank array, given its 5 card indices in
+    increasing order.
+    """
+    a, b, c, d, e = indices
+    return B1[a] + B2[b] + B3[c] + B4[d] + B5[e]
+
+
+@table_store.register("five_card_ranks", "H")
+def build_five_card_ranks():
+    """
+    Ranks every 5-card hand with the LookupTable dicts, vectorized with
+    NumPy. A flush's prime product is the same whether taken from its
+    rankbits or its cards, so one product per hand selects the entry from
+    either table.
+    """
+    import array
+    import numpy as np
+
+    table = LookupTable()
+    cards = np.array(CARDS_BY_INDEX, dtype=np.int64)
+    idx = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(52), 5)),
+                      dtype=np.int64, count=NUM_HANDS * 5).reshape(NUM_HANDS, 5)
+    hands = cards[idx]
+
+    flush = np.bitwise_and.reduce(hands, axis=1) & 0xF000 != 0
+    prime = np.prod(hands & 0xFF, axis=1)
+
+    ranks = np.empty(NUM_HANDS, dtype=np.uint16)
+    for mask, lookup in ((flush, table.flush_lookup), (~flush, table.unsuited_lookup)):
+        keys = np.array(sorted(lookup), dtype=np.int64)
+        values = np.array([lookup[k] for k in keys.tolist()], dtype=np.uint16)
+        ranks[mask] = values[np.searchsorted(keys, prime[mask])]
+
+    binomials = np.array(BINOMIALS, dtype=np.int64)
+    colex = sum(binomials[k][idx[:, k]] for k in range(5))
+
+    out = np.empty(NUM_HANDS, dtype=np.uint16)
+    out[colex] = ranks
+
+    data = array.array("H")
+    data.frombytes(out.tobytes())
+    return data
+
+
+def verify(ranks: Sequence[int]) -> int:
+    """
+    Checks every entry against Evaluator._five. Returns the number of
+    mismatching hands (0 when the table is good).
+    """
+    from eval_poker import Evaluator
+
+    evaluator = Evaluator()
+    mismatches = 0
+    for combo in itertools.combinations(range(52), 5):
+        expected = evaluator._five([CARDS_BY_INDEX[i] for i in combo])
+        if ranks[colex_index(combo)] != expected:
+            mismatches += 1
+    return mismatches
+
+
+if __name__ == "__main__":
+    if "--build" in sys.argv[1:]:
+        table_store.build("five_card_ranks", force=True)
+        print("Wrote {}".format(table_store.table_path("five_card_ranks")))
+    if "--verify" in sys.argv[1:]:
+        bad = verify(table_store.attach("five_card_ranks"))
+        print("{} of {} hands mismatched".format(bad, NUM_HANDS))
+        sys.exit(1 if bad else 0)
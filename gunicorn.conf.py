@@ -0,0 +1,21 @@
+# gunicorn picks this file up from the working directory.
+#
+# The app is imported once in the master (preload_app) with fast start and
+# shared tables on, so the lookup tables are built or mmapped before the
+# workers fork and every worker reads the same pages instead of holding its
+# own copy. Only the evaluator tables are built here; the precomputed ones
+# (preflop equity, push/fold) are a deploy step, python table_store.py
+# --build, and are built in the background if they are missing. See
+# table_store.py.
+import os
+
+os.environ.setdefault("RS_SHARED_TABLES", "1")
+os.environ.setdefault("RS_FAST_START", "1")
+
+preload_app = True
+
+
+def on_starting(server):
+    import table_store
+
+    table_store.build_all(precomputed=False)
@@ -0,0 +1,110 @@
+"""
+Exact probability of finishing with each hand class by the river.
+
+Every runout of the board is enumerated, but runouts that only differ by
+swapping suits the hole cards and board cannot tell apart are evaluated
+once. Suits are interchangeable when the known cards hold the same ranks
+in them (typically: none at all). Within such a group the representative
+is the runout whose suit rank masks come in non-increasing suit order,
+and it stands for as many runouts as there are distinct orderings of
+those masks. Preflop with suited hole cards this evaluates about one
+runout in six.
+
+The surviving runouts are ranked with showdown.player_ranks, and the
+results are memoized per canonical (suit-relabeled) hand and board.
+"""
+import math
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from board_ranks import SUIT_PERMUTATIONS
+from lookup import LookupTable
+from showdown import CARD_BITS, combinations_array, player_ranks
+
+CACHE_SIZE = 4096
+
+_CLASS_MAXIMA = np.array(sorted(LookupTable.MAX_TO_RANK_CLASS))
+_CLASS_OF_MAXIMUM = np.array([LookupTable.MAX_TO_RANK_CLASS[m] for m in _CLASS_MAXIMA])
+NUM_CLASSES = len(LookupTable.RANK_CLASS_TO_STRING)
+
+
+def canonical_spot(hand: Sequence[int], board: Sequence[int]) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    The smallest suit relabeling of hand and board.
+    """
+    return min(
+        (tuple(sorted((c & ~3) | perm[c & 3] for c in hand)), tuple(sorted((c & ~3) | perm[c & 3] for c in board)))
+        for perm in SUIT_PERMUTATIONS
+    )
+
+
+def _suit_groups(known: Sequence[int]):
+    """
+    Suits grouped by the ranks the known cards hold in them; only groups
+    of two or more suits are symmetries.
+    """
+    masks = [0] * 4
+    for c in known:
+        masks[c & 3] |= 1 << (c >> 2)
+    groups = {}
+    for suit in range(4):
+        groups.setdefault(masks[suit], []).append(suit)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def _representatives(runouts: np.ndarray, groups) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The runouts that represent their suit-swap orbit, and the orbit sizes.
+    """
+    if not groups:
+        return runouts, np.ones(len(runouts), dtype=np.int64)
+
+    bits = np.zeros(len(runouts), dtype=np.int64)
+    for i in range(runouts.shape[1]):
+        bits += CARD_BITS[runouts[:, i]]
+    keep = np.ones(len(runouts), dtype=bool)
+    weight = np.ones(len(runouts), dtype=np.int64)
+    for group in groups:
+        masks = [(bits >> (13 * suit)) & 0x1FFF for suit in group]
+        run = np.ones(len(runouts), dtype=np.int64)
+        denominator = np.ones(len(runouts), dtype=np.int64)
+        for prev, cur in zip(masks, masks[1:]):
+            keep &= prev >= cur
+            run = np.where(prev == cur, run + 1, 1)
+            denominator *= run
+        weight *= math.factorial(len(group)) // denominator
+    return runouts[keep], weight[keep]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _class_counts(hand: Tuple[int, ...], board: Tuple[int, ...]) -> Tuple[Tuple[int, ...], int, int]:
+    dead = set(hand) | set(board)
+    live = np.array([c for c in range(52) if c not in dead], dtype=np.int64)
+    runouts = live[combinations_array(len(live), 5 - len(board))]
+    representatives, weight = _representatives(runouts, _suit_groups(list(hand) + list(board)))
+
+    ranks = player_ranks([hand], board, representatives)[0]
+    classes = _CLASS_OF_MAXIMUM[np.searchsorted(_CLASS_MAXIMA, ranks, side="left")]
+    counts = np.bincount(classes, weights=weight, minlength=NUM_CLASSES)
+    return tuple(int(round(c)) for c in counts), len(runouts), len(representatives)
+
+
+def class_probabilities(hand: Sequence[int], board: Sequence[int] = ()) -> dict:
+    """
+    Probability of each LookupTable.RANK_CLASS_TO_STRING class by the
+    river, for hand and a 0, 3, 4 or 5 card board (card indices).
+    """
+    info = _class_counts.cache_info()
+    counts, runouts, evaluated = _class_counts(*canonical_spot(hand, board))
+    return {
+        "probabilities": {
+            LookupTable.RANK_CLASS_TO_STRING[c]: round(n / runouts, 6) for c, n in enumerate(counts)
+        },
+        "runouts": runouts,
+        "evaluated": evaluated,
+        "cached": _class_counts.cache_info().hits > info.hits,
+    }
@@ -0,0 +1,441 @@
+"""
+Streaming analysis of PokerStars-style hand history files.
+
+Input is consumed line by line: HandSplitter cuts the stream into hand
+texts at each "... Hand #<id>" header and groups them into batches of
+BATCH_HANDS. Batches go to a pool of RS_HH_WORKERS processes
+(default: one per core), and at most WINDOW_PER_WORKER batches per worker
+are in flight at once. Results are yielded strictly in input order by
+waiting on the oldest batch first, so memory stays bounded by the window
+no matter how large the file is. With one worker, batches are analyzed
+inline.
+
+For every hand, analyze_hand:
+- replays the flop, turn and river as Evaluator.hand_summary does, for
+  every player whose cards are known (hand class, percentage rank, who
+  leads), returned as data instead of printed;
+- computes each player's investment, winnings and net result;
+- for pots that went to showdown with a player all in before the river,
+  gives each showdown player's equity at the moment the money went in
+  (showdown.showdown per side pot, exact when the runouts are few and
+  seeded sampling otherwise), their expected net result, and luck
+  (actual net minus expected).
+
+The CLI (python hand_history.py FILE) and POST /hand_histories/ share
+this pipeline and both write one JSON object per hand (NDJSON), then a
+summary line with per-player totals.
+
+    python hand_history.py histories.txt --workers 4 > analysis.ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from card import Card
+from eval_poker import get_evaluator
+from five_card_table import CARD_INDEX
+from showdown import showdown
+
+WORKERS = int(os.environ.get("RS_HH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_HANDS = 64
+WINDOW_PER_WORKER = 2
+ALL_IN_EXACT_LIMIT = 100000
+ALL_IN_SAMPLES = 20000
+
+STREETS = ("PREFLOP", "FLOP", "TURN", "RIVER")
+BOARD_SIZES = (0, 3, 4, 5)
+
+HAND_START = re.compile(r"^\ufeff?[\w .'-]*? Hand #(\d+)")
+SEAT = re.compile(r"^Seat (\d+): (.+?) \((?:[$€£])?([\d.,]+) in chips")
+STREET = re.compile(r"^\*\*\* (FLOP|TURN|RIVER) \*\*\*(.*)$")
+ACTION = re.compile(r"^(.+?): (posts|bets|calls|raises|checks|folds|shows|mucks)\b(.*)$")
+COLLECTED = re.compile(r"^(.+?) collected (?:[$€£])?([\d.,]+) from")
+UNCALLED = re.compile(r"^Uncalled bet \((?:[$€£])?([\d.,]+)\) returned to (.+)$")
+DEALT = re.compile(r"^Dealt to (.+?) \[([^\]]+)\]")
+CARDS = re.compile(r"\[([^\]]+)\]")
+AMOUNT = re.compile(r"(?:[$€£])?(\d[\d,]*(?:\.\d+)?)")
+
+
+class HandSplitter:
+    """
+    Feed lines, get back batches of up to BATCH_HANDS hand texts; finish()
+    flushes what is left.
+    """
+    def __init__(self, batch_hands: int = BATCH_HANDS) -> None:
+        self.batch_hands = batch_hands
+        self.lines: List[str] = []
+        self.batch: List[str] = []
+
+    def _end_hand(self) -> None:
+        text = "\n".join(self.lines).strip()
+        self.lines = []
+        if text:
+            self.batch.append(text)
+
+    def feed(self, line: str) -> Optional[List[str]]:
+        if HAND_START.match(line):
+            self._end_hand()
+        if self.lines or line.strip():
+            self.lines.append(line.rstrip("\r\n"))
+        if len(self.batch) >= self.batch_hands:
+            batch, self.batch = self.batch, []
+            return batch
+        return None
+
+    def finish(self) -> Optional[List[str]]:
+        self._end_hand()
+        batch, self.batch = self.batch, []
+        return batch or None
+
+
+def _amount(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _cards(text: str) -> List[int]:
+    return [Card.new(c[0].upper() + c[1].lower()) for c in text.split()]
+
+
+def parse_hand(text: str) -> dict:
+    """
+    Players, hole cards, board and money flow of one hand.
+    """
+    lines = text.splitlines()
+    header = HAND_START.match(lines[0])
+    if not header:
+        raise ValueError("missing hand header")
+    players: Dict[str, dict] = {}
+    board: List[int] = []
+    street = 0
+    street_put: Dict[str, float] = {}
+    last_bet_street = 0
+    all_in = set()
+    folded = set()
+
+    for line in lines[1:]:
+        if line.startswith("*** SUMMARY ***"):
+            break
+        m = SEAT.match(line)
+        if m and not board and street == 0 and m.group(2) not in players:
+            players[m.group(2)] = {"seat": int(m.group(1)), "stack": _amount(m.group(3)), "cards": None,
+                                   "invested": 0.0, "collected": 0.0}
+            continue
+        m = STREET.match(line)
+        if m:
+            street = STREETS.index(m.group(1))
+            board = [c for group in CARDS.findall(m.group(2)) for c in _cards(group)]
+            street_put = {}
+            continue
+        m = DEALT.match(line)
+        if m and m.group(1) in players:
+            players[m.group(1)]["cards"] = _cards(m.group(2))
+            continue
+        m = UNCALLED.match(line)
+        if m and m.group(2) in players:
+            players[m.group(2)]["invested"] -= _amount(m.group(1))
+            continue
+        m = COLLECTED.match(line)
+        if m and m.group(1) in players:
+            players[m.group(1)]["collected"] += _amount(m.group(2))
+            continue
+        m = ACTION.match(line)
+        if not m or m.group(1) not in players:
+            continue
+        name, verb, rest = m.groups()
+        player = players[name]
+        if verb in ("shows", "mucks"):
+            shown = CARDS.search(rest)
+            if shown:
+                player["cards"] = _cards(shown.group(1))
+            continue
+        if verb == "folds":
+            folded.add(name)
+            continue
+        amounts = [_amount(a) for a in AMOUNT.findall(rest.split(" and is all-in")[0])]
+        if verb in ("bets", "calls") or (verb == "posts" and "ante" not in rest):
+            put = amounts[-1] if amounts else 0.0
+            street_put[name] = street_put.get(name, 0.0) + put
+        elif verb == "posts":
+            put = amounts[-1] if amounts else 0.0
+        elif verb == "raises":
+            # "raises 2 to 3": 3 is the street total
+            put = amounts[-1] - street_put.get(name, 0.0)
+            street_put[name] = amounts[-1]
+        else:
+            continue
+        player["invested"] += put
+        last_bet_street = street
+        if "all-in" in rest:
+            all_in.add(name)
+
+    if not players:
+        raise ValueError("no seated players (truncated hand?)")
+    if len(board) not in BOARD_SIZES:
+        raise ValueError("board has {} cards".format(len(board)))
+    return {
+        "hand_id": header.group(1),
+        "players": players,
+        "board": board,
+        "last_bet_street": last_bet_street,
+        "all_in": all_in,
+        "folded": folded,
+    }
+
+
+def _card_strs(cards: Optional[List[int]]) -> Optional[List[str]]:
+    return None if cards is None else [Card.int_to_str(c) for c in cards]
+
+
+def replay_streets(board: List[int], hands: Dict[str, List[int]]) -> List[dict]:
+    """
+    Evaluator.hand_summary as data: on each dealt street, every known
+    hand's class and percentage rank, and the leaders.
+    """
+    evaluator = get_evaluator()
+    streets = []
+    for i, street in enumerate(STREETS[1:], start=1):
+        if len(board) < BOARD_SIZES[i] or not hands:
+            break
+        shown = board[:BOARD_SIZES[i]]
+        ranks = {name: evaluator.evaluate(cards, shown) for name, cards in hands.items()}
+        best = min(ranks.values())
+        streets.append({
+            "street": street,
+            "board": _card_strs(shown),
+            "hands": {
+                name: {
+                    "hand_class": evaluator.class_to_string(evaluator.get_rank_class(rank)),
+                    "percentage": round(1.0 - evaluator.get_five_card_rank_percentage(rank), 4),
+                }
+                for name, rank in ranks.items()
+            },
+            "leaders": [name for name, rank in ranks.items() if rank == best],
+        })
+    return streets
+
+
+def all_in_equity(hand: dict, seed: int) -> Optional[dict]:
+    """
+    Equity and expected net result of every showdown player when the money
+    went in before the river, side pots included. Rake is charged to each
+    pot in proportion to its size.
+    """
+    players = hand["players"]
+    contenders = [name for name, p in players.items() if p["cards"] and name not in hand["folded"]]
+    shown = BOARD_SIZES[hand["last_bet_street"]]
+    if len(contenders) < 2 or not hand["all_in"] & set(contenders) or len(hand["board"]) <= shown:
+        return None
+    # showdown ranks Hold'em hands only; Omaha and other games get no equity
+    if any(len(players[name]["cards"]) != 2 for name in contenders):
+        return None
+
+    board = [CARD_INDEX[c] for c in hand["board"][:shown]]
+    invested = {name: p["invested"] for name, p in players.items()}
+    total_in = sum(invested.values())
+    collected = sum(p["collected"] for p in players.values())
+    rake = collected / total_in if total_in > 0 else 1.0
+
+    expected = {name: 0.0 for name in contenders}
+    equity = {}
+    previous = 0.0
+    for level in sorted({invested[name] for name in contenders}):
+        pot = sum(min(v, level) - min(v, previous) for v in invested.values()) * rake
+        eligible = [name for name in contenders if invested[name] >= level]
+        previous = level
+        if pot <= 0:
+            continue
+        if len(eligible) == 1:
+            expected[eligible[0]] += pot
+            continue
+        result = showdown([[CARD_INDEX[c] for c in players[name]["cards"]] for name in eligible], board,
+                          max_runouts=ALL_IN_EXACT_LIMIT, samples=ALL_IN_SAMPLES, seed=seed)
+        for name, share in zip(eligible, result["players"]):
+            expected[name] += pot * share["equity"] / 100
+            equity.setdefault(name, share["equity"])
+
+    ev_net = {name: round(expected[name] - invested[name], 2) for name in contenders}
+    return {
+        "street": STREETS[hand["last_bet_street"]],
+        "board": _card_strs(hand["board"][:shown]),
+        "equity": equity,
+        "ev_net": ev_net,
+        "luck": {
+            name: round(players[name]["collected"] - invested[name] - ev_net[name], 2) for name in contenders
+        },
+    }
+
+
+def analyze_hand(text: str) -> dict:
+    """
+    One hand's result, or {"hand_id", "error"} when it cannot be parsed or
+    analyzed, so one bad hand never stops the stream.
+    """
+    try:
+        return _analyze(parse_hand(text))
+    except Exception as e:
+        header = HAND_START.match(text)
+        return {"hand_id": header.group(1) if header else None, "error": "{}: {}".format(type(e).__name__, e)}
+
+
+def _analyze(hand: dict) -> dict:
+    players = hand["players"]
+    seed = int(hand["hand_id"]) % (1 << 63)
+    all_in = all_in_equity(hand, seed)
+    known = {name: p["cards"] for name, p in players.items() if p["cards"] and len(p["cards"]) == 2}
+    return {
+        "hand_id": hand["hand_id"],
+        "board": _card_strs(hand["board"]),
+        "players": [
+            {
+                "name": name,
+                "seat": p["seat"],
+                "stack": p["stack"],
+                "cards": _card_strs(p["cards"]),
+                "invested": round(p["invested"], 2),
+                "collected": round(p["collected"], 2),
+                "net": round(p["collected"] - p["invested"], 2),
+            }
+            for name, p in players.items()
+        ],
+        "streets": replay_streets(hand["board"], known),
+        "all_in": all_in,
+    }
+
+
+def analyze_batch(texts: List[str]) -> List[dict]:
+    return [analyze_hand(text) for text in texts]
+
+
+def _batches(lines: Iterable[str]) -> Iterator[List[str]]:
+    splitter = HandSplitter()
+    for line in lines:
+        batch = splitter.feed(line)
+        if batch:
+            yield batch
+    batch = splitter.finish()
+    if batch:
+        yield batch
+
+
+def analyze_stream(lines: Iterable[str], workers: int = WORKERS) -> Iterator[dict]:
+    """
+    Per-hand results in input order, with a bounded number of batches in
+    flight.
+    """
+    if workers <= 1:
+        for batch in _batches(lines):
+            yield from analyze_batch(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in _batches(lines):
+            pending.append(pool.submit(analyze_batch, batch))
+            if len(pending) >= workers * WINDOW_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+async def _decoded_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    rest = b""
+    async for chunk in chunks:
+        rest += chunk
+        *lines, rest = rest.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if rest:
+        yield rest.decode("utf-8", errors="replace")
+
+
+async def analyze_stream_async(chunks: AsyncIterator[bytes], workers: int = WORKERS) -> AsyncIterator[dict]:
+    """
+    analyze_stream over an async byte stream (an upload body), analyzing
+    batches off the event loop: in the process pool, or in a thread with
+    one worker.
+    """
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    window = max(workers, 1) * WINDOW_PER_WORKER
+    pending = deque()
+    splitter = HandSplitter()
+    try:
+        async for line in _decoded_lines(chunks):
+            batch = splitter.feed(line)
+            if batch:
+                pending.append(loop.run_in_executor(pool, analyze_batch, batch))
+                if len(pending) >= window:
+                    for result in await pending.popleft():
+                        yield result
+        batch = splitter.finish()
+        if batch:
+            pending.append(loop.run_in_executor(pool, analyze_batch, batch))
+        while pending:
+            for result in await pending.popleft():
+                yield result
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+class Summary:
+    """
+    Per-player totals over a stream of analyze_hand results: hands, net,
+    and all-in adjusted net (expected instead of actual result in all-in
+    showdowns).
+    """
+    def __init__(self) -> None:
+        self.hands = 0
+        self.errors = 0
+        self.players: Dict[str, dict] = {}
+
+    def add(self, result: dict) -> None:
+        self.hands += 1
+        if "error" in result:
+            self.errors += 1
+            return
+        all_in = result["all_in"]
+        for p in result["players"]:
+            totals = self.players.setdefault(p["name"], {"hands": 0, "net": 0.0, "adjusted_net": 0.0})
+            totals["hands"] += 1
+            totals["net"] += p["net"]
+            if all_in and p["name"] in all_in["ev_net"]:
+                totals["adjusted_net"] += all_in["ev_net"][p["name"]]
+            else:
+                totals["adjusted_net"] += p["net"]
+
+    def to_dict(self) -> dict:
+        return {
+            "hands": self.hands,
+            "errors": self.errors,
+            "players": {
+                name: {k: round(v, 2) for k, v in totals.items()} for name, totals in self.players.items()
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="hand history file, - for stdin")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--summary-only", action="store_true", help="print only the summary line")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", errors="replace")
+    summary = Summary()
+    with source:
+        for result in analyze_stream(source, args.workers):
+            summary.add(result)
+            if not args.summary_only:
+                print(json.dumps(result))
+    print(json.dumps({"summary": summary.to_dict()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Equity of all 169 starting hands against a range on a board.
+
+The runout set is drawn once (exact on the turn and river, `samples`
+random runouts earlier, as in range_equity) and each runout is ranked
+once for all 1326 holdings. range_equity.holding_totals then gives every
+holding's won and total opponent weight in one vectorized pass, so the
+whole grid costs about as much as a single range-vs-range query. Classes
+are the combo sums of their holdings.
+
+With workers > 1 the runouts are split across that many processes; the
+endpoint uses RS_HEATMAP_WORKERS (default 1). The pool is started on first
+use and kept for the life of the process, so requests do not pay for
+starting workers.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from board_ranks import rank_all_holdings
+from holdings import CLASS_LABELS, HOLDING_CLASS, NUM_CLASSES, NUM_HOLDINGS
+from range_equity import DEFAULT_SAMPLES, HOLDING_BITS, _runouts, board_bits, holding_totals
+
+WORKERS = int(os.environ.get("RS_HEATMAP_WORKERS", "1"))
+ALL_HOLDINGS = np.arange(NUM_HOLDINGS)
+
+# worker count => pool
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return _pools[workers]
+
+
+def _runout_totals(runouts, weights: np.ndarray, cache: bool):
+    won = np.zeros(NUM_HOLDINGS)
+    weight = np.zeros(NUM_HOLDINGS)
+    for full in runouts:
+        live = (HOLDING_BITS & board_bits(full)) == 0
+        ranks = rank_all_holdings(full, cache=cache).ranks.astype(np.int64)
+        w, t = holding_totals(ranks, ALL_HOLDINGS, weights * live)
+        won += w * live
+        weight += t * live
+    return won, weight
+
+
+def heatmap(weights: np.ndarray, board: Sequence[int] = (), samples: int = DEFAULT_SAMPLES,
+            seed: Optional[int] = None, workers: int = 1) -> dict:
+    """
+    weights is the opponent range (ranges.parse_range), board 0 or 3-5
+    card indices. Classes with no combo left get None.
+    """
+    runouts, exact = _runouts(board, samples, np.random.default_rng(seed))
+    if workers > 1:
+        chunks = [runouts[i::workers] for i in range(workers)]
+        pool = _pool(workers)
+        try:
+            parts = list(pool.map(_runout_totals, chunks, repeat(weights), repeat(exact)))
+        except BrokenProcessPool:
+            # a worker died; start a fresh pool for the next request
+            with _pools_lock:
+                if _pools.get(workers) is pool:
+                    del _pools[workers]
+            raise
+        won = sum(p[0] for p in parts)
+        weight = sum(p[1] for p in parts)
+    else:
+        won, weight = _runout_totals(runouts, weights, exact)
+
+    class_won = np.bincount(HOLDING_CLASS, weights=won, minlength=NUM_CLASSES)
+    class_weight = np.bincount(HOLDING_CLASS, weights=weight, minlength=NUM_CLASSES)
+    equity = [round(float(w / t) * 100, 2) if t > 0 else None for w, t in zip(class_won, class_weight)]
+    return {
+        "labels": [CLASS_LABELS[r * 13:(r + 1) * 13] for r in range(13)],
+        "equity": [equity[r * 13:(r + 1) * 13] for r in range(13)],
+        "exact": exact,
+        "boards": len(runouts),
+    }
@@ -0,0 +1,101 @@
+"""
+The 1326 two-card holdings and the 169 starting-hand classes.
+
+Cards are indices in [0, 52), rank * 4 + suit as in five_card_table
+(deuce = rank 0, ace = rank 12). Holding (i, j) with i < j sits at its
+colex rank C(j, 2) + i, so HOLDINGS[k] and holding_index() are inverses.
+
+Classes are laid out as the usual 13x13 grid with aces first: pairs on the
+diagonal, suited hands above it and offsuit hands below, class index
+row * 13 + col.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+NUM_HOLDINGS = 1326
+NUM_CLASSES = 169
+RANK_CHARS = "23456789TJQKA"
+
+HOLDINGS: List[Tuple[int, int]] = [(i, j) for j in range(52) for i in range(j)]
+
+# (1326, 2) array of the same holdings, for NumPy indexing
+HOLDING_CARDS = np.array(HOLDINGS, dtype=np.int64)
+
+# 52-bit mask of each holding's two cards
+HOLDING_MASKS: List[int] = [(1 << i) | (1 << j) for i, j in HOLDINGS]
+
+# (52, 52) holding index of every card pair, in either order (-1 on the diagonal)
+HOLDING_INDEX = np.full((52, 52), -1, dtype=np.int64)
+HOLDING_INDEX[HOLDING_CARDS[:, 0], HOLDING_CARDS[:, 1]] = np.arange(len(HOLDINGS))
+HOLDING_INDEX[HOLDING_CARDS[:, 1], HOLDING_CARDS[:, 0]] = np.arange(len(HOLDINGS))
+
+
+def holding_index(a: int, b: int) -> int:
+    i, j = (a, b) if a < b else (b, a)
+    return j * (j - 1) // 2 + i
+
+
+def class_of(a: int, b: int) -> int:
+    """
+    Grid index of the starting-hand class of cards a and b.
+    """
+    hi, lo = max(a >> 2, b >> 2), min(a >> 2, b >> 2)
+    row, col = 12 - hi, 12 - lo
+    if hi == lo:
+        return row * 13 + row
+    if (a & 3) == (b & 3):
+        return row * 13 + col
+    return col * 13 + row
+
+
+def class_label(cls: int) -> str:
+    row, col = divmod(cls, 13)
+    if row == col:
+        return RANK_CHARS[12 - row] * 2
+    if row < col:
+        return RANK_CHARS[12 - row] + RANK_CHARS[12 - col] + "s"
+    return RANK_CHARS[12 - col] + RANK_CHARS[12 - row] + "o"
+
+
+CLASS_LABELS: List[str] = [class_label(c) for c in range(NUM_CLASSES)]
+CLASS_INDEX = {label: c for c, label in enumerate(CLASS_LABELS)}
+
+# class of every holding, and the holdings of every class
+HOLDING_CLASS = np.array([class_of(i, j) for i, j in HOLDINGS], dtype=np.int64)
+CLASS_HOLDINGS: List[List[int]] = [list(np.flatnonzero(HOLDING_CLASS == c)) for c in range(NUM_CLASSES)]
+
+
+def blocked(cards) -> np.ndarray:
+    """
+    Boolean (1326,) array of the holdings that use any of cards.
+    """
+    dead = np.zeros(52, dtype=bool)
+    dead[list(cards)] = True
+    return dead[HOLDING_CARDS].any(axis=1)
+
+
+def cards_mask(cards) -> int:
+    """
+    52-bit mask of cards.
+    """
+    mask = 0
+    for c in cards:
+        mask |= 1 << c
+    return mask
+
+
+_conflicts = None
+
+
+def conflict_matrix() -> np.ndarray:
+    """
+    Boolean (1326, 1326) array, True where two holdings share a card.
+    """
+    global _conflicts
+    if _conflicts is None:
+        one_hot = np.zeros((NUM_HOLDINGS, 52), dtype=np.float32)
+        one_hot[np.arange(NUM_HOLDINGS), HOLDING_CARDS[:, 0]] = 1
+        one_hot[np.arange(NUM_HOLDINGS), HOLDING_CARDS[:, 1]] = 1
+        _conflicts = (one_hot @ one_hot.T) > 0
+    return _conflicts
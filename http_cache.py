@@ -0,0 +1,43 @@
+"""
+HTTP caching headers for responses that are a pure function of the request.
+
+A deterministic response (a fixed seed and num_sims, or an exact
+computation) gets a strong ETag: a hash of the canonical request, so
+requests that only differ in card order or case share it, plus
+ETAG_VERSION, which is bumped whenever the engine's output for the same
+request changes. Such responses are marked cacheable for
+RS_CACHE_MAX_AGE seconds, and a request whose If-None-Match carries the
+ETag is answered 304 without recomputing anything. Anything sampled
+without a seed is marked no-store, so neither browsers nor a CDN keep it.
+"""
+import hashlib
+import os
+from typing import Hashable, Optional
+
+ETAG_VERSION = "1"
+MAX_AGE = int(os.environ.get("RS_CACHE_MAX_AGE", "86400"))
+CACHEABLE = "public, max-age={}".format(MAX_AGE)
+NO_STORE = "no-store"
+
+
+def etag(*request: Hashable) -> str:
+    """
+    Strong ETag of a canonical request tuple.
+    """
+    digest = hashlib.sha256(repr((ETAG_VERSION,) + request).encode()).hexdigest()
+    return '"{}"'.format(digest[:32])
+
+
+def not_modified(if_none_match: Optional[str], tag: str) -> bool:
+    """
+    True when the If-None-Match header lists tag (or is "*"). The
+    comparison is weak, as RFC 9110 asks for If-None-Match, so a W/ copy
+    of the tag still matches.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
@@ -0,0 +1,201 @@
+"""
+ICM (Malmuth-Harville) tournament equity of stack distributions.
+
+Harville: each next finishing place goes to a remaining player with
+probability proportional to their stack. Summing over finishing orders
+is factorial; instead, for every set A of players, dp[A] is the
+probability that A are exactly the top |A| finishers (in some order):
+
+    dp[A] = sum over j in A of dp[A - j] * s_j / (S - stack(A - j))
+
+and player i (not in A) takes place |A| + 1 with probability
+dp[A] * s_i / (S - stack(A)). Only sets smaller than the number of paid
+places are needed, so this is at most 2^n * n work, done one set size at
+a time over NumPy arrays. It is used up to EXACT_PLAYERS players.
+
+Larger fields are sampled. Harville's order is the order of independent
+exponential clocks with rates s_i (the first to ring finishes first),
+so samples are drawn as (chunk, n) arrays of at most CHUNK_CELLS values
+and each row is ranked; only running sums of the prizes and of their
+squares are kept, so memory does not grow with samples. Every player
+gets a 95% half-width from the sample variance of their prize. A request
+may sample at most MAX_SAMPLED_CELLS samples x players in total.
+
+payouts[k] is the prize for place k + 1. With more payouts than players
+only the top len(stacks) prizes are in play: the remaining players can
+finish no lower than that, and the lower prizes are taken to be paid out
+already. Results report how many places were paid.
+"""
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+EXACT_PLAYERS = 12
+DEFAULT_SAMPLES = 20000
+MAX_PLAYERS = 1000
+CHUNK_CELLS = 1000000
+MAX_SAMPLED_CELLS = 50000000
+EXACT_CHUNK_ROWS = 64
+Z95 = 1.959964
+
+
+@lru_cache(maxsize=EXACT_PLAYERS + 1)
+def _subsets(n: int, places: int):
+    """
+    For n players: the (m, n) membership bits of every set smaller than
+    places, grouped by size, and for each set of each size its index in
+    the previous size's list once each member is removed (-1 where that
+    player is not a member).
+    """
+    masks = np.arange(1 << n)
+    sizes = np.zeros(1 << n, dtype=np.int64)
+    for i in range(n):
+        sizes += (masks >> i) & 1
+    layers = [masks[sizes == k] for k in range(min(places, n))]
+    bits = [((layer[:, None] >> np.arange(n)) & 1).astype(bool) for layer in layers]
+    parents = [None]
+    for k in range(1, len(layers)):
+        position = np.full(1 << n, -1)
+        position[layers[k - 1]] = np.arange(len(layers[k - 1]))
+        without = layers[k][:, None] ^ (1 << np.arange(n))
+        parents.append(np.where(bits[k], position[without], -1))
+    return bits, parents
+
+
+def _check(stacks: np.ndarray, payouts: np.ndarray) -> None:
+    if stacks.ndim not in (1, 2) or stacks.shape[-1] < 1:
+        raise ValueError("stacks must be a non-empty list")
+    if stacks.shape[-1] > MAX_PLAYERS:
+        raise ValueError("at most {} players".format(MAX_PLAYERS))
+    if (stacks <= 0).any():
+        raise ValueError("stacks must be positive")
+    if len(payouts) < 1 or (payouts < 0).any():
+        raise ValueError("payouts must be a non-empty list of non-negative prizes")
+
+
+def exact_equity(stacks, payouts: Sequence[float]) -> np.ndarray:
+    """
+    Each player's expected prize (see the module docstring for payouts).
+    stacks may also be a (batch, n) array of same-size fields, which are
+    then solved together.
+    """
+    s = np.asarray(stacks, dtype=np.float64)
+    prizes = np.asarray(payouts, dtype=np.float64)
+    _check(s, prizes)
+    single = s.ndim == 1
+    s = np.atleast_2d(s)
+    total = s.sum(axis=1, keepdims=True)
+    bits, parents = _subsets(s.shape[1], len(prizes))
+
+    equity = np.zeros(s.shape)
+    dp = np.ones((len(s), 1))
+    for k in range(len(bits)):
+        if k:
+            # each set from each of its one-smaller subsets, by the removed member winning next
+            parent = np.maximum(parents[k], 0)
+            previous = dp[:, parent] * (s[:, None, :] / (total[:, :, None] - stack_sums[:, parent]))
+            dp = np.where(bits[k], previous, 0).sum(axis=2)
+        stack_sums = s @ bits[k].T
+        take = dp * prizes[k] / (total - stack_sums)
+        equity += s * (take @ ~bits[k])
+    return equity[0] if single else equity
+
+
+def sampled_equity(stacks: Sequence[float], payouts: Sequence[float], samples: int = DEFAULT_SAMPLES,
+                   rng: Optional[np.random.Generator] = None):
+    """
+    Monte Carlo estimate of each player's expected prize and its 95%
+    half-width.
+    """
+    s = np.asarray(stacks, dtype=np.float64)
+    prizes = np.asarray(payouts, dtype=np.float64)
+    _check(s, prizes)
+    rng = rng or np.random.default_rng()
+    n = len(s)
+    paid = min(len(prizes), n)
+
+    total = np.zeros(n)
+    total_sq = np.zeros(n)
+    chunk = max(1, CHUNK_CELLS // n)
+    for start in range(0, samples, chunk):
+        size = min(chunk, samples - start)
+        clocks = rng.exponential(size=(size, n)) / s
+        if paid < n:
+            top = np.argpartition(clocks, paid - 1, axis=1)[:, :paid]
+            order = np.take_along_axis(top, np.argsort(np.take_along_axis(clocks, top, axis=1), axis=1), axis=1)
+        else:
+            order = np.argsort(clocks, axis=1)
+        # each paid place goes to one player per row, so prizes add up per player
+        won = np.bincount(order.ravel(), weights=np.broadcast_to(prizes[:paid], order.shape).ravel(), minlength=n)
+        won_sq = np.bincount(order.ravel(), weights=np.broadcast_to(prizes[:paid] ** 2, order.shape).ravel(),
+                             minlength=n)
+        total += won
+        total_sq += won_sq
+
+    mean = total / samples
+    if samples > 1:
+        variance = np.maximum(total_sq - samples * mean ** 2, 0) / (samples - 1)
+        error = Z95 * np.sqrt(variance / samples)
+    else:
+        error = np.full(n, np.inf)
+    return mean, error
+
+
+def _check_samples(players: int, samples: int) -> None:
+    if players * samples > MAX_SAMPLED_CELLS:
+        raise ValueError("samples x players may be at most {} per request".format(MAX_SAMPLED_CELLS))
+
+
+def icm(stacks: Sequence[float], payouts: Sequence[float], samples: int = DEFAULT_SAMPLES,
+        seed: Optional[int] = None, exact_players: int = EXACT_PLAYERS) -> dict:
+    """
+    ICM equity of one stack vector: exact up to exact_players players,
+    sampled beyond.
+    """
+    n = len(stacks)
+    if n <= exact_players:
+        equity = exact_equity(stacks, payouts)
+        error = None
+    else:
+        _check_samples(n, samples)
+        equity, error = sampled_equity(stacks, payouts, samples, np.random.default_rng(seed))
+    return _result(equity, error, payouts, samples)
+
+
+def _result(equity: np.ndarray, error: Optional[np.ndarray], payouts: Sequence[float], samples: int) -> dict:
+    total = float(np.sum(payouts[:len(equity)]))
+    return {
+        "equity": [round(float(e), 6) for e in equity],
+        "share": [round(float(e / total), 6) if total else 0.0 for e in equity],
+        "ci95": None if error is None else [round(float(e), 6) for e in error],
+        "exact": error is None,
+        "samples": None if error is None else samples,
+        "places_paid": min(len(payouts), len(equity)),
+    }
+
+
+def icm_batch(stack_vectors: List[Sequence[float]], payouts: Sequence[float], samples: int = DEFAULT_SAMPLES,
+              seed: Optional[int] = None) -> List[dict]:
+    """
+    icm for many stack vectors with the same payouts. Exact fields of the
+    same size are solved together, EXACT_CHUNK_ROWS at a time; sampled ones
+    draw their seeds from one generator, so a seeded batch is
+    reproducible. The sampled fields share one MAX_SAMPLED_CELLS budget.
+    """
+    _check_samples(sum(len(v) for v in stack_vectors if len(v) > EXACT_PLAYERS), samples)
+    rng = np.random.default_rng(seed)
+    results: List[Optional[dict]] = [None] * len(stack_vectors)
+    by_size = {}
+    for i, stacks in enumerate(stack_vectors):
+        if len(stacks) <= EXACT_PLAYERS:
+            by_size.setdefault(len(stacks), []).append(i)
+        else:
+            results[i] = icm(stacks, payouts, samples, int(rng.integers(1 << 63)), exact_players=0)
+    for rows in by_size.values():
+        for start in range(0, len(rows), EXACT_CHUNK_ROWS):
+            chunk = rows[start:start + EXACT_CHUNK_ROWS]
+            equities = exact_equity([stack_vectors[i] for i in chunk], payouts)
+            for i, equity in zip(chunk, equities):
+                results[i] = _result(equity, None, payouts, samples)
+    return results
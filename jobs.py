@@ -0,0 +1,310 @@
+"""
+Background jobs for simulations too large for one HTTP request.
+
+A job is split into chunks: CHUNK_SIMS random deals for a simulation, or
+CHUNK_BOARDS board runouts for a heads-up enumeration. Chunks run in a
+small process pool at a lower CPU priority (os.nice) than the web
+workers, so a research job does not compete with interactive requests
+for the GIL or, beyond what the OS gives it, for cores.
+
+A dispatcher thread hands out chunks one at a time, always from the
+highest priority job that still has chunks left (lower number first,
+then oldest), so an urgent job submitted behind a long one starts on the
+next free worker instead of waiting for it to finish.
+
+Every job's state is written to RS_JOB_DIR/<id>.json after each chunk.
+Any web worker can therefore answer GET for any job, and finished results
+survive restarts. DELETE from a worker that does not own the job leaves
+an <id>.cancel marker that the owner picks up before its next chunk.
+Finished jobs are dropped from memory FINISHED_TTL seconds after they
+end and answered from their file from then on. Ids that are not the
+32 hex digits submit hands out are never looked up on disk.
+"""
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+JOB_DIR = os.environ.get(
+    "RS_JOB_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs")
+)
+JOB_WORKERS = int(os.environ.get("RS_JOB_WORKERS", "1"))
+WORKER_NICENESS = 10
+FINISHED_TTL = float(os.environ.get("RS_JOB_TTL", "600"))
+JOB_ID = re.compile("[0-9a-f]{32}")
+
+KINDS = ("simulation", "enumeration")
+CHUNK_SIMS = 20000
+CHUNK_BOARDS = 64
+MAX_SIMS = 100000000
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+FINISHED = (DONE, CANCELLED, FAILED)
+
+
+def _lower_priority() -> None:
+    os.nice(WORKER_NICENESS)
+
+
+@lru_cache(maxsize=8)
+def _runouts(hand: tuple, board: tuple) -> np.ndarray:
+    """
+    Every completion of board to five cards, in a fixed shuffled order so
+    a partial enumeration is a uniform sample of the runouts.
+    """
+    live = [i for i in range(52) if i not in hand and i not in board]
+    completions = np.array(list(itertools.combinations(live, 5 - len(board))), dtype=np.int64)
+    runouts = np.concatenate([np.tile(np.array(board, dtype=np.int64), (len(completions), 1)), completions], axis=1)
+    return runouts[np.random.default_rng(0).permutation(len(runouts))]
+
+
+def _enumerate_boards(hand: Sequence[int], boards: np.ndarray):
+    """
+    Hero's pot shares against every opponent holding on each of boards.
+    """
+    from holdings import HOLDING_CARDS
+    from seven_card_dag import evaluate_batch
+
+    hero = evaluate_batch(np.concatenate([np.tile(np.array(hand, dtype=np.int64), (len(boards), 1)), boards], axis=1))
+
+    dead = np.zeros((len(boards), 52), dtype=bool)
+    np.put_along_axis(dead, boards, True, axis=1)
+    dead[:, list(hand)] = True
+    board_idx, holding_idx = np.nonzero(~(dead[:, HOLDING_CARDS[:, 0]] | dead[:, HOLDING_CARDS[:, 1]]))
+    opp = evaluate_batch(np.concatenate([HOLDING_CARDS[holding_idx], boards[board_idx]], axis=1))
+
+    hero = hero[board_idx]
+    return np.where(hero < opp, 1.0, np.where(hero == opp, 0.5, 0.0))
+
+
+def run_chunk(kind: str, params: dict, index: int) -> List[float]:
+    """
+    Runs chunk index of a job and returns [sum of shares, sum of squared
+    shares, trials]. Executed in the worker processes.
+    """
+    hand, board = tuple(params["hand"]), tuple(params["board"])
+    if kind == "simulation":
+        from equity import sample_equity
+
+        samples = min(CHUNK_SIMS, params["num_sims"] - index * CHUNK_SIMS)
+        rng = np.random.default_rng([params["seed"], index])
+        shares = sample_equity(hand, board, params["n_other_players"], samples, rng)
+    else:
+        runouts = _runouts(hand, board)
+        shares = _enumerate_boards(hand, runouts[index * CHUNK_BOARDS:(index + 1) * CHUNK_BOARDS])
+    return [float(shares.sum()), float((shares * shares).sum()), len(shares)]
+
+
+def chunk_count(kind: str, params: dict) -> int:
+    if kind == "simulation":
+        return math.ceil(params["num_sims"] / CHUNK_SIMS)
+    runouts = math.comb(52 - len(params["hand"]) - len(params["board"]), 5 - len(params["board"]))
+    return math.ceil(runouts / CHUNK_BOARDS)
+
+
+class Job:
+    def __init__(self, kind: str, params: dict, priority: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.status = QUEUED
+        self.chunks = chunk_count(kind, params)
+        self.next_chunk = 0
+        self.done_chunks = 0
+        self.in_flight = 0
+        self.totals = [0.0, 0.0, 0]
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    def estimate(self) -> dict:
+        total, squares, trials = self.totals
+        if not trials:
+            return {"win_percent": None, "ci95": None}
+        mean = total / trials
+        exact = self.kind == "enumeration" and self.status == DONE
+        if exact or trials < 2:
+            half_width = 0.0 if exact else None
+        else:
+            variance = max(squares / trials - mean * mean, 0.0) * trials / (trials - 1)
+            half_width = round(1.96 * math.sqrt(variance / trials) * 100, 4)
+        return {"win_percent": round(mean * 100, 4), "ci95": half_width}
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": round(self.done_chunks / self.chunks, 4),
+            "trials": self.totals[2],
+            **self.estimate(),
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class JobManager:
+    """
+    Owns the jobs submitted to this process, the chunk queue and the
+    process pool. Started lazily by the first submit.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, job_dir: str = JOB_DIR) -> None:
+        self.workers = workers
+        self.job_dir = job_dir
+        self.jobs: Dict[str, Job] = {}
+        self.queue: list = []
+        self.order = itertools.count()
+        self.in_flight = 0
+        self.cond = threading.Condition()
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.dispatcher: Optional[threading.Thread] = None
+
+    def _path(self, job_id: str, suffix: str = ".json") -> str:
+        return os.path.join(self.job_dir, job_id + suffix)
+
+    def _save(self, job: Job) -> None:
+        os.makedirs(self.job_dir, exist_ok=True)
+        path = self._path(job.id)
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp, path)
+
+    def _start(self) -> None:
+        if self.dispatcher is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_lower_priority)
+            self.dispatcher = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+            self.dispatcher.start()
+
+    def _evict(self) -> None:
+        """
+        Drops jobs that finished more than FINISHED_TTL ago. Called with
+        the lock held.
+        """
+        cutoff = time.time() - FINISHED_TTL
+        for job_id in [j.id for j in self.jobs.values() if j.finished is not None and j.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def submit(self, kind: str, params: dict, priority: int = 10) -> dict:
+        job = Job(kind, params, priority)
+        with self.cond:
+            self._start()
+            self._evict()
+            self.jobs[job.id] = job
+            heapq.heappush(self.queue, (priority, next(self.order), job.id))
+            self._save(job)
+            self.cond.notify()
+        return job.to_dict()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        with self.cond:
+            if job_id in self.jobs:
+                return self.jobs[job_id].to_dict()
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                if job.status not in FINISHED:
+                    self._finish(job, CANCELLED)
+                return job.to_dict()
+        state = self.get(job_id)
+        if state is not None and state["status"] not in FINISHED:
+            open(self._path(job_id, ".cancel"), "w").close()
+        return state
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished = time.time()
+        self._save(job)
+
+    def _next_job(self) -> Optional[Job]:
+        """
+        Highest priority job with chunks left to hand out. Called with the
+        lock held.
+        """
+        while self.queue:
+            job = self.jobs.get(self.queue[0][2])
+            if job is None:
+                heapq.heappop(self.queue)
+                continue
+            if job.status not in FINISHED and os.path.exists(self._path(job.id, ".cancel")):
+                os.remove(self._path(job.id, ".cancel"))
+                self._finish(job, CANCELLED)
+            if job.status in FINISHED or job.next_chunk >= job.chunks:
+                heapq.heappop(self.queue)
+                continue
+            return job
+        return None
+
+    def _dispatch(self) -> None:
+        while True:
+            with self.cond:
+                job = None
+                while job is None:
+                    if self.in_flight < self.workers:
+                        job = self._next_job()
+                    if job is None:
+                        self.cond.wait()
+                index = job.next_chunk
+                job.next_chunk += 1
+                job.in_flight += 1
+                job.status = RUNNING
+                self.in_flight += 1
+            future = self.pool.submit(run_chunk, job.kind, job.params, index)
+            future.add_done_callback(lambda f, job=job: self._collect(job, f))
+
+    def _collect(self, job: Job, future) -> None:
+        with self.cond:
+            self.in_flight -= 1
+            job.in_flight -= 1
+            self.cond.notify()
+            if job.status in FINISHED:
+                return
+            try:
+                total, squares, trials = future.result()
+            except Exception as e:
+                job.error = repr(e)
+                self._finish(job, FAILED)
+                return
+            job.totals = [job.totals[0] + total, job.totals[1] + squares, job.totals[2] + trials]
+            job.done_chunks += 1
+            if job.done_chunks == job.chunks:
+                self._finish(job, DONE)
+            else:
+                self._save(job)
+
+
+_manager: Optional[JobManager] = None
+
+
+def manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager()
+    return _manager
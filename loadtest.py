@@ -0,0 +1,246 @@
+"""
+Local load generator for the API with latency SLO reporting.
+
+Starts main:app under uvicorn (as a subprocess by default, or in a thread
+of this process with --in-process), or targets a running server with
+--url, then drives /get_win_rate/, /pot_odds/ and /implied_odds/ from
+--concurrency closed-loop clients for --duration seconds. Inputs are drawn
+from a realistic mix: preflop, flop and river spots with varying num_sims
+and n_other_players, plus the cheap odds endpoints.
+
+Throughput, p50/p95/p99 latency and error rate are printed per endpoint
+and written to a JSON report so runs can be compared:
+
+    python loadtest.py --concurrency 8 --duration 30 --slo-p99-ms 500
+    python loadtest.py --url http://127.0.0.1:8000 --out before.json
+
+Exits non-zero when the overall p99 misses --slo-p99-ms.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+RANKS = "23456789tjqka"
+SUITS = "shdc"
+DECK = [r + s for r in RANKS for s in SUITS]
+
+# (weight, scenario name)
+DEFAULT_MIX = [
+    (3, "preflop"),
+    (3, "flop"),
+    (2, "river"),
+    (1, "pot_odds"),
+    (1, "implied_odds"),
+]
+NUM_SIMS_CHOICES = [100, 250, 500, 1000]
+
+
+def make_request(scenario: str, rng: random.Random) -> Tuple[str, str]:
+    """
+    Returns (endpoint, path with query string) for one request of the scenario.
+    """
+    if scenario in ("preflop", "flop", "river"):
+        cards = rng.sample(DECK, 2 + {"preflop": 0, "flop": 3, "river": 5}[scenario])
+        query = {
+            "my_hand": ",".join(cards[:2]),
+            "my_board_representation": ",".join(cards[2:]),
+            "num_sims": rng.choice(NUM_SIMS_CHOICES),
+            "n_other_players": rng.randint(1, 8),
+        }
+        endpoint = "/get_win_rate/"
+    elif scenario == "pot_odds":
+        query = {"current_pot": round(rng.uniform(1, 500), 2), "bet": round(rng.uniform(1, 200), 2)}
+        endpoint = "/pot_odds/"
+    else:
+        query = {
+            "chance_percent": rng.randint(1, 99),
+            "current_pot": round(rng.uniform(1, 500), 2),
+            "amount_to_call": round(rng.uniform(1, 200), 2),
+        }
+        endpoint = "/implied_odds/"
+    return endpoint, endpoint + "?" + urllib.parse.urlencode(query)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile: the smallest value with at least p% of the
+    values at or below it.
+    """
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    ordered = sorted(latencies)
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 6) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def client(host: str, port: int, deadline: float, mix: List[Tuple[int, str]], seed: int, results: Dict, lock: threading.Lock) -> None:
+    rng = random.Random(seed)
+    weights = [w for w, _ in mix]
+    names = [n for _, n in mix]
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+
+    while time.perf_counter() < deadline:
+        endpoint, path = make_request(rng.choices(names, weights)[0], rng)
+        start = time.perf_counter()
+        ok = False
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=120)
+        latency = time.perf_counter() - start
+
+        with lock:
+            entry = results.setdefault(endpoint, {"latencies": [], "errors": 0})
+            entry["latencies"].append(latency)
+            entry["errors"] += not ok
+    conn.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server on {}:{} did not come up".format(host, port))
+
+
+def start_subprocess(port: int, workers: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def start_in_process(port: int):
+    import uvicorn
+
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--in-process", action="store_true", help="run the app in a thread of this process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the subprocess server")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", help="weights as name=w,... over " + ",".join(n for _, n in DEFAULT_MIX))
+    parser.add_argument("--slo-p99-ms", type=float, help="fail when overall p99 is above this")
+    parser.add_argument("--out", help="JSON report path (default loadtest_reports/<timestamp>.json)")
+    args = parser.parse_args()
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        weights = dict(item.split("=") for item in args.mix.split(","))
+        mix = [(float(weights.get(n, 0)), n) for _, n in DEFAULT_MIX]
+
+    proc = server = None
+    if args.url:
+        target = urllib.parse.urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        if args.in_process:
+            server = start_in_process(port)
+        else:
+            proc = start_subprocess(port, args.workers)
+    try:
+        wait_until_up(host, port)
+
+        results: Dict = {}
+        lock = threading.Lock()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for i in range(args.concurrency):
+                pool.submit(client, host, port, deadline, mix, args.seed + i, results, lock)
+        elapsed = time.perf_counter() - start
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if server is not None:
+            server.should_exit = True
+
+    all_latencies = [x for r in results.values() for x in r["latencies"]]
+    report = {
+        "config": {
+            "target": args.url or ("in-process" if args.in_process else "subprocess"),
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed,
+            "mix": {n: w for w, n in mix},
+        },
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - elapsed)),
+        "overall": summarize(all_latencies, sum(r["errors"] for r in results.values()), elapsed),
+        "endpoints": {e: summarize(r["latencies"], r["errors"], elapsed) for e, r in sorted(results.items())},
+    }
+
+    print("{:<16} {:>8} {:>9} {:>9} {:>9} {:>9} {:>8}".format("endpoint", "reqs", "rps", "p50_ms", "p95_ms", "p99_ms", "err%"))
+    for name, s in [("overall", report["overall"])] + list(report["endpoints"].items()):
+        print("{:<16} {:>8} {:>9.2f} {:>9.1f} {:>9.1f} {:>9.1f} {:>8.2f}".format(
+            name, s["requests"], s["throughput_rps"], s["p50_ms"], s["p95_ms"], s["p99_ms"], s["error_rate"] * 100))
+
+    out = args.out or os.path.join("loadtest_reports", time.strftime("%Y%m%dT%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print("report written to {}".format(out))
+
+    if args.slo_p99_ms is not None and report["overall"]["p99_ms"] > args.slo_p99_ms:
+        print("p99 {:.1f} ms is over the {:.1f} ms SLO".format(report["overall"]["p99_ms"], args.slo_p99_ms))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
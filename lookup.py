@@ -1,5 +1,7 @@
 # from collections.abc import Iterator
 import itertools
+import os
+import pickle
 from typing import Sequence
 
 from card import Card
@@ -256,6 +258,35 @@ class LookupTable:
                 self.unsuited_lookup[product] = rank
                 rank += 1
 
+    @classmethod
+    def from_snapshot(cls, filepath: str) -> "LookupTable":
+        """
+        Loads both tables from a file written by write_snapshot, skipping
+        the generation done in __init__. Raises ValueError when the file
+        does not hold the 7462 ranks (corrupt, or from another version).
+        """
+        table = cls.__new__(cls)
+        try:
+            with open(filepath, 'rb') as f:
+                table.flush_lookup, table.unsuited_lookup = pickle.load(f)
+            count = len(table.flush_lookup) + len(table.unsuited_lookup)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError):
+            count = None
+        if count != cls.MAX_HIGH_CARD:
+            raise ValueError("{} is not a lookup snapshot".format(filepath))
+        return table
+
+    def write_snapshot(self, filepath: str) -> None:
+        """
+        Writes flush_lookup and unsuited_lookup to one file that
+        from_snapshot can load. The file is replaced in one step, so
+        another process never reads half of it.
+        """
+        tmp = "{}.{}.tmp".format(filepath, os.getpid())
+        with open(tmp, 'wb') as f:
+            pickle.dump((self.flush_lookup, self.unsuited_lookup), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, filepath)
+
     def write_table_to_disk(self, table: Dict[int, int], filepath: str) -> None:
         """
         Writes lookup table to disk
@@ -1,9 +1,29 @@
-from eval_poker import simulate_win_percent
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import math
+import os
+from typing import List, Optional
+
+import profiling
+import startup
+
+# a missing precomputed table is built in the background, never inside a request
+os.environ.setdefault("RS_BUILD_IN_BACKGROUND", "1")
+
+with startup.phase("import_engine"):
+    import table_store
+    from eval_poker import parse_cards, simulate_win_percent
+    from sampling import SAMPLING_MODES
+
+with startup.phase("import_web"):
+    from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+    from pydantic import BaseModel
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
+    from mangum import Mangum
+    from starlette.concurrency import run_in_threadpool
+
+    import coalesce
+    import http_cache
 
-import uvicorn
-from mangum import Mangum
 app = FastAPI()
 
 origins = [
@@ -20,9 +40,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Grid-Axes", "X-Grid-Shape", "ETag"],
 )
 handler = Mangum(app)
 
+if startup.fast_start_enabled():
+    startup.warm_up()
+
+
+@app.exception_handler(table_store.TableNotReady)
+async def table_not_ready(request: Request, exc: table_store.TableNotReady):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "60"})
+
+
+@app.on_event("startup")
+async def warm_up():
+    startup.warm_up()
+
+
+@app.get("/startup_profile/")
+async def startup_profile():
+    return {"fast_start": startup.fast_start_enabled(), "phases": startup.PROFILE}
+
+
+@app.get("/coalescing_stats/")
+async def coalescing_stats():
+    return coalesce.win_rates.snapshot()
+
 
 
 
@@ -31,12 +75,6 @@ async def root():
     return {"message": "Hello World"}
 
 
-@app.get("/implied_odds/")
-async def calculate_pot_odds(chance_percent: int = 1, current_pot: float = 1.0, amount_to_call: float = 1.0):
-    implied_odds_dollars = ((1 / (chance_percent/100.0)) * amount_to_call) - (current_pot + amount_to_call) 
-    return {"implied_odds_dollars": implied_odds_dollars}
-
-
 # @app.get("/g_bucks/")
 # async def calculate_pot_odds(chance_percent: int = 1, current_pot: float = 1.0, amount_to_call: float = 1.0):
 #     implied_odds_dollars = ((1 / (chance_percent/100.0)) * amount_to_call) - (current_pot + amount_to_call) 
@@ -48,15 +86,73 @@ from eval_poker import simulate_win_percent
 
 @app.get("/implied_odds/")
 async def calculate_implied_odds(chance_percent: int = 1, current_pot: float = 1.0, amount_to_call: float = 1.0):
-    implied_odds_dollars = ((1 / (chance_percent/100.0)) * amount_to_call) - (current_pot + amount_to_call) 
+    import odds
+
+    try:
+        odds.check_chance(chance_percent)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # null when chance_percent is 0: no amount of future winnings pays for the call
+    implied_odds_dollars = odds.scalar(odds.implied_odds(chance_percent, current_pot, amount_to_call))
     return {"implied_odds_dollars": implied_odds_dollars}
 
 @app.get("/pot_odds/")
 async def calculate_pot_odds(current_pot: float = 1.0, bet: float = 1.0):
-    pot_odds = (current_pot + bet ) /bet
+    import odds
+
+    pot_odds = odds.scalar(odds.pot_odds(current_pot, bet))
     return {"pot_odds": pot_odds}
 
 
+GRID_FORMATS = ("json", "binary")
+
+
+def odds_grid(fn, axes: dict, format: str, checks: Optional[dict] = None):
+    """
+    A grid response: columnar JSON, or the values as little-endian float64
+    in row-major order (inf for unbounded odds) with the axis names and
+    shape in X-Grid-Axes and X-Grid-Shape. checks maps an axis name to a
+    validator for its parsed values. Raises ValueError on a bad format or
+    axis, for the route to turn into a 422.
+    """
+    import odds
+
+    if format not in GRID_FORMATS:
+        raise ValueError("format must be one of {}".format(", ".join(GRID_FORMATS)))
+    axes = {name: odds.parse_axis(text, name) for name, text in axes.items()}
+    for name, check in (checks or {}).items():
+        check(axes[name])
+    values = odds.grid(fn, axes)
+    if format == "json":
+        return odds.columnar(axes, values)
+    return Response(content=values.astype("<f8").tobytes(), media_type="application/octet-stream", headers={
+        "X-Grid-Axes": ",".join(axes),
+        "X-Grid-Shape": ",".join(str(n) for n in values.shape),
+    })
+
+
+@app.get("/implied_odds/grid/")
+def implied_odds_grid(chance_percent: str = "1", current_pot: str = "1", amount_to_call: str = "1",
+                      format: str = "json"):
+    import odds
+
+    axes = {"chance_percent": chance_percent, "current_pot": current_pot, "amount_to_call": amount_to_call}
+    try:
+        return odds_grid(odds.implied_odds, axes, format, checks={"chance_percent": odds.check_chance})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/pot_odds/grid/")
+def pot_odds_grid(current_pot: str = "1", bet: str = "1", format: str = "json"):
+    import odds
+
+    try:
+        return odds_grid(odds.pot_odds, {"current_pot": current_pot, "bet": bet}, format)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 
 
 num_sims = 1000
@@ -69,14 +165,58 @@ num_sims = 1000
 
 
 
+MAX_TIME_BUDGET_MS = 10000
+
+
 @app.get("/get_win_rate/")
-async def calculate_pot_odds(my_board_representation: str = "",  my_hand:str = "", num_sims: int = 1000):
+async def calculate_pot_odds(response: Response, my_board_representation: str = "",  my_hand:str = "", num_sims: Optional[int] = None, n_other_players: int = 3, sampling: str = "random",
+                             time_budget_ms: Optional[float] = None, seed: Optional[int] = None,
+                             x_rs_profile: Optional[str] = Header(default=None), if_none_match: Optional[str] = Header(default=None)):
+
+    if sampling not in SAMPLING_MODES:
+        raise HTTPException(status_code=422, detail="sampling must be one of {}".format(", ".join(SAMPLING_MODES)))
+    if not 1 <= n_other_players <= 9:
+        raise HTTPException(status_code=422, detail="n_other_players must be between 1 and 9")
+    if num_sims is not None and num_sims < 1:
+        raise HTTPException(status_code=422, detail="num_sims must be at least 1")
+    if time_budget_ms is None:
+        num_sims = 1000 if num_sims is None else num_sims
+    elif not 1 <= time_budget_ms <= MAX_TIME_BUDGET_MS:
+        raise HTTPException(status_code=422, detail="time_budget_ms must be between 1 and {}".format(MAX_TIME_BUDGET_MS))
+    # a seeded result depends on the suit labels, so it may only be shared with the same canonical spot
+    key_mode = "canonical" if seed is not None else coalesce.KEY_MODE
+    key = (coalesce.spot_key(my_hand, my_board_representation, mode=key_mode), n_other_players, num_sims, sampling,
+           time_budget_ms, seed)
+    profiled = profiling.allowed(x_rs_profile)
+
+    # a seed and a fixed num_sims give the same body every time; a time budget does not
+    if seed is not None and time_budget_ms is None and not profiled:
+        tag = http_cache.etag("get_win_rate", coalesce.spot_key(my_hand, my_board_representation, mode="canonical"),
+                              n_other_players, num_sims, sampling, seed)
+        headers = {"ETag": tag, "Cache-Control": http_cache.CACHEABLE}
+        if http_cache.not_modified(if_none_match, tag):
+            return Response(status_code=304, headers=headers)
+    else:
+        headers = {"Cache-Control": http_cache.NO_STORE}
+    response.headers.update(headers)
 
     my_board_representation = [str(x) for x in my_board_representation.split(",")]
     my_hand = [str(x) for x in my_hand.split(",")]
-    print(my_hand)
-    win_percent = simulate_win_percent(my_board_representation, my_hand, num_sims, n_other_players=3,print_sim=False, print_ravg=True, decimal_places=2)
-    return {"win_percent": win_percent}
+
+    def run():
+        # with a time budget the engine reports num_sims and ci95 as well
+        result = simulate_win_percent(my_board_representation, my_hand, num_sims, n_other_players=n_other_players,print_sim=False, print_ravg=False, decimal_places=2, sampling=sampling,
+                                      seed=seed, time_budget_ms=time_budget_ms)
+        return result if time_budget_ms is not None else {"win_percent": result}
+
+    if profiled:
+        def run_profiled():
+            with profiling.profile("get_win_rate") as report:
+                result = run()
+            return {**result, "profile": report}
+        return await run_in_threadpool(run_profiled)
+
+    return await coalesce.win_rates.do(key, run)
 
 
 
@@ -98,3 +238,316 @@ async def get_win_rate(my_board_representation: str = "", my_hand: str = "", num
     return {"win_rate": win_rate}
 
 
+
+
+def parse_spot(my_hand: str, my_board_representation: str, board_sizes=(0, 3, 4, 5), hand_size=2):
+    """
+    Parses the hand and board query strings into card indices, answering
+    422 for anything that is not a legal spot.
+    """
+    from equity import to_indices
+
+    try:
+        hand = parse_cards(my_hand)
+        board = parse_cards(my_board_representation)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if len(hand) != hand_size:
+        raise HTTPException(status_code=422, detail="my_hand must have {} cards".format(hand_size))
+    if len(board) not in board_sizes:
+        raise HTTPException(status_code=422, detail="board must have {} cards".format(" or ".join(map(str, board_sizes))))
+    if set(hand) & set(board):
+        raise HTTPException(status_code=422, detail="hand and board share a card")
+    return to_indices(hand), to_indices(board)
+
+
+@app.get("/recommend_action/")
+def recommend_action(my_hand: str, my_board_representation: str = "", pot: float = 1.0, stack: float = 100.0,
+                     to_call: float = 0.0, n_other_players: int = 1, raise_sizes: str = "0.5,1",
+                     time_budget_ms: float = 50.0):
+    from mcts import recommend_action as search
+
+    hand, board = parse_spot(my_hand, my_board_representation)
+    if not 1 <= n_other_players <= 9:
+        raise HTTPException(status_code=422, detail="n_other_players must be between 1 and 9")
+    if pot <= 0 or stack < 0 or to_call < 0:
+        raise HTTPException(status_code=422, detail="pot must be positive, stack and to_call non-negative")
+    if not 1 <= time_budget_ms <= 2000:
+        raise HTTPException(status_code=422, detail="time_budget_ms must be between 1 and 2000")
+    try:
+        sizes = tuple(float(x) for x in raise_sizes.split(",") if x.strip())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="raise_sizes must be comma separated pot fractions")
+    if not sizes or not all(s > 0 and math.isfinite(s) for s in sizes):
+        raise HTTPException(status_code=422, detail="raise_sizes must be positive pot fractions")
+
+    return search(hand, board, pot, stack, to_call, n_other_players, sizes, time_budget_ms)
+
+
+@app.get("/push_fold/")
+def push_fold_chart(n_players: int = 9, stack_bb: float = 10.0, position: str = "BTN", my_hand: str = ""):
+    from holdings import class_of
+    from push_fold import PLAYER_COUNTS, chart, positions
+
+    if n_players not in PLAYER_COUNTS:
+        raise HTTPException(status_code=422, detail="n_players must be between 2 and 9")
+    if stack_bb <= 0:
+        raise HTTPException(status_code=422, detail="stack_bb must be positive")
+    if position not in positions(n_players):
+        raise HTTPException(status_code=422, detail="position must be one of {}".format(", ".join(positions(n_players))))
+    hand_class = None
+    if my_hand:
+        hand, _ = parse_spot(my_hand, "", board_sizes=(0,))
+        hand_class = class_of(*hand)
+
+    return chart(n_players, stack_bb, position, hand_class)
+
+
+class JobRequest(BaseModel):
+    kind: str = "simulation"
+    my_hand: str
+    my_board_representation: str = ""
+    n_other_players: int = 1
+    num_sims: int = 1000000
+    priority: int = 10
+    seed: Optional[int] = None
+
+
+@app.post("/jobs/", status_code=202)
+def submit_job(request: JobRequest):
+    import random
+
+    import jobs
+
+    if request.kind not in jobs.KINDS:
+        raise HTTPException(status_code=422, detail="kind must be one of {}".format(", ".join(jobs.KINDS)))
+    board_sizes = (3, 4, 5) if request.kind == "enumeration" else (0, 3, 4, 5)
+    hand, board = parse_spot(request.my_hand, request.my_board_representation, board_sizes=board_sizes)
+    if request.kind == "enumeration" and request.n_other_players != 1:
+        raise HTTPException(status_code=422, detail="enumeration is heads-up only, n_other_players must be 1")
+    if not 1 <= request.n_other_players <= 9:
+        raise HTTPException(status_code=422, detail="n_other_players must be between 1 and 9")
+    if not 1 <= request.num_sims <= jobs.MAX_SIMS:
+        raise HTTPException(status_code=422, detail="num_sims must be between 1 and {}".format(jobs.MAX_SIMS))
+
+    params = {"hand": hand, "board": board, "n_other_players": request.n_other_players}
+    if request.kind == "simulation":
+        params["num_sims"] = request.num_sims
+        params["seed"] = request.seed if request.seed is not None else random.getrandbits(63)
+    return jobs.manager().submit(request.kind, params, request.priority)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    import jobs
+
+    state = jobs.manager().get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="no such job")
+    return state
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    import jobs
+
+    state = jobs.manager().cancel(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="no such job")
+    return state
+
+
+@app.get("/hand_rank_on_board/")
+def hand_rank_on_board(my_hand: str, my_board_representation: str):
+    from board_ranks import rank_all_holdings
+
+    hand, board = parse_spot(my_hand, my_board_representation, board_sizes=(5,))
+    return rank_all_holdings(board).standing(hand)
+
+
+@app.get("/range_equity/")
+def range_equity(ranges: List[str] = Query(...), my_board_representation: str = "", samples: int = 1000,
+                 seed: Optional[int] = None):
+    from range_equity import range_equity as compute
+    from ranges import parse_range
+
+    _, board = parse_spot("", my_board_representation, hand_size=0)
+    if not 2 <= len(ranges) <= 10:
+        raise HTTPException(status_code=422, detail="give between 2 and 10 ranges")
+    if not 1 <= samples <= 20000:
+        raise HTTPException(status_code=422, detail="samples must be between 1 and 20000")
+    try:
+        weights = [parse_range(r) for r in ranges]
+        return compute(weights, board, samples, seed)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/showdown/")
+def known_hands_showdown(hands: List[str] = Query(...), my_board_representation: str = "",
+                         max_runouts: int = 2000000, samples: int = 200000, seed: Optional[int] = None):
+    from showdown import showdown
+
+    if not 2 <= len(hands) <= 10:
+        raise HTTPException(status_code=422, detail="give between 2 and 10 hands")
+    if not 1 <= samples <= 2000000:
+        raise HTTPException(status_code=422, detail="samples must be between 1 and 2000000")
+    board = None
+    parsed = []
+    for hand in hands:
+        cards, board = parse_spot(hand, my_board_representation)
+        parsed.append(cards)
+    if len({c for cards in parsed for c in cards}) != 2 * len(parsed):
+        raise HTTPException(status_code=422, detail="hands share a card")
+
+    return showdown(parsed, board, max_runouts, samples, seed)
+
+
+@app.get("/outs/")
+def outs(my_hand: str, my_board_representation: str, n_other_players: int = 1, seed: Optional[int] = None):
+    from outs import outs as compute
+
+    hand, board = parse_spot(my_hand, my_board_representation, board_sizes=(3, 4))
+    if not 1 <= n_other_players <= 9:
+        raise HTTPException(status_code=422, detail="n_other_players must be between 1 and 9")
+    return compute(hand, board, n_other_players, seed)
+
+
+@app.get("/hand_class_odds/")
+def hand_class_odds(my_hand: str, my_board_representation: str = ""):
+    from hand_classes import class_probabilities
+
+    hand, board = parse_spot(my_hand, my_board_representation)
+    return class_probabilities(hand, board)
+
+
+@app.get("/equity_curve/")
+def equity_curve(my_hand: str, my_board_representation: str = "", max_opponents: int = 9, num_sims: int = 20000,
+                 seed: Optional[int] = None):
+    import numpy as np
+
+    from equity import equity_curve as compute
+
+    hand, board = parse_spot(my_hand, my_board_representation)
+    if not 1 <= max_opponents <= 9:
+        raise HTTPException(status_code=422, detail="max_opponents must be between 1 and 9")
+    if not 1 <= num_sims <= 200000:
+        raise HTTPException(status_code=422, detail="num_sims must be between 1 and 200000")
+
+    curve = compute(hand, board, max_opponents, num_sims, np.random.default_rng(seed))
+    return {
+        "num_sims": num_sims,
+        "curve": [{**point, **{k: round(point[k] * 100, 2) for k in ("win", "tie", "loss", "equity")}} for point in curve],
+    }
+
+
+@app.get("/equity_heatmap/")
+def equity_heatmap(opponent_range: str, my_board_representation: str = "", samples: int = 1000,
+                   seed: Optional[int] = None):
+    from heatmap import WORKERS, heatmap
+    from ranges import parse_range
+
+    _, board = parse_spot("", my_board_representation, hand_size=0)
+    if not 1 <= samples <= 20000:
+        raise HTTPException(status_code=422, detail="samples must be between 1 and 20000")
+    try:
+        weights = parse_range(opponent_range)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return heatmap(weights, board, samples, seed, WORKERS)
+
+
+@app.get("/river_solver/")
+def river_solver(oop_range: str, ip_range: str, my_board_representation: str, pot: float = 1.0,
+                 stack: float = 1.0, bet_sizes: str = "0.5,1", max_raises: int = 1, iterations: int = 1000,
+                 target_exploitability: float = 0.5, my_hand: str = "", time_budget_ms: float = 5000.0):
+    from ranges import parse_range
+    from river_solver import solve_spot
+
+    hand, board = parse_spot(my_hand, my_board_representation, board_sizes=(5,), hand_size=2 if my_hand else 0)
+    if pot <= 0 or stack <= 0:
+        raise HTTPException(status_code=422, detail="pot and stack must be positive")
+    if not 0 <= max_raises <= 3:
+        raise HTTPException(status_code=422, detail="max_raises must be between 0 and 3")
+    if not 1 <= iterations <= 5000:
+        raise HTTPException(status_code=422, detail="iterations must be between 1 and 5000")
+    if not 1 <= time_budget_ms <= MAX_TIME_BUDGET_MS:
+        raise HTTPException(status_code=422, detail="time_budget_ms must be between 1 and {}".format(MAX_TIME_BUDGET_MS))
+    try:
+        sizes = tuple(float(x) for x in bet_sizes.split(",") if x.strip())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bet_sizes must be comma separated pot fractions")
+    if not 1 <= len(sizes) <= 4 or min(sizes) <= 0:
+        raise HTTPException(status_code=422, detail="give between 1 and 4 positive bet sizes")
+    try:
+        return solve_spot(board, parse_range(oop_range), parse_range(ip_range), pot, stack, sizes, max_raises,
+                          iterations, target_exploitability / 100, hand or None, time_budget_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def parse_numbers(text: str, name: str) -> List[float]:
+    try:
+        return [float(x) for x in text.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="{} must be comma separated numbers".format(name))
+
+
+@app.get("/icm/")
+def icm_equity(stacks: str, payouts: str, samples: int = 20000, seed: Optional[int] = None):
+    from icm import icm
+
+    if not 1 <= samples <= 1000000:
+        raise HTTPException(status_code=422, detail="samples must be between 1 and 1000000")
+    try:
+        return icm(parse_numbers(stacks, "stacks"), parse_numbers(payouts, "payouts"), samples, seed)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+class ICMBatchRequest(BaseModel):
+    stacks: List[List[float]]
+    payouts: List[float]
+    samples: int = 20000
+    seed: Optional[int] = None
+
+
+@app.post("/icm/batch/")
+def icm_equity_batch(request: ICMBatchRequest):
+    from icm import icm_batch
+
+    if not 1 <= len(request.stacks) <= 10000:
+        raise HTTPException(status_code=422, detail="give between 1 and 10000 stack vectors")
+    if not 1 <= request.samples <= 1000000:
+        raise HTTPException(status_code=422, detail="samples must be between 1 and 1000000")
+    try:
+        return {"results": icm_batch(request.stacks, request.payouts, request.samples, request.seed)}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post("/hand_histories/")
+async def hand_histories(request: Request, summary_only: bool = False):
+    import json
+    import tempfile
+
+    from fastapi.responses import StreamingResponse
+
+    from hand_history import WORKERS, Summary, analyze_stream_async
+
+    # a streaming response listens for disconnects on the channel the body
+    # arrives on, so the upload is analyzed first and the NDJSON spooled to disk
+    output = tempfile.TemporaryFile()
+    summary = Summary()
+    async for result in analyze_stream_async(request.stream(), WORKERS):
+        summary.add(result)
+        if not summary_only:
+            output.write(json.dumps(result).encode() + b"\n")
+    output.write(json.dumps({"summary": summary.to_dict()}).encode() + b"\n")
+    output.seek(0)
+
+    def body():
+        with output:
+            yield from iter(lambda: output.read(1 << 16), b"")
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
@@ -0,0 +1,299 @@
+"""
+Time-budgeted Monte Carlo tree search for action recommendations.
+
+Revives the MCTS prototype in _old/ (MCTS, Node, PokerGame) as a working
+engine for one hero decision: fold, check/call or raise to one of a few
+pot-fraction sizes, given the hero's hand, the board, the pot, the hero's
+stack and the amount to call.
+
+The game is modelled from the hero's point of view as a decision process
+with chance nodes:
+
+* hero decision nodes choose between the legal actions (UCT);
+* after a raise, the opponents fold with the minimum-defense frequency
+  bet / (pot + bet) each, otherwise one of them calls;
+* after a call that does not end the hand, the next street is dealt and
+  the opponents check to the hero;
+* the hand ends at a fold, on the river, or when the hero is all in, and
+  is valued by hero's equity against n_opponents random hands, estimated
+  in one NumPy batch through equity.sample_equity.
+
+Node values are hero chips won back minus chips put in since the root.
+Nodes are small __slots__ objects. The search stops at a wall-clock
+deadline that is checked every CHECK_EVERY iterations rather than every
+iteration, except under SMALL_BUDGET_MS where one batch could overrun
+the whole budget; at least one iteration is always run. Decision nodes on the next street are kept in an LRU keyed by
+their full state, so a request for that street continues the tree
+searched on the previous one; the LRU is shared by the server's worker
+threads and guarded by a lock.
+
+The recommendation is the most visited action (ties go to the higher
+EV). Below MIN_ROOT_VISITS root visits the counts say little, so it
+is the action with the best EV instead, and fold when facing a bet and
+every other action loses chips.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from equity import sample_equity
+
+DECISION, CHANCE, RESPONSE, TERMINAL = range(4)
+
+DEFAULT_RAISE_SIZES = (0.5, 1.0)
+EQUITY_SAMPLES = 256
+CHECK_EVERY = 8
+SMALL_BUDGET_MS = 50
+EXPLORATION = 1.4
+TREE_CACHE_SIZE = 64
+MIN_ROOT_VISITS = 64
+
+_tree_cache: "OrderedDict[tuple, Node]" = OrderedDict()
+_tree_cache_lock = threading.Lock()
+
+
+class Node:
+    """
+    One state of the hand. `action` is the edge that led here. On RESPONSE
+    nodes `to_call` holds the raise the opponents are facing.
+    """
+    __slots__ = ("kind", "board", "pot", "to_call", "stack", "invested",
+                 "action", "children", "untried", "visits", "total")
+
+    def __init__(self, kind: int, board: Tuple[int, ...], pot: float, to_call: float, stack: float,
+                 invested: float, action: Optional[Tuple[str, float]] = None) -> None:
+        self.kind = kind
+        self.board = board
+        self.pot = pot
+        self.to_call = to_call
+        self.stack = stack
+        self.invested = invested
+        self.action = action
+        self.children: Dict = {}
+        self.untried: Optional[List[Tuple[str, float]]] = None
+        self.visits = 0
+        self.total = 0.0
+
+
+class ActionSearch:
+    """
+    One search over a hero decision. Equity estimates are cached per board
+    so every node sharing a runout reuses the same batch.
+    """
+
+    def __init__(self, hand: Sequence[int], n_opponents: int, raise_sizes: Sequence[float],
+                 seed: Optional[int] = None) -> None:
+        self.hand = tuple(hand)
+        self.n_opponents = n_opponents
+        self.raise_sizes = tuple(raise_sizes)
+        self.rng = np.random.default_rng(seed)
+        self.equity_cache: Dict[Tuple[int, ...], float] = {}
+
+    def equity(self, board: Tuple[int, ...]) -> float:
+        if board not in self.equity_cache:
+            shares = sample_equity(self.hand, board, self.n_opponents, EQUITY_SAMPLES, self.rng)
+            self.equity_cache[board] = float(shares.mean())
+        return self.equity_cache[board]
+
+    def legal_actions(self, node: Node) -> List[Tuple[str, float]]:
+        actions = []
+        if node.to_call > 0:
+            actions.append(("fold", 0.0))
+        actions.append(("call" if node.to_call > 0 else "check", min(node.to_call, node.stack)))
+
+        behind = node.stack - node.to_call
+        if behind > 0:
+            pot_after_call = node.pot + node.to_call
+            sizes = sorted({min(round(f * pot_after_call, 2), behind) for f in self.raise_sizes} | {behind})
+            actions.extend(("raise", s) for s in sizes if s > 0)
+        return actions
+
+    def step(self, node: Node, action: Tuple[str, float]) -> Node:
+        """
+        Child of a decision node for action.
+        """
+        name, amount = action
+        if name == "fold":
+            return Node(TERMINAL, node.board, node.pot, 0.0, node.stack, node.invested, action)
+
+        if name in ("call", "check"):
+            return self._continue(node.board, node.pot + amount, node.stack - amount,
+                                  node.invested + amount, action)
+
+        put_in = node.to_call + amount
+        return Node(RESPONSE, node.board, node.pot + put_in, amount, node.stack - put_in,
+                    node.invested + put_in, action)
+
+    def _continue(self, board: Tuple[int, ...], pot: float, stack: float, invested: float,
+                  action: Optional[Tuple[str, float]]) -> Node:
+        if len(board) == 5 or stack <= 0:
+            return Node(TERMINAL, board, pot, 0.0, stack, invested, action)
+        return Node(CHANCE, board, pot, 0.0, stack, invested, action)
+
+    def terminal_value(self, node: Node) -> float:
+        if node.action is not None and node.action[0] == "fold":
+            return -node.invested
+        if node.action == ("opponents_fold", 0.0):
+            return node.pot - node.invested
+        return self.equity(node.board) * node.pot - node.invested
+
+    def sample_outcome(self, node: Node) -> Tuple[object, Node]:
+        if node.kind == RESPONSE:
+            bet = node.to_call
+            if self.rng.random() < (bet / node.pot) ** self.n_opponents:
+                return "fold", Node(TERMINAL, node.board, node.pot, 0.0, node.stack, node.invested,
+                                    ("opponents_fold", 0.0))
+            return "call", self._continue(node.board, node.pot + bet, node.stack, node.invested, None)
+
+        dead = set(self.hand) | set(node.board)
+        count = 3 if len(node.board) == 0 else 1
+        live = [i for i in range(52) if i not in dead]
+        cards = tuple(sorted(self.rng.choice(live, size=count, replace=False).tolist()))
+        return cards, Node(DECISION, node.board + cards, node.pot, 0.0, node.stack, node.invested)
+
+    def uct_child(self, node: Node, scale: float) -> Node:
+        log_n = math.log(node.visits)
+        return max(node.children.values(), key=lambda c: c.total / (c.visits * scale)
+                   + EXPLORATION * math.sqrt(log_n / c.visits))
+
+    def leaf_value(self, node: Node) -> float:
+        """
+        Value of a freshly expanded node: exact for terminals, checked down
+        to the river otherwise.
+        """
+        if node.kind == TERMINAL:
+            return self.terminal_value(node)
+        if node.kind == RESPONSE:
+            bet = node.to_call
+            p_fold = (bet / node.pot) ** self.n_opponents
+            called = self.equity(node.board) * (node.pot + bet) - node.invested
+            return p_fold * (node.pot - node.invested) + (1 - p_fold) * called
+        return self.equity(node.board) * node.pot - node.invested
+
+    def iterate(self, root: Node, scale: float) -> None:
+        node = root
+        path = [root]
+        while True:
+            if node.kind == TERMINAL:
+                value = self.terminal_value(node)
+                break
+
+            if node.kind == DECISION:
+                if node.untried is None:
+                    node.untried = self.legal_actions(node)
+                if node.untried:
+                    action = node.untried.pop()
+                    child = self.step(node, action)
+                    node.children[action] = child
+                    path.append(child)
+                    value = self.leaf_value(child)
+                    break
+                node = self.uct_child(node, scale)
+            else:
+                key, fresh = self.sample_outcome(node)
+                if key not in node.children:
+                    node.children[key] = fresh
+                node = node.children[key]
+            path.append(node)
+
+        for n in path:
+            n.visits += 1
+            n.total += value
+
+
+def _state_key(hand: Sequence[int], board: Sequence[int], pot: float, stack: float, to_call: float,
+               n_opponents: int, raise_sizes: Sequence[float]) -> tuple:
+    return (tuple(sorted(hand)), tuple(sorted(board)), round(pot, 2), round(stack, 2), round(to_call, 2),
+            n_opponents, tuple(raise_sizes))
+
+
+def _remember_next_street(root: Node, hand: Sequence[int], n_opponents: int, raise_sizes: Sequence[float]) -> None:
+    """
+    Caches the decision nodes reached after the next card(s) so the next
+    street's request starts from their statistics.
+    """
+    next_street = 3 if len(root.board) == 0 else len(root.board) + 1
+    found = []
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        for child in node.children.values():
+            if child.kind == DECISION and len(child.board) == next_street:
+                found.append((_state_key(hand, child.board, child.pot, child.stack, 0.0, n_opponents,
+                                         raise_sizes), child))
+            elif child.kind != TERMINAL and len(child.board) < next_street:
+                pending.append(child)
+    with _tree_cache_lock:
+        for key, child in found:
+            _tree_cache[key] = child
+            _tree_cache.move_to_end(key)
+        while len(_tree_cache) > TREE_CACHE_SIZE:
+            _tree_cache.popitem(last=False)
+
+
+def _recommend(actions: List[dict], root_visits: int, to_call: float) -> dict:
+    """
+    The most visited action, or with fewer than MIN_ROOT_VISITS root
+    visits the best EV one, never below folding (EV 0) when there is a
+    bet to fold to.
+    """
+    if root_visits >= MIN_ROOT_VISITS:
+        return actions[0]
+    best = max(actions, key=lambda a: a["ev"])
+    if to_call > 0 and best["ev"] < 0:
+        return next((a for a in actions if a["action"] == "fold"),
+                    {"action": "fold", "amount": 0.0, "visits": 0, "ev": 0.0})
+    return best
+
+
+def recommend_action(hand: Sequence[int], board: Sequence[int], pot: float, stack: float, to_call: float = 0.0,
+                     n_opponents: int = 1, raise_sizes: Sequence[float] = DEFAULT_RAISE_SIZES,
+                     time_budget_ms: float = 50.0, seed: Optional[int] = None) -> dict:
+    """
+    Searches the hero decision for at most time_budget_ms and returns the
+    recommended action (see the module docstring) with the expected value
+    (in chips, relative to folding now) of every action searched.
+
+    hand and board are card indices (five_card_table.CARD_INDEX). pot
+    already includes the to_call the hero is facing; raise amounts are on
+    top of the call.
+    """
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    key = _state_key(hand, board, pot, stack, to_call, n_opponents, raise_sizes)
+    with _tree_cache_lock:
+        root = _tree_cache.pop(key, None)
+    reused = root is not None
+    if root is None:
+        root = Node(DECISION, tuple(sorted(board)), float(pot), float(to_call), float(stack), 0.0)
+    # statistics of a reused node are relative to the tree it came from
+    offset = root.invested
+
+    search = ActionSearch(hand, n_opponents, raise_sizes, seed)
+    scale = max(pot + stack, 1.0)
+    batch = CHECK_EVERY if time_budget_ms >= SMALL_BUDGET_MS else 1
+    iterations = 0
+    while True:
+        for _ in range(batch):
+            search.iterate(root, scale)
+        iterations += batch
+        if time.perf_counter() >= deadline:
+            break
+
+    actions = [
+        {"action": a[0], "amount": a[1], "visits": c.visits, "ev": round(c.total / c.visits + offset, 4)}
+        for a, c in root.children.items() if c.visits
+    ]
+    actions.sort(key=lambda a: (a["visits"], a["ev"]), reverse=True)
+
+    _remember_next_street(root, hand, n_opponents, raise_sizes)
+    return {
+        "recommendation": _recommend(actions, root.visits, to_call),
+        "actions": actions,
+        "iterations": iterations,
+        "reused_tree": reused,
+        "equity": round(search.equity(root.board), 4),
+    }
@@ -0,0 +1,86 @@
+"""
+Measures time-to-first-response of the Lambda entry point.
+
+Each run starts a fresh interpreter, imports main and sends one API Gateway
+(HTTP API v2) event through `handler = Mangum(app)`, which is exactly the
+path a cold Lambda container takes. Runs are repeated with and without
+RS_FAST_START so both modes can be compared against a budget:
+
+    python measure_cold_start.py --runs 5 --budget-ms 800
+
+Exits non-zero when the median time-to-first-response of any mode is
+over the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+event = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": sys.argv[1],
+    "rawQueryString": sys.argv[2],
+    "headers": {"host": "localhost"},
+    "requestContext": {
+        "http": {"method": "GET", "path": sys.argv[1], "protocol": "HTTP/1.1",
+                 "sourceIp": "127.0.0.1", "userAgent": "measure_cold_start"},
+        "stage": "$default",
+    },
+    "isBase64Encoded": False,
+}
+with contextlib.redirect_stdout(io.StringIO()):
+    response = main.handler(event, None)
+done = time.perf_counter()
+print(json.dumps({
+    "status": response["statusCode"],
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (done - start) * 1000,
+    "phases": main.startup.PROFILE,
+}))
+"""
+
+
+def measure(fast_start, path, query):
+    env = dict(os.environ)
+    env["RS_FAST_START"] = "1" if fast_start else "0"
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, path, query],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--path", default="/get_win_rate/")
+    parser.add_argument("--query", default="my_hand=as,ks&my_board_representation=&num_sims=100")
+    args = parser.parse_args()
+
+    over_budget = False
+    for fast_start in (False, True):
+        runs = [measure(fast_start, args.path, args.query) for _ in range(args.runs)]
+        first = statistics.median(r["first_response_ms"] for r in runs)
+        imported = statistics.median(r["import_ms"] for r in runs)
+        status = "ok" if first <= args.budget_ms else "OVER BUDGET"
+        over_budget = over_budget or first > args.budget_ms
+
+        print("fast_start={}: import {:.1f} ms, first response {:.1f} ms (median of {}) [{}]".format(
+            fast_start, imported, first, args.runs, status))
+        print("  phases of last run: {}".format(json.dumps(runs[-1]["phases"])))
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Pot odds and implied odds, for single values or whole grids.
+
+Both formulas work elementwise on NumPy arrays, so a grid over every
+combination of the parameter axes is one broadcast expression rather
+than a request per point. Odds that are unbounded come back as inf:
+pot odds when the bet is 0, and implied odds when chance_percent is 0 (a
+hand that never wins needs infinite future winnings to justify a call).
+0 / 0 (nothing to call, or an empty pot and no bet) gives nan. Both are
+null in JSON.
+
+An axis is given as a list ("10,20,30"), a single value ("5"), or an
+inclusive range "start:stop:step" ("0:100:5" is 0, 5, ..., 100). Axis
+values must be finite, and chance_percent must be between 0 and 100.
+"""
+import math
+from typing import Dict
+
+import numpy as np
+
+MAX_AXIS = 1000
+MAX_CELLS = 1000000
+
+
+def implied_odds(chance_percent, current_pot, amount_to_call):
+    """
+    How much more must be won later for a call to break even.
+    """
+    chance = np.asarray(chance_percent, dtype=np.float64) / 100.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return amount_to_call / chance - (current_pot + np.asarray(amount_to_call, dtype=np.float64))
+
+
+def pot_odds(current_pot, bet):
+    """
+    Pot (including the bet) to bet ratio.
+    """
+    bet = np.asarray(bet, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (current_pot + bet) / bet
+
+
+def parse_axis(text: str, name: str) -> np.ndarray:
+    """
+    Axis values from a list, single value or start:stop:step range.
+    Raises ValueError on anything else, including nan and inf.
+    """
+    try:
+        if ":" in text:
+            start, stop, step = (float(x) for x in text.split(":"))
+            if not np.isfinite([start, stop, step]).all() or step <= 0 or stop < start:
+                raise ValueError
+            values = start + step * np.arange(int(np.floor((stop - start) / step + 1e-9)) + 1)
+        else:
+            values = np.array([float(x) for x in text.split(",") if x.strip()])
+    except ValueError:
+        raise ValueError("{} must be a comma separated list or start:stop:step".format(name))
+    if not 1 <= len(values) <= MAX_AXIS:
+        raise ValueError("{} must have between 1 and {} values".format(name, MAX_AXIS))
+    if not np.isfinite(values).all():
+        raise ValueError("{} values must be finite".format(name))
+    return values
+
+
+def check_chance(chance_percent) -> None:
+    """
+    Raises ValueError unless every chance_percent is between 0 and 100.
+    """
+    chance = np.asarray(chance_percent, dtype=np.float64)
+    if not ((chance >= 0) & (chance <= 100)).all():
+        raise ValueError("chance_percent must be between 0 and 100")
+
+
+def grid(fn, axes: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    fn over every combination of the axis values, shaped (len(axis), ...)
+    in the order of axes.
+    """
+    if np.prod([len(v) for v in axes.values()]) > MAX_CELLS:
+        raise ValueError("the grid may have at most {} cells".format(MAX_CELLS))
+    return fn(*np.ix_(*axes.values()))
+
+
+def columnar(axes: Dict[str, np.ndarray], values: np.ndarray) -> dict:
+    """
+    JSON layout: the axes, the shape, and all values flattened in row-major
+    order (last axis fastest), inf and nan as null.
+    """
+    flat = values.ravel().tolist()
+    return {
+        "axes": {name: v.tolist() for name, v in axes.items()},
+        "shape": list(values.shape),
+        "values": [x if math.isfinite(x) else None for x in flat],
+    }
+
+
+def scalar(value) -> "float | None":
+    value = float(value)
+    return value if math.isfinite(value) else None
@@ -0,0 +1,104 @@
+"""
+Outs: what every unseen next card does for a hand on the flop or turn.
+
+One pass over the deck. Each candidate card gives the hand class and the
+rank change it makes, and the equity against n_opponents random hands
+once it is out. Equity is built from river boards, and each river board
+is ranked once with board_ranks.rank_all_holdings. From the flop, the
+river board {flop, c, r} is shared by turn card c (river r) and turn
+card r (river c), so the 47 turn cards need 1081 boards rather than
+47 * 46.
+
+On a river board, equity against one opponent is exact: the hand's
+standing among every holding it does not block. Against more opponents,
+SAMPLES_PER_BOARD deals of opponent holdings are drawn from the cards
+left and looked up in the same rank table.
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from board_ranks import rank_all_holdings, rank_class
+from card import Card
+from five_card_table import CARDS_BY_INDEX
+from holdings import HOLDING_INDEX
+from lookup import LookupTable
+from seven_card_dag import evaluate_batch
+
+SAMPLES_PER_BOARD = 200
+
+
+def card_str(index: int) -> str:
+    return Card.int_to_str(CARDS_BY_INDEX[index])
+
+
+def river_equity(hand: Sequence[int], board: Sequence[int], n_opponents: int, rng: np.random.Generator,
+                 samples: int = SAMPLES_PER_BOARD) -> float:
+    """
+    Pot share of hand against n_opponents random hands on a 5-card board.
+    """
+    ranks = rank_all_holdings(board, cache=False).ranks
+    ours = ranks[HOLDING_INDEX[hand[0], hand[1]]]
+    live = np.array([c for c in range(52) if c not in hand and c not in board])
+
+    if n_opponents == 1:
+        others = ranks[HOLDING_INDEX[live[:, None], live[None, :]][np.triu_indices(len(live), 1)]]
+        return float(((others > ours).sum() + 0.5 * (others == ours).sum()) / len(others))
+
+    dealt = live[np.argsort(rng.random((samples, len(live))), axis=1)[:, :2 * n_opponents]]
+    theirs = ranks[HOLDING_INDEX[dealt[:, 0::2], dealt[:, 1::2]]]
+    best = theirs.min(axis=1)
+    tied = (theirs == ours).sum(axis=1)
+    shares = np.where(ours < best, 1.0, np.where(ours == best, 1.0 / (1 + tied), 0.0))
+    return float(shares.mean())
+
+
+def outs(hand: Sequence[int], board: Sequence[int], n_opponents: int = 1, seed: Optional[int] = None) -> dict:
+    """
+    hand and a 3 or 4 card board as card indices.
+    """
+    rng = np.random.default_rng(seed)
+    live = [c for c in range(52) if c not in hand and c not in board]
+    rank_now = int(evaluate_batch(np.array([list(hand) + list(board)]))[0])
+    after = evaluate_batch(np.array([list(hand) + list(board) + [c] for c in live]))
+
+    if len(board) == 4:
+        equity = {c: river_equity(hand, list(board) + [c], n_opponents, rng) for c in live}
+    else:
+        river: Dict[frozenset, float] = {}
+        equity = {}
+        for c in live:
+            total = 0.0
+            for r in live:
+                if r != c:
+                    key = frozenset((c, r))
+                    if key not in river:
+                        river[key] = river_equity(hand, list(board) + [c, r], n_opponents, rng)
+                    total += river[key]
+            equity[c] = total / (len(live) - 1)
+
+    class_now = rank_class(rank_now)
+    cards = []
+    grouped: "OrderedDict[str, list]" = OrderedDict()
+    for c, rank in sorted(zip(live, after.tolist()), key=lambda x: (x[1], x[0])):
+        made = rank_class(rank)
+        name = LookupTable.RANK_CLASS_TO_STRING[made]
+        cards.append({
+            "card": card_str(c),
+            "hand_class": name,
+            "rank": rank,
+            "rank_change": rank_now - rank,
+            "equity": round(equity[c] * 100, 2),
+        })
+        if made < class_now:
+            grouped.setdefault(name, []).append(card_str(c))
+
+    return {
+        "hand_class": LookupTable.RANK_CLASS_TO_STRING[class_now],
+        "rank": rank_now,
+        "equity": round(sum(equity.values()) / len(live) * 100, 2),
+        "outs": {name: {"count": len(c), "cards": c} for name, c in grouped.items()},
+        "total_outs": sum(len(c) for c in grouped.values()),
+        "cards": cards,
+    }
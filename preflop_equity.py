@@ -0,0 +1,121 @@
+"""
+Precomputed preflop equity between the 169 starting-hand classes.
+
+preflop_equity[a * 169 + b] is the all-in equity of class a against class
+b (ties count half), averaged over all their card-compatible combo pairs.
+preflop_pairs[a * 169 + b] is how many such combo pairs there are, which
+is the weight class b carries against a when mixing a range.
+
+Both are generated offline by ranking all 1326 holdings on a stream of
+random boards with seven_card_dag.evaluate_batch and comparing every pair
+of holdings at once, then summed into classes with two matrix products.
+Stored through table_store:
+
+    python preflop_equity.py --build [--boards 5000]
+"""
+import array
+import sys
+
+import numpy as np
+
+import table_store
+from holdings import HOLDING_CARDS, HOLDING_CLASS, NUM_CLASSES, NUM_HOLDINGS, conflict_matrix
+from seven_card_dag import evaluate_batch
+
+DEFAULT_BOARDS = 5000
+SEED = 169
+
+
+def _class_onehot() -> np.ndarray:
+    onehot = np.zeros((NUM_HOLDINGS, NUM_CLASSES), dtype=np.float64)
+    onehot[np.arange(NUM_HOLDINGS), HOLDING_CLASS] = 1
+    return onehot
+
+
+def simulate(boards: int = DEFAULT_BOARDS, seed: int = SEED):
+    """
+    Returns (equity, pairs) as (169, 169) arrays.
+    """
+    rng = np.random.default_rng(seed)
+    compatible = ~conflict_matrix()
+    points = np.zeros((NUM_HOLDINGS, NUM_HOLDINGS), dtype=np.float32)
+    counts = np.zeros((NUM_HOLDINGS, NUM_HOLDINGS), dtype=np.float32)
+
+    for _ in range(boards):
+        board = rng.choice(52, size=5, replace=False)
+        dead = np.zeros(52, dtype=bool)
+        dead[board] = True
+        live = ~dead[HOLDING_CARDS].any(axis=1)
+
+        ranks = evaluate_batch(np.concatenate([HOLDING_CARDS, np.tile(board, (NUM_HOLDINGS, 1))], axis=1))
+        ranks = ranks.astype(np.int32)
+        valid = compatible & live[:, None] & live[None, :]
+        diff = ranks[None, :] - ranks[:, None]
+        # lower rank wins: 1 for a win of the row holding, 0.5 for a tie
+        points += valid * ((diff > 0) + 0.5 * (diff == 0))
+        counts += valid
+
+    onehot = _class_onehot()
+    class_points = onehot.T @ points.astype(np.float64) @ onehot
+    class_counts = onehot.T @ counts.astype(np.float64) @ onehot
+    equity = np.divide(class_points, class_counts, out=np.full_like(class_points, 0.5), where=class_counts > 0)
+    pairs = onehot.T @ compatible.astype(np.float64) @ onehot
+    return equity, pairs
+
+
+_simulated = None
+
+
+def _simulated_tables():
+    global _simulated
+    if _simulated is None:
+        _simulated = simulate()
+    return _simulated
+
+
+@table_store.register("preflop_equity", "f", precomputed=True)
+def build_preflop_equity():
+    return array.array("f", _simulated_tables()[0].ravel().tolist())
+
+
+@table_store.register("preflop_pairs", "H", precomputed=True)
+def build_preflop_pairs():
+    return array.array("H", _simulated_tables()[1].astype(np.int64).ravel().tolist())
+
+
+_tables = None
+
+
+def class_tables():
+    """
+    (equity, pairs) as read-only (169, 169) NumPy views of the shared tables.
+    """
+    global _tables
+    if _tables is None:
+        equity = np.frombuffer(table_store.attach("preflop_equity"), dtype=np.float32).reshape(NUM_CLASSES, NUM_CLASSES)
+        pairs = np.frombuffer(table_store.attach("preflop_pairs"), dtype=np.uint16).reshape(NUM_CLASSES, NUM_CLASSES)
+        _tables = (equity, pairs)
+    return _tables
+
+
+def equity_vs_range(weights: np.ndarray) -> np.ndarray:
+    """
+    Equity of every class against a range given as 169 class weights
+    (fraction of each class's combos in the range), with card removal
+    between the two hands. Classes the range has no compatible combos
+    against get 0.5.
+    """
+    equity, pairs = class_tables()
+    w = pairs * weights[None, :]
+    total = w.sum(axis=1)
+    return np.divide((w * equity).sum(axis=1), total, out=np.full(NUM_CLASSES, 0.5), where=total > 0)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--build" in args:
+        if "--boards" in args:
+            _simulated = simulate(int(args[args.index("--boards") + 1]))
+        for name in ("preflop_equity", "preflop_pairs"):
+            table_store.build(name, force=True)
+            print("Wrote {}".format(table_store.table_path(name)))
@@ -0,0 +1,69 @@
+"""
+Opt-in per-request profiling of the simulation hot paths.
+
+A request is profiled only when it carries an X-RS-Profile header whose
+value is one of the tokens in RS_PROFILE_TOKENS (comma separated). The
+cProfile trace is written to RS_PROFILE_DIR in the standard pstats format,
+so it opens with `python -m pstats`, snakeviz or gprof2dot, and the top
+functions by cumulative time come back in the response.
+
+When the header is absent nothing here runs beyond one set lookup.
+"""
+import cProfile
+import os
+import pstats
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+PROFILE_DIR = os.environ.get(
+    "RS_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+PROFILE_TOKENS = frozenset(t for t in os.environ.get("RS_PROFILE_TOKENS", "").split(",") if t)
+TOP_N = 15
+
+
+def allowed(token: Optional[str]) -> bool:
+    return token is not None and token in PROFILE_TOKENS
+
+
+def summarize(stats: pstats.Stats, top_n: int = TOP_N) -> list:
+    """
+    Top functions by cumulative time, as JSON-friendly dicts.
+    """
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": "{}:{}({})".format(os.path.basename(filename), line, func),
+            "ncalls": nc,
+            "tottime": round(tt, 6),
+            "cumtime": round(ct, 6),
+        })
+    rows.sort(key=lambda r: r["cumtime"], reverse=True)
+    return rows[:top_n]
+
+
+@contextmanager
+def profile(name: str) -> Iterator[Dict]:
+    """
+    Profiles the block and fills the yielded dict with the trace path, the
+    wall time and the summary once the block exits.
+    """
+    report: Dict = {}
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, "{}-{}-{}.prof".format(
+            name, time.strftime("%Y%m%dT%H%M%S"), uuid.uuid4().hex[:8]))
+        profiler.dump_stats(path)
+
+        report["trace"] = path
+        report["wall_time"] = round(time.perf_counter() - start, 6)
+        report["top_functions"] = summarize(pstats.Stats(profiler))
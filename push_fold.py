@@ -0,0 +1,213 @@
+"""
+Push/fold equilibrium charts for short stacks.
+
+For every table size from 2 to 9 players and every effective stack in
+STACKS (big blinds, small blind 0.5, no antes) this solves, for each
+position that is first in, the all-in-or-fold game between that pusher
+and the players left to act behind it:
+
+* the pusher shoves or folds;
+* the players behind act in turn and the first one to call is heads-up
+  all in with the pusher; the rest are assumed to fold behind (the usual
+  single-caller approximation);
+* payoffs are chip EV, with card removal between the pusher's hand and
+  each range through preflop_equity's pair weights.
+
+Strategies are per-class frequencies found by fictitious play: each
+iteration every player best-responds to the others' average strategy and
+is averaged in. All stacks are solved together as one batch of NumPy
+matrix products against the 169x169 preflop equity table, so the solve
+takes seconds and never runs a simulation.
+
+Solutions are stored quantized to a byte per class in the push_fold table
+and read back with chart():
+
+    python push_fold.py --build
+"""
+import array
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import table_store
+from holdings import CLASS_HOLDINGS, CLASS_LABELS, NUM_CLASSES, NUM_HOLDINGS
+from preflop_equity import class_tables
+
+POSITIONS = ["UTG", "UTG1", "UTG2", "LJ", "HJ", "CO", "BTN", "SB", "BB"]
+PLAYER_COUNTS = range(2, 10)
+STACKS = list(range(1, 21)) + [25, 30]
+SMALL_BLIND, BIG_BLIND = 0.5, 1.0
+ITERATIONS = 400
+
+CLASS_COMBOS = np.array([len(h) for h in CLASS_HOLDINGS], dtype=np.float64)
+
+
+def positions(n_players: int) -> List[str]:
+    return POSITIONS[-n_players:]
+
+
+def posted(position: str) -> float:
+    return {"SB": SMALL_BLIND, "BB": BIG_BLIND}.get(position, 0.0)
+
+
+def _layout() -> Dict[Tuple[int, int, int], int]:
+    """
+    (n_players, pusher, actor) => range slot, per stack. actor == pusher is
+    the push range, actor > pusher a call range against that pusher.
+    Positions are indices into positions(n_players).
+    """
+    slots = {}
+    for n in PLAYER_COUNTS:
+        for pusher in range(n - 1):
+            for actor in range(pusher, n):
+                slots[(n, pusher, actor)] = len(slots)
+    return slots
+
+
+LAYOUT = _layout()
+
+
+class _Matrices:
+    def __init__(self) -> None:
+        equity, pairs = class_tables()
+        self.pairs = pairs.astype(np.float64)
+        self.weighted_equity = self.pairs * equity
+        self.pair_totals = self.pairs.sum(axis=1)
+
+    def versus(self, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For range weights (stacks, 169): the probability that the range
+        holds a hand, given each of our classes, and our equity against
+        it, both (stacks, 169).
+        """
+        mass = weights @ self.pairs.T
+        share = mass / self.pair_totals
+        equity = np.divide(weights @ self.weighted_equity.T, mass, out=np.full_like(mass, 0.5), where=mass > 0)
+        return share, equity
+
+
+def solve(n_players: int, pusher: int, stacks=STACKS, iterations: int = ITERATIONS,
+          matrices: Optional[_Matrices] = None) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Solves the game of the first-in player at positions(n_players)[pusher]
+    against everyone behind. Returns the push frequencies and, for each
+    player behind in order, the call frequencies, all (len(stacks), 169).
+    """
+    m = matrices or _Matrices()
+    seats = positions(n_players)
+    callers = range(pusher + 1, n_players)
+    blinds = sum(posted(p) for p in seats)
+    stack = np.asarray(stacks, dtype=np.float64)[:, None]
+    push_post = posted(seats[pusher])
+
+    push = np.ones((len(stack), NUM_CLASSES))
+    calls = [np.full((len(stack), NUM_CLASSES), 0.5) for _ in callers]
+
+    for t in range(iterations):
+        # pusher: EV of shoving against the callers, relative to the hand start
+        reach = np.ones_like(push)
+        ev_push = np.zeros_like(push)
+        for caller, call in zip(callers, calls):
+            share, equity = m.versus(call)
+            pot = 2 * stack + blinds - push_post - posted(seats[caller])
+            ev_push += reach * share * (equity * pot - stack)
+            reach = reach * (1 - share)
+        ev_push += reach * (blinds - push_post)
+        best_push = (ev_push > -push_post).astype(np.float64)
+
+        # callers: call or fold against the push range, players behind fold
+        _, equity = m.versus(push)
+        best_calls = []
+        for caller in callers:
+            call_post = posted(seats[caller])
+            pot = 2 * stack + blinds - push_post - call_post
+            best_calls.append((equity * pot - stack > -call_post).astype(np.float64))
+
+        step = 1.0 / (t + 2)
+        push += step * (best_push - push)
+        for call, best in zip(calls, best_calls):
+            call += step * (best - call)
+
+    return push, calls
+
+
+def solve_all(iterations: int = ITERATIONS) -> np.ndarray:
+    """
+    Every table size and first-in position, as (len(LAYOUT), len(STACKS), 169).
+    """
+    m = _Matrices()
+    ranges = np.zeros((len(LAYOUT), len(STACKS), NUM_CLASSES))
+    for n in PLAYER_COUNTS:
+        for pusher in range(n - 1):
+            push, calls = solve(n, pusher, iterations=iterations, matrices=m)
+            ranges[LAYOUT[(n, pusher, pusher)]] = push
+            for actor, call in zip(range(pusher + 1, n), calls):
+                ranges[LAYOUT[(n, pusher, actor)]] = call
+    return ranges
+
+
+@table_store.register("push_fold", "B", precomputed=True)
+def build_push_fold():
+    quantized = np.rint(solve_all() * 255).astype(np.uint8)
+    return array.array("B", quantized.tobytes())
+
+
+def nearest_stack(stack_bb: float) -> int:
+    return min(STACKS, key=lambda s: (abs(s - stack_bb), s))
+
+
+def frequencies(n_players: int, stack_bb: float, pusher: str, actor: str) -> np.ndarray:
+    """
+    Stored frequencies (169,) in [0, 1] of actor's push (actor == pusher)
+    or call against pusher's first-in shove, at the nearest solved stack.
+    """
+    seats = positions(n_players)
+    slot = LAYOUT[(n_players, seats.index(pusher), seats.index(actor))]
+    row = slot * len(STACKS) + STACKS.index(nearest_stack(stack_bb))
+    table = table_store.attach("push_fold")
+    return np.frombuffer(table, dtype=np.uint8, count=NUM_CLASSES, offset=row * NUM_CLASSES) / 255.0
+
+
+def describe(freqs: np.ndarray) -> dict:
+    """
+    A range as the classes played at least half the time, the mixed
+    frequencies of everything played at all, and its share of all combos.
+    """
+    return {
+        "hands": [CLASS_LABELS[c] for c in np.flatnonzero(freqs >= 0.5)],
+        "frequencies": {CLASS_LABELS[c]: round(float(freqs[c]), 3) for c in np.flatnonzero(freqs > 0)},
+        "percent_of_hands": round(float(freqs @ CLASS_COMBOS) / NUM_HOLDINGS * 100, 2),
+    }
+
+
+def chart(n_players: int, stack_bb: float, position: str, hand_class: Optional[int] = None) -> dict:
+    """
+    Push range of position when first in, and its call range against each
+    earlier position's shove. With hand_class, also that class's own
+    frequencies.
+    """
+    seats = positions(n_players)
+    me = seats.index(position)
+    result = {
+        "n_players": n_players,
+        "stack_bb": nearest_stack(stack_bb),
+        "position": position,
+        "push": describe(frequencies(n_players, stack_bb, position, position)) if position != "BB" else None,
+        "call": {p: describe(frequencies(n_players, stack_bb, p, position)) for p in seats[:me]},
+    }
+    if hand_class is not None:
+        result["my_hand"] = {
+            "class": CLASS_LABELS[hand_class],
+            "push": round(float(frequencies(n_players, stack_bb, position, position)[hand_class]), 3)
+            if position != "BB" else None,
+            "call": {p: round(float(frequencies(n_players, stack_bb, p, position)[hand_class]), 3)
+                     for p in seats[:me]},
+        }
+    return result
+
+
+if __name__ == "__main__":
+    if "--build" in sys.argv[1:]:
+        table_store.build("push_fold", force=True)
+        print("Wrote {}".format(table_store.table_path("push_fold")))
@@ -0,0 +1,181 @@
+"""
+Equity between weighted ranges.
+
+Ranges are (1326,) combo-weight vectors (ranges.parse_range). Card removal
+is handled with 52-bit masks: HOLDING_BITS[k] has the bits of holding k's
+two cards, so a holding collides with the board or another holding
+exactly when the AND of their masks is non-zero.
+
+Two ranges are summed over every compatible combo pair on each runout.
+One rank table per board (board_ranks.rank_all_holdings) serves every
+combo. The pair sum avoids the 1326 x 1326 pair matrix: holdings are
+sorted by rank and cumulated per card, and the weight of the opponent
+combos that beat, tie or lose to holding (a, b) is then
+
+    all those combos - those holding a - those holding b
+
+read off the cumulative table, in time linear in the two ranges' sizes
+per board. River and turn runouts are enumerated exactly. On the flop
+and preflop `samples` random runouts are drawn instead. Each compatible pair has the same
+number of runouts, so summing pair weights over uniformly drawn runouts
+is unbiased.
+
+Three or more ranges are estimated by Monte Carlo on every street. Each
+player's combo is drawn from their weights, deals whose masks collide
+are rejected, and the board is completed from the cards left.
+"""
+import itertools
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from board_ranks import rank_all_holdings
+from holdings import HOLDING_CARDS, HOLDING_MASKS, NUM_HOLDINGS
+from seven_card_dag import evaluate_batch
+
+HOLDING_BITS = np.array(HOLDING_MASKS, dtype=np.uint64)
+
+DEFAULT_SAMPLES = 1000
+MAX_REJECTION_ROUNDS = 50
+
+
+def board_bits(board: Sequence[int]) -> np.uint64:
+    mask = 0
+    for c in board:
+        mask |= 1 << c
+    return np.uint64(mask)
+
+
+def _compatible(cumulative: np.ndarray, rows: np.ndarray, cards: np.ndarray) -> np.ndarray:
+    """
+    Column 0 of cumulative (m, 53) holds running weight sums over the
+    opponent combos in rank order and column 1 + c the part holding card
+    c. Returns, for each holding with the given (n, 2) cards, the part of
+    row rows[i] that shares no card with it (less the holding itself,
+    which both card columns removed).
+    """
+    return cumulative[rows, 0] - cumulative[rows, 1 + cards[:, 0]] - cumulative[rows, 1 + cards[:, 1]]
+
+
+def holding_totals(ranks: np.ndarray, ours: np.ndarray, w2: np.ndarray):
+    """
+    On one board, for each holding index in ours: the opponent weight w2
+    it beats (ties counting half), and all the opponent weight it is
+    compatible with. w2 must already be zero on holdings that use a board
+    card.
+    """
+    theirs = np.flatnonzero(w2)
+    theirs = theirs[np.argsort(ranks[theirs], kind="stable")]
+    sorted_ranks = ranks[theirs]
+
+    columns = np.zeros((len(theirs), 53))
+    rows = np.arange(len(theirs))
+    columns[:, 0] = w2[theirs]
+    columns[rows, 1 + HOLDING_CARDS[theirs, 0]] = w2[theirs]
+    columns[rows, 1 + HOLDING_CARDS[theirs, 1]] = w2[theirs]
+    cumulative = np.zeros((len(theirs) + 1, 53))
+    np.cumsum(columns, axis=0, out=cumulative[1:])
+
+    our_ranks = ranks[ours]
+    our_cards = HOLDING_CARDS[ours]
+    better = _compatible(cumulative, np.searchsorted(sorted_ranks, our_ranks, side="left"), our_cards)
+    not_worse = _compatible(cumulative, np.searchsorted(sorted_ranks, our_ranks, side="right"), our_cards)
+    everything = _compatible(cumulative, np.full(len(ours), len(theirs)), our_cards)
+
+    # the holding itself is a tie and is in the total; add it back once
+    tie = not_worse - better + w2[ours]
+    return everything - not_worse + 0.5 * tie, everything + w2[ours]
+
+
+def board_pair_totals(ranks: np.ndarray, w1: np.ndarray, w2: np.ndarray):
+    """
+    On one board: the sum over compatible combo pairs of w1 * w2 * the
+    first range's pot share, and the sum of w1 * w2. Both weights must
+    already be zero on holdings that use a board card.
+    """
+    ours = np.flatnonzero(w1)
+    won, weight = holding_totals(ranks, ours, w2)
+    return float(w1[ours] @ won), float(w1[ours] @ weight)
+
+
+def _runouts(board: Sequence[int], samples: int, rng: np.random.Generator):
+    live = [c for c in range(52) if c not in board]
+    need = 5 - len(board)
+    if need <= 1:
+        return [tuple(board) + extra for extra in itertools.combinations(live, need)], True
+    draws = np.argsort(rng.random((samples, len(live))), axis=1)[:, :need]
+    return [tuple(board) + tuple(np.array(live)[row].tolist()) for row in draws], False
+
+
+def heads_up_equity(w1: np.ndarray, w2: np.ndarray, board: Sequence[int], samples: int = DEFAULT_SAMPLES,
+                    rng: Optional[np.random.Generator] = None) -> dict:
+    rng = rng or np.random.default_rng()
+    runouts, exact = _runouts(board, samples, rng)
+    won = weight = 0.0
+    for full in runouts:
+        live = (HOLDING_BITS & board_bits(full)) == 0
+        ranks = rank_all_holdings(full, cache=exact).ranks.astype(np.int64)
+        w, t = board_pair_totals(ranks, w1 * live, w2 * live)
+        won += w
+        weight += t
+    if weight == 0:
+        raise ValueError("The ranges have no compatible combos on this board")
+    equity = won / weight
+    return {"equities": [equity, 1 - equity], "exact": exact, "boards": len(runouts)}
+
+
+def _deal_combos(weights: List[np.ndarray], dead: np.uint64, count: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    (count, players) holding indices, one per range, with no two sharing a
+    card or using a dead card.
+    """
+    probs = [w / w.sum() for w in weights]
+    dealt = []
+    have = 0
+    for _ in range(MAX_REJECTION_ROUNDS):
+        combos = np.stack([rng.choice(NUM_HOLDINGS, size=count, p=p) for p in probs], axis=1)
+        bits = HOLDING_BITS[combos]
+        ok = (bits & dead).max(axis=1) == 0
+        for i, j in itertools.combinations(range(len(weights)), 2):
+            ok &= (bits[:, i] & bits[:, j]) == 0
+        dealt.append(combos[ok])
+        have += int(ok.sum())
+        if have >= count:
+            return np.concatenate(dealt)[:count]
+    if have == 0:
+        raise ValueError("The ranges have no compatible combos on this board")
+    return np.concatenate(dealt)
+
+
+def multiway_equity(weights: List[np.ndarray], board: Sequence[int], samples: int = DEFAULT_SAMPLES,
+                    rng: Optional[np.random.Generator] = None) -> dict:
+    rng = rng or np.random.default_rng()
+    combos = _deal_combos(weights, board_bits(board), samples, rng)
+    n = len(combos)
+    hole = HOLDING_CARDS[combos]                          # (n, players, 2)
+
+    keys = rng.random((n, 52))
+    keys[:, list(board)] = np.inf
+    rows = np.arange(n)[:, None]
+    keys[rows, hole.reshape(n, -1)] = np.inf
+    extra = np.argsort(keys, axis=1)[:, :5 - len(board)]
+    full = np.concatenate([np.tile(np.array(board, dtype=np.int64), (n, 1)), extra], axis=1)
+
+    ranks = np.stack([evaluate_batch(np.concatenate([hole[:, p], full], axis=1))
+                      for p in range(len(weights))], axis=1)
+    best = ranks == ranks.min(axis=1, keepdims=True)
+    shares = best / best.sum(axis=1, keepdims=True)
+    return {"equities": shares.mean(axis=0).tolist(), "exact": False, "boards": n}
+
+
+def range_equity(weights: List[np.ndarray], board: Sequence[int] = (), samples: int = DEFAULT_SAMPLES,
+                 seed: Optional[int] = None) -> dict:
+    """
+    Equity of each range against the others on board (card indices, 0 or
+    3-5 cards): exact for two ranges on the turn and river, sampled
+    otherwise.
+    """
+    rng = np.random.default_rng(seed)
+    if len(weights) == 2:
+        return heads_up_equity(weights[0], weights[1], board, samples, rng)
+    return multiway_equity(weights, board, samples, rng)
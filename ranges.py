@@ -0,0 +1,106 @@
+"""
+Hand ranges as combo weights over the 1326 holdings.
+
+parse_range reads the usual shorthand, comma separated, each term with an
+optional ":weight" (default 1):
+
+    AA, AKs, AKo, AK       a class, AK meaning both suited and offsuit
+    TT+, A9s+, K9o+, Q9+   a pair and all higher pairs, or a kicker up to
+                           one below the top card
+    22-55, A2s-A5s         an inclusive span
+    AhKh                   one specific combo
+    random, *              every holding
+
+and returns a (1326,) float array in holdings.HOLDINGS order. When terms
+overlap the later one wins, so "TT+,AA:0.5" plays aces half the time.
+"""
+import re
+
+import numpy as np
+
+from holdings import CLASS_HOLDINGS, CLASS_INDEX, NUM_HOLDINGS, RANK_CHARS, holding_index
+
+SUIT_CHARS = "shdc"
+
+_CLASS = re.compile(r"^([2-9TJQKA])([2-9TJQKA])([so]?)$")
+_COMBO = re.compile(r"^([2-9TJQKA])([shdc])([2-9TJQKA])([shdc])$")
+
+
+def _card(rank: str, suit: str) -> int:
+    return RANK_CHARS.index(rank) * 4 + SUIT_CHARS.index(suit)
+
+
+def _labels(hi: int, lo: int, suffix: str) -> list:
+    """
+    Class labels for ranks hi >= lo (indices into RANK_CHARS).
+    """
+    if hi == lo:
+        return [RANK_CHARS[hi] * 2]
+    pair = RANK_CHARS[hi] + RANK_CHARS[lo]
+    return [pair + s for s in (suffix or "so")]
+
+
+def _parse_class(text: str):
+    m = _CLASS.match(text)
+    if m is None:
+        raise ValueError("Invalid range term {!r}".format(text))
+    hi, lo = RANK_CHARS.index(m.group(1)), RANK_CHARS.index(m.group(2))
+    if hi < lo:
+        hi, lo = lo, hi
+    if hi == lo and m.group(3):
+        raise ValueError("Pairs cannot be suited or offsuit: {!r}".format(text))
+    return hi, lo, m.group(3)
+
+
+def _term_holdings(term: str) -> list:
+    if term in ("random", "*"):
+        return list(range(NUM_HOLDINGS))
+
+    m = _COMBO.match(term)
+    if m is not None:
+        a, b = _card(m.group(1), m.group(2)), _card(m.group(3), m.group(4))
+        if a == b:
+            raise ValueError("Invalid combo {!r}".format(term))
+        return [holding_index(a, b)]
+
+    labels = []
+    if term.endswith("+"):
+        hi, lo, suffix = _parse_class(term[:-1])
+        if hi == lo:
+            labels = [l for r in range(lo, 13) for l in _labels(r, r, "")]
+        else:
+            labels = [l for k in range(lo, hi) for l in _labels(hi, k, suffix)]
+    elif "-" in term:
+        start, end = (_parse_class(t) for t in term.split("-", 1))
+        (h1, l1, s1), (h2, l2, s2) = start, end
+        if s1 != s2 or (h1 == l1) != (h2 == l2) or (h1 != l1 and h1 != h2):
+            raise ValueError("Invalid span {!r}".format(term))
+        if h1 == l1:
+            labels = [l for r in range(min(h1, h2), max(h1, h2) + 1) for l in _labels(r, r, "")]
+        else:
+            labels = [l for k in range(min(l1, l2), max(l1, l2) + 1) for l in _labels(h1, k, s1)]
+    else:
+        labels = _labels(*_parse_class(term))
+
+    return [k for label in labels for k in CLASS_HOLDINGS[CLASS_INDEX[label]]]
+
+
+def parse_range(text: str) -> np.ndarray:
+    weights = np.zeros(NUM_HOLDINGS)
+    for term in text.split(","):
+        term = term.strip()
+        if not term:
+            continue
+        weight = 1.0
+        if ":" in term:
+            term, w = term.split(":", 1)
+            try:
+                weight = float(w)
+            except ValueError:
+                raise ValueError("Invalid weight in {!r}".format(term + ":" + w))
+            if not 0 <= weight <= 1:
+                raise ValueError("Weights must be between 0 and 1: {!r}".format(term + ":" + w))
+        weights[_term_holdings(term.strip())] = weight
+    if not weights.any():
+        raise ValueError("Empty range {!r}".format(text))
+    return weights
@@ -0,0 +1,356 @@
+"""
+River subgame solver: CFR+ over two ranges on a 5-card board.
+
+The tree is built from a pot, the effective stack behind and a menu of
+bet sizes (fractions of the pot at the time). OOP acts first: check or
+bet; facing a bet a player folds, calls or raises (raise-to is the call
+plus a pot fraction of the pot after calling), up to max_raises raises.
+Sizes are capped at the stack, so the largest one can become an all-in.
+
+Every decision node keeps, for the acting player, a (hands, actions)
+array of regrets and of the strategy sum, and one CFR+ iteration updates
+all hands at once. At a showdown every hand needs the opponent reach it
+beats and the reach it does not block; both come from one sorted pass
+over board_ranks.rank_all_holdings ranks (range_equity.holding_totals,
+card masks taking out blocked combos), so a terminal costs O(n log n)
+rather than an (n x n) matrix product.
+
+Utilities are chips won back minus chips put in on the river, so the
+players' utilities always sum to the starting pot, and exploitability is
+(best response of OOP + best response of IP - pot) / 2.
+
+The solve runs in pot-normalized units (pot 1) on the suit-canonical
+board and ranges (canonical_spot), so spots that only differ by scale or
+by a suit relabeling share one cached solution. A solve stops at
+whichever comes first of the iteration count, the target exploitability
+and the time budget; the cache is shared by the server's worker threads
+and guarded by a lock (two threads may still solve the same new spot).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from board_ranks import HOLDING_PERMUTATIONS, SUIT_PERMUTATIONS, rank_all_holdings
+from holdings import CLASS_LABELS, HOLDING_CLASS, NUM_HOLDINGS, holding_index
+from range_equity import HOLDING_BITS, board_bits, holding_totals
+
+OOP, IP = 0, 1
+PLAYER_NAMES = ("OOP", "IP")
+DEFAULT_BET_SIZES = (0.5, 1.0)
+DEFAULT_ITERATIONS = 1000
+CHECK_EVERY = 50
+SOLUTION_CACHE_SIZE = 32
+
+_solutions: "OrderedDict[tuple, dict]" = OrderedDict()
+_solutions_lock = threading.Lock()
+
+
+class Node:
+    """
+    A decision node (player is OOP or IP) or a terminal: "showdown", or
+    "fold" with folder set. c holds each player's river contribution.
+    """
+    __slots__ = ("kind", "player", "folder", "c", "history", "actions", "children", "regrets", "strategy_sum")
+
+    def __init__(self, kind: str, c: Tuple[float, float], history: tuple, player: int = -1, folder: int = -1) -> None:
+        self.kind = kind
+        self.player = player
+        self.folder = folder
+        self.c = c
+        self.history = history
+        self.actions: List[Tuple[str, float]] = []
+        self.children: List["Node"] = []
+        self.regrets: Optional[np.ndarray] = None
+        self.strategy_sum: Optional[np.ndarray] = None
+
+
+def build_tree(stack: float, bet_sizes: Sequence[float], max_raises: int) -> Node:
+    """
+    Betting tree for a pot of 1 with stack behind each player.
+    """
+    def decision(player: int, c: Tuple[float, float], aggressions: int, checked: bool, history: tuple) -> Node:
+        node = Node("decision", c, history, player=player)
+        me, opp = c[player], c[1 - player]
+        facing = opp - me
+        pot = 1 + c[0] + c[1]
+
+        def add(action: Tuple[str, float], child: Node) -> None:
+            node.actions.append(action)
+            node.children.append(child)
+
+        def put(amount: float) -> Tuple[float, float]:
+            new = list(c)
+            new[player] = me + amount
+            return tuple(new)
+
+        if facing == 0:
+            check = ("check", 0.0)
+            if checked:
+                add(check, Node("showdown", c, history + (check,)))
+            else:
+                add(check, decision(1 - player, c, aggressions, True, history + (check,)))
+        else:
+            fold, call = ("fold", 0.0), ("call", min(facing, stack - me))
+            add(fold, Node("fold", c, history + (fold,), folder=player))
+            add(call, Node("showdown", put(call[1]), history + (call,)))
+
+        if me + facing < stack and aggressions <= max_raises:
+            # amounts are what the player puts in now: the call plus a pot fraction of the pot after calling
+            amounts = sorted({round(min(facing + f * (pot + facing), stack - me), 6) for f in bet_sizes})
+            for amount in amounts:
+                action = ("bet" if facing == 0 else "raise", amount)
+                add(action, decision(1 - player, put(amount), aggressions + 1, False, history + (action,)))
+        return node
+
+    return decision(OOP, (0.0, 0.0), 0, False, ())
+
+
+def _decision_nodes(node: Node) -> List[Node]:
+    nodes = []
+    pending = [node]
+    while pending:
+        n = pending.pop()
+        if n.kind == "decision":
+            nodes.append(n)
+            pending.extend(reversed(n.children))
+    return nodes
+
+
+class RiverSolver:
+    def __init__(self, board: Sequence[int], w_oop: np.ndarray, w_ip: np.ndarray, stack: float,
+                 bet_sizes: Sequence[float] = DEFAULT_BET_SIZES, max_raises: int = 1) -> None:
+        live = (HOLDING_BITS & board_bits(board)) == 0
+        self.hands = [np.flatnonzero((w_oop > 0) & live), np.flatnonzero((w_ip > 0) & live)]
+        if not len(self.hands[OOP]) or not len(self.hands[IP]):
+            raise ValueError("A range has no combos left on this board")
+        self.priors = [w_oop[self.hands[OOP]], w_ip[self.hands[IP]]]
+
+        self.ranks = rank_all_holdings(board).ranks.astype(np.int64)
+        self.total_weight = float(self.priors[OOP] @ self.opponent_totals(OOP, self.priors[IP])[1])
+        if self.total_weight == 0:
+            raise ValueError("The ranges have no compatible combos on this board")
+
+        self.root = build_tree(stack, bet_sizes, max_raises)
+        self.nodes = _decision_nodes(self.root)
+        for node in self.nodes:
+            shape = (len(self.hands[node.player]), len(node.actions))
+            node.regrets = np.zeros(shape)
+            node.strategy_sum = np.zeros(shape)
+
+    @staticmethod
+    def _normalize(weights: np.ndarray) -> np.ndarray:
+        total = weights.sum(axis=1, keepdims=True)
+        return np.divide(weights, total, out=np.full_like(weights, 1.0 / weights.shape[1]), where=total > 0)
+
+    def current(self, node: Node) -> np.ndarray:
+        return self._normalize(node.regrets)
+
+    def average(self, node: Node) -> np.ndarray:
+        return self._normalize(node.strategy_sum)
+
+    def opponent_totals(self, p: int, reach_opp: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each of p's hands: the opponent reach it wins (ties half) and
+        all the opponent reach it does not block.
+        """
+        w2 = np.zeros(NUM_HOLDINGS)
+        w2[self.hands[1 - p]] = reach_opp
+        return holding_totals(self.ranks, self.hands[p], w2)
+
+    def terminal_value(self, node: Node, p: int, reach_opp: np.ndarray) -> np.ndarray:
+        pot = 1 + node.c[0] + node.c[1]
+        won, weight = self.opponent_totals(p, reach_opp)
+        if node.kind == "fold":
+            return (pot - node.c[p] if node.folder != p else -node.c[p]) * weight
+        return pot * won - node.c[p] * weight
+
+    def cfr(self, node: Node, p: int, reach_self: np.ndarray, reach_opp: np.ndarray, t: int) -> np.ndarray:
+        if node.kind != "decision":
+            return self.terminal_value(node, p, reach_opp)
+        sigma = self.current(node)
+        if node.player == p:
+            values = np.stack([self.cfr(child, p, reach_self * sigma[:, a], reach_opp, t)
+                               for a, child in enumerate(node.children)], axis=1)
+            value = (sigma * values).sum(axis=1)
+            np.maximum(node.regrets + values - value[:, None], 0, out=node.regrets)
+            node.strategy_sum += t * reach_self[:, None] * sigma
+            return value
+        return sum(self.cfr(child, p, reach_self, reach_opp * sigma[:, a], t)
+                   for a, child in enumerate(node.children))
+
+    def best_response(self, node: Node, p: int, reach_opp: np.ndarray) -> np.ndarray:
+        if node.kind != "decision":
+            return self.terminal_value(node, p, reach_opp)
+        if node.player == p:
+            return np.max([self.best_response(child, p, reach_opp) for child in node.children], axis=0)
+        sigma = self.average(node)
+        return sum(self.best_response(child, p, reach_opp * sigma[:, a]) for a, child in enumerate(node.children))
+
+    def exploitability(self) -> float:
+        """
+        In fractions of the pot.
+        """
+        br = [self.priors[p] @ self.best_response(self.root, p, self.priors[1 - p]) / self.total_weight
+              for p in (OOP, IP)]
+        return (br[OOP] + br[IP] - 1) / 2
+
+    def expected_values(self) -> List[float]:
+        def ev(node: Node, p: int, reach_opp: np.ndarray, reach_self: np.ndarray) -> float:
+            if node.kind != "decision":
+                return float(reach_self @ self.terminal_value(node, p, reach_opp))
+            sigma = self.average(node)
+            if node.player == p:
+                return sum(ev(child, p, reach_opp, reach_self * sigma[:, a]) for a, child in enumerate(node.children))
+            return sum(ev(child, p, reach_opp * sigma[:, a], reach_self) for a, child in enumerate(node.children))
+
+        return [ev(self.root, p, self.priors[1 - p], self.priors[p]) / self.total_weight for p in (OOP, IP)]
+
+    def solve(self, iterations: int = DEFAULT_ITERATIONS, target: float = 0.005,
+              time_budget_ms: Optional[float] = None) -> Tuple[int, float]:
+        """
+        Runs CFR+ (alternating updates, linear averaging) until the
+        exploitability, checked every CHECK_EVERY iterations, is below
+        target (fraction of the pot), iterations run out or time_budget_ms
+        has passed.
+        """
+        deadline = None if time_budget_ms is None else time.perf_counter() + time_budget_ms / 1000.0
+        exploitability = float("inf")
+        t = 0
+        while t < iterations:
+            t += 1
+            for p in (OOP, IP):
+                self.cfr(self.root, p, self.priors[p], self.priors[1 - p], t)
+            out_of_time = deadline is not None and time.perf_counter() >= deadline
+            if t % CHECK_EVERY == 0 or t == iterations or out_of_time:
+                exploitability = self.exploitability()
+                if exploitability < target or out_of_time:
+                    break
+        return t, exploitability
+
+
+def _action_str(action: Tuple[str, float], pot: float) -> str:
+    name, amount = action
+    return "{} {:g}".format(name, round(amount * pot, 4)) if name in ("bet", "raise") else name
+
+
+def _node_report(solver: RiverSolver, node: Node, reach: np.ndarray, pot: float, hand: int) -> dict:
+    """
+    Aggregate and per-class action frequencies at node, weighted by the
+    acting player's reach under the average strategy, and the strategy of
+    hand (a canonical holding, or -1) when the acting player can hold it.
+    """
+    sigma = solver.average(node)
+    hands = solver.hands[node.player]
+    weighted = reach[:, None] * sigma
+    total = weighted.sum()
+    classes = {}
+    for cls in np.unique(HOLDING_CLASS[hands]):
+        mass = weighted[HOLDING_CLASS[hands] == cls].sum(axis=0)
+        if mass.sum() > 0:
+            classes[CLASS_LABELS[cls]] = [round(float(x), 3) for x in mass / mass.sum()]
+    report = {
+        "path": "/".join(_action_str(a, pot) for a in node.history),
+        "player": PLAYER_NAMES[node.player],
+        "actions": [_action_str(a, pot) for a in node.actions],
+        "frequencies": [round(float(x), 4) for x in (weighted.sum(axis=0) / total if total > 0 else sigma.mean(axis=0))],
+        "classes": classes,
+    }
+    row = np.flatnonzero(hands == hand)
+    if len(row):
+        report["my_hand"] = [round(float(x), 4) for x in sigma[row[0]]]
+    return report
+
+
+def _reaches(solver: RiverSolver) -> Dict[int, np.ndarray]:
+    """
+    The acting player's own reach at every decision node under the
+    average strategy, keyed by id(node).
+    """
+    reach = {}
+
+    def walk(node: Node, own: List[np.ndarray]) -> None:
+        if node.kind != "decision":
+            return
+        reach[id(node)] = own[node.player]
+        sigma = solver.average(node)
+        for a, child in enumerate(node.children):
+            nxt = list(own)
+            nxt[node.player] = own[node.player] * sigma[:, a]
+            walk(child, nxt)
+
+    walk(solver.root, [solver.priors[OOP], solver.priors[IP]])
+    return reach
+
+
+def canonical_spot(board: Sequence[int], w_oop: np.ndarray, w_ip: np.ndarray) -> Tuple[tuple, np.ndarray, np.ndarray, int]:
+    """
+    The smallest suit relabeling of board, both ranges relabeled the same
+    way, and the SUIT_PERMUTATIONS index used. Among relabelings that give
+    the same board, the one with the smallest range bytes wins, so suit
+    isomorphic spots share one key.
+    """
+    candidates = []
+    for p, perm in enumerate(SUIT_PERMUTATIONS):
+        relabeled = tuple(sorted((c & ~3) | perm[c & 3] for c in board))
+        w0 = np.empty_like(w_oop)
+        w1 = np.empty_like(w_ip)
+        w0[HOLDING_PERMUTATIONS[p]] = w_oop
+        w1[HOLDING_PERMUTATIONS[p]] = w_ip
+        candidates.append((relabeled, w0.tobytes(), w1.tobytes(), p, w0, w1))
+    board, _, _, p, w0, w1 = min(candidates, key=lambda x: x[:3])
+    return board, w0, w1, p
+
+
+def solve_spot(board: Sequence[int], w_oop: np.ndarray, w_ip: np.ndarray, pot: float, stack: float,
+               bet_sizes: Sequence[float] = DEFAULT_BET_SIZES, max_raises: int = 1,
+               iterations: int = DEFAULT_ITERATIONS, target_exploitability: float = 0.005,
+               hand: Optional[Sequence[int]] = None, time_budget_ms: Optional[float] = None) -> dict:
+    """
+    Solves (or returns the cached solution of) a river spot. Stack is the
+    effective stack behind at the start of the river, in the same units
+    as pot; EVs and bet amounts come back in those units. hand (two card
+    indices) adds that combo's own strategy at every node. A solve cut
+    short by time_budget_ms reports out_of_time and the strategy reached.
+    """
+    canonical, w0, w1, p = canonical_spot(board, w_oop, w_ip)
+    sizes = tuple(sorted(set(bet_sizes)))
+    key = (canonical, w0.tobytes(), w1.tobytes(), round(stack / pot, 6), sizes, max_raises,
+           iterations, target_exploitability, time_budget_ms)
+    with _solutions_lock:
+        solution = _solutions.get(key)
+        if solution is not None:
+            _solutions.move_to_end(key)
+    cached = solution is not None
+    if not cached:
+        start = time.perf_counter()
+        solver = RiverSolver(canonical, w0, w1, stack / pot, sizes, max_raises)
+        done, exploitability = solver.solve(iterations, target_exploitability, time_budget_ms)
+        solution = {
+            "solver": solver,
+            "iterations": done,
+            "exploitability": exploitability,
+            "out_of_time": bool(done < iterations and exploitability >= target_exploitability),
+            "ev": solver.expected_values(),
+            "reach": _reaches(solver),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        with _solutions_lock:
+            _solutions[key] = solution
+            while len(_solutions) > SOLUTION_CACHE_SIZE:
+                _solutions.popitem(last=False)
+
+    solver = solution["solver"]
+    mine = int(HOLDING_PERMUTATIONS[p][holding_index(*hand)]) if hand else -1
+    return {
+        "iterations": solution["iterations"],
+        "exploitability_pct_pot": round(solution["exploitability"] * 100, 4),
+        "ev": {PLAYER_NAMES[q]: round(solution["ev"][q] * pot, 4) for q in (OOP, IP)},
+        "combos": {PLAYER_NAMES[q]: len(solver.hands[q]) for q in (OOP, IP)},
+        "out_of_time": solution["out_of_time"],
+        "solve_seconds": solution["seconds"],
+        "cached": cached,
+        "nodes": [_node_report(solver, node, solution["reach"][id(node)], pot, mine) for node in solver.nodes],
+    }
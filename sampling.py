@@ -0,0 +1,116 @@
+import random
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+SAMPLING_MODES = ("random", "stratified", "antithetic", "quasi")
+
+# first primes, one Halton base per dealt card
+# (9 opponents * 2 hole cards + 5 board cards = 23 dimensions at most)
+HALTON_BASES: List[int] = [
+    2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37,
+    41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83
+]
+
+Deal = Tuple[Optional[int], List[List[int]], List[int]]
+
+
+def deal_from_point(pool: Sequence[int], point: Sequence[float], n_other_players: int) -> Tuple[List[List[int]], List[int]]:
+    """
+    Maps a point of the unit hypercube to a deal. Coordinate k picks the
+    k-th dealt card from whatever is still left in the pool, so every point
+    gives a valid deal with no duplicate cards.
+
+    The first 2 * n_other_players coordinates are the opponents' hole cards,
+    the rest are the board cards.
+    """
+    cards = list(pool)
+    dealt = []
+    for u in point:
+        dealt.append(cards.pop(min(int(u * len(cards)), len(cards) - 1)))
+
+    other_hands = [dealt[2 * i:2 * i + 2] for i in range(n_other_players)]
+    return other_hands, dealt[2 * n_other_players:]
+
+
+def radical_inverse(i: int, base: int) -> float:
+    """
+    Van der Corput radical inverse of i in the given base.
+    """
+    inv_base = 1.0 / base
+    f = inv_base
+    result = 0.0
+    while i > 0:
+        result += f * (i % base)
+        i //= base
+        f *= inv_base
+    return result
+
+
+def stratified_deals(pool: Sequence[int], n_other_players: int, needed_board_cards: int, rng: random.Random) -> Iterator[Deal]:
+    """
+    Enumerates the first board card still to come (the turn when a flop is
+    given) and samples the rest of the deal. Strata are visited in a
+    shuffled round robin so every full cycle covers each card exactly once.
+
+    Yields the stratum card with each deal so the caller can weight the
+    per-stratum means equally.
+    """
+    strata = list(pool)
+    while True:
+        rng.shuffle(strata)
+        for s in strata:
+            rest = [c for c in pool if c != s]
+            dealt = rng.sample(rest, 2 * n_other_players + needed_board_cards - 1)
+            other_hands = [dealt[2 * i:2 * i + 2] for i in range(n_other_players)]
+            yield s, other_hands, [s] + dealt[2 * n_other_players:]
+
+
+def antithetic_deals(pool: Sequence[int], n_other_players: int, needed_board_cards: int, rng: random.Random) -> Iterator[Deal]:
+    """
+    Yields deals in pairs built from u and 1 - u. The pool is sorted by
+    rank, so the second deal of each pair swaps high cards for low ones and
+    the two outcomes are negatively correlated.
+    """
+    pool = sorted(pool)
+    dims = 2 * n_other_players + needed_board_cards
+    while True:
+        point = [rng.random() for _ in range(dims)]
+        yield (None, *deal_from_point(pool, point, n_other_players))
+        yield (None, *deal_from_point(pool, [1.0 - u for u in point], n_other_players))
+
+
+def quasi_deals(pool: Sequence[int], n_other_players: int, needed_board_cards: int, rng: random.Random) -> Iterator[Deal]:
+    """
+    Maps a Halton sequence to deals. A random shift (Cranley-Patterson
+    rotation) keeps the estimate unbiased and makes repeated runs independent.
+    """
+    pool = sorted(pool)
+    dims = 2 * n_other_players + needed_board_cards
+    if dims > len(HALTON_BASES):
+        raise ValueError("quasi sampling supports at most {} dealt cards".format(len(HALTON_BASES)))
+
+    shift = [rng.random() for _ in range(dims)]
+    i = 1
+    while True:
+        point = [(radical_inverse(i, HALTON_BASES[k]) + shift[k]) % 1.0 for k in range(dims)]
+        yield (None, *deal_from_point(pool, point, n_other_players))
+        i += 1
+
+
+def iter_deals(mode: str, pool: Sequence[int], n_other_players: int, needed_board_cards: int, rng: random.Random) -> Iterator[Deal]:
+    """
+    Returns an endless iterator of (stratum, other_hands, board_ext) deals
+    for one of the variance-reduced SAMPLING_MODES. Plain random sampling
+    stays in eval_poker.get_random_hands.
+
+    Stratifying needs at least one board card to come, so on the river
+    "stratified" falls back to antithetic pairs.
+    """
+    if mode == "stratified":
+        if needed_board_cards > 0:
+            return stratified_deals(pool, n_other_players, needed_board_cards, rng)
+        return antithetic_deals(pool, n_other_players, needed_board_cards, rng)
+    elif mode == "antithetic":
+        return antithetic_deals(pool, n_other_players, needed_board_cards, rng)
+    elif mode == "quasi":
+        return quasi_deals(pool, n_other_players, needed_board_cards, rng)
+    raise ValueError("Unknown sampling mode {!r}, expected one of {}".format(mode, SAMPLING_MODES))
@@ -0,0 +1,268 @@
+"""
+State-machine (DAG) hand evaluator for 5, 6 and 7 cards.
+
+Instead of the 52-way card DAG of the classic two-plus-two evaluator (tens
+of millions of states and hours to generate in Python), the state here is
+the multiset of ranks seen so far. Each card moves the state along one
+of 13 edges, so evaluating 7 cards is seven dependent reads of dag_next,
+and the final state's dag_value is the best hand those ranks make without
+a flush. There are only about 76k states, so generation takes seconds and
+the tables take a few MB.
+
+Suits are handled on the side: the cards of each suit are OR-ed into a
+13 bit rank mask, and flush_best[mask] is the best (straight) flush any 5
+of those cards make, or NO_FLUSH for masks with fewer than 5 bits. The
+hand rank is min(dag_value, flush_best of each suit), since a full house
+that coexists with a flush still has to win.
+
+All three tables are built from the existing LookupTable ranks and stored
+through table_store, so they are mmapped read-only and shared between
+processes:
+
+    python seven_card_dag.py --build --verify 200000
+
+evaluate_batch() walks the DAG for a whole NumPy array of hands at once.
+"""
+import itertools
+import sys
+from typing import Dict, List, Tuple
+
+import table_store
+from card import Card
+from eval_poker import Evaluator
+from lookup import LookupTable
+
+NUM_RANKS = 13
+NO_FLUSH = LookupTable.MAX_HIGH_CARD + 1
+
+_states = None
+
+
+def _enumerate_states() -> Tuple[Dict[Tuple[int, ...], int], List[Tuple[int, ...]]]:
+    """
+    Every rank multiset of at most 7 cards with no rank more than 4 times,
+    numbered in breadth-first order so the empty multiset is state 0.
+    """
+    global _states
+    if _states is None:
+        empty = (0,) * NUM_RANKS
+        ids = {empty: 0}
+        order = [empty]
+        frontier = [empty]
+        for _ in range(7):
+            following = []
+            for counts in frontier:
+                for r in range(NUM_RANKS):
+                    if counts[r] < 4:
+                        nxt = counts[:r] + (counts[r] + 1,) + counts[r + 1:]
+                        if nxt not in ids:
+                            ids[nxt] = len(order)
+                            order.append(nxt)
+                            following.append(nxt)
+            frontier = following
+        _states = (ids, order)
+    return _states
+
+
+@table_store.register("dag_next", "i")
+def build_dag_next():
+    """
+    dag_next[13 * state + rank] is 13 * (next state), so the next lookup
+    needs no multiply. Edges that would put a fifth card on a rank are 0.
+    """
+    import array
+
+    ids, order = _enumerate_states()
+    data = array.array("i", bytes(4 * NUM_RANKS * len(order)))
+    for state, counts in enumerate(order):
+        if sum(counts) == 7:
+            continue
+        for r in range(NUM_RANKS):
+            if counts[r] < 4:
+                nxt = counts[:r] + (counts[r] + 1,) + counts[r + 1:]
+                data[NUM_RANKS * state + r] = NUM_RANKS * ids[nxt]
+    return data
+
+
+@table_store.register("dag_value", "H")
+def build_dag_value():
+    """
+    Best non-flush rank of each state with 5 to 7 cards, 0 for the others.
+    """
+    import array
+
+    table = LookupTable()
+    _, order = _enumerate_states()
+    data = array.array("H", bytes(2 * len(order)))
+    for state, counts in enumerate(order):
+        if sum(counts) < 5:
+            continue
+        primes = [Card.PRIMES[r] for r in range(NUM_RANKS) for _ in range(counts[r])]
+        best = NO_FLUSH
+        for combo in set(itertools.combinations(primes, 5)):
+            product = combo[0] * combo[1] * combo[2] * combo[3] * combo[4]
+            best = min(best, table.unsuited_lookup[product])
+        data[state] = best
+    return data
+
+
+@table_store.register("flush_best", "H")
+def build_flush_best():
+    """
+    Best flush rank over every 5-subset of each 13 bit rank mask.
+    """
+    import array
+
+    table = LookupTable()
+    data = array.array("H", [NO_FLUSH] * (1 << NUM_RANKS))
+    for mask in range(1 << NUM_RANKS):
+        ranks = [r for r in range(NUM_RANKS) if mask & (1 << r)]
+        if len(ranks) < 5:
+            continue
+        best = NO_FLUSH
+        for combo in itertools.combinations(ranks, 5):
+            product = 1
+            for r in combo:
+                product *= Card.PRIMES[r]
+            best = min(best, table.flush_lookup[product])
+        data[mask] = best
+    return data
+
+
+class DagEvaluator(Evaluator):
+    """
+    Evaluator that walks the rank DAG instead of trying every 5 card
+    subset in _six/_seven. Same ranks, same API.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.dag_next = table_store.attach("dag_next")
+        self.dag_value = table_store.attach("dag_value")
+        self.flush_best = table_store.attach("flush_best")
+
+    def evaluate(self, hand: List[int], board: List[int]) -> int:
+        nxt = self.dag_next
+        s = 0
+        suit_masks = [0] * 9
+        for c in hand:
+            s = nxt[s + ((c >> 8) & 0xF)]
+            suit_masks[(c >> 12) & 0xF] |= (c >> 16) & 0x1FFF
+        for c in board:
+            s = nxt[s + ((c >> 8) & 0xF)]
+            suit_masks[(c >> 12) & 0xF] |= (c >> 16) & 0x1FFF
+
+        fb = self.flush_best
+        return min(self.dag_value[s // NUM_RANKS],
+                   fb[suit_masks[1]], fb[suit_masks[2]], fb[suit_masks[4]], fb[suit_masks[8]])
+
+
+    def board_state(self, board: List[int]) -> tuple:
+        """
+        DAG state after the board, plus the one suit that could still make
+        a flush with two more cards (3+ on the board) and its rank mask.
+        """
+        nxt = self.dag_next
+        s = 0
+        suit_masks = [0] * 9
+        suit_counts = [0] * 9
+        for c in board:
+            s = nxt[s + ((c >> 8) & 0xF)]
+            suit = (c >> 12) & 0xF
+            suit_masks[suit] |= (c >> 16) & 0x1FFF
+            suit_counts[suit] += 1
+
+        flush_suit = max((1, 2, 4, 8), key=suit_counts.__getitem__)
+        if suit_counts[flush_suit] < 3:
+            flush_suit = 0
+        return (s, flush_suit, suit_masks[flush_suit])
+
+    def evaluate_on_board(self, state: tuple, hand: List[int]) -> int:
+        s, flush_suit, flush_mask = state
+        nxt = self.dag_next
+        for c in hand:
+            s = nxt[s + ((c >> 8) & 0xF)]
+        best = self.dag_value[s // NUM_RANKS]
+
+        if flush_suit:
+            for c in hand:
+                if (c >> 12) & flush_suit:
+                    flush_mask |= (c >> 16) & 0x1FFF
+            flush = self.flush_best[flush_mask]
+            if flush < best:
+                best = flush
+        return best
+
+
+_np_tables = None
+
+
+def _numpy_tables():
+    global _np_tables
+    if _np_tables is None:
+        import numpy as np
+        _np_tables = tuple(np.frombuffer(table_store.attach(name), dtype=dtype) for name, dtype in (
+            ("dag_next", np.int32), ("dag_value", np.uint16), ("flush_best", np.uint16)))
+    return _np_tables
+
+
+def evaluate_batch(cards):
+    """
+    Ranks a batch of hands given as an (N, k) integer array of card indices
+    (five_card_table.CARD_INDEX, rank * 4 + suit), 5 <= k <= 7. Returns a
+    uint16 array of N ranks.
+    """
+    import numpy as np
+
+    dag_next, dag_value, flush_best = _numpy_tables()
+    cards = np.asarray(cards)
+    ranks = cards >> 2
+    suits = cards & 3
+
+    s = np.zeros(len(cards), dtype=np.int32)
+    for i in range(cards.shape[1]):
+        s = dag_next[s + ranks[:, i]]
+    best = dag_value[s // NUM_RANKS]
+
+    bits = np.left_shift(1, ranks)
+    for suit in range(4):
+        mask = np.bitwise_or.reduce(np.where(suits == suit, bits, 0), axis=1)
+        best = np.minimum(best, flush_best[mask])
+    return best
+
+
+def verify(samples: int, seed: int = 0) -> int:
+    """
+    Compares DagEvaluator and evaluate_batch against Evaluator on random
+    5, 6 and 7 card hands. Returns the number of mismatches.
+    """
+    import random
+
+    import numpy as np
+
+    from five_card_table import CARD_INDEX, CARDS_BY_INDEX
+
+    rng = random.Random(seed)
+    reference = Evaluator()
+    dag = DagEvaluator(reference.table)
+    mismatches = 0
+    for n in (5, 6, 7):
+        hands = [rng.sample(CARDS_BY_INDEX, n) for _ in range(samples)]
+        expected = [reference.evaluate(h[:2], h[2:]) for h in hands]
+        mismatches += sum(dag.evaluate(h[:2], h[2:]) != e for h, e in zip(hands, expected))
+        batch = evaluate_batch(np.array([[CARD_INDEX[c] for c in h] for h in hands]))
+        mismatches += int(np.sum(batch != np.array(expected)))
+    return mismatches
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--build" in args:
+        for name in ("dag_next", "dag_value", "flush_best"):
+            table_store.build(name, force=True)
+            print("Wrote {}".format(table_store.table_path(name)))
+    if "--verify" in args:
+        samples = int(args[args.index("--verify") + 1]) if len(args) > args.index("--verify") + 1 else 100000
+        bad = verify(samples)
+        print("{} mismatches over {} hands of each size".format(bad, samples))
+        sys.exit(1 if bad else 0)
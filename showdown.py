@@ -0,0 +1,135 @@
+"""
+Showdown odds when every player's hole cards are known.
+
+All remaining runouts of the board are enumerated (at most C(48, 5) =
+1,712,304 heads-up preflop) as NumPy arrays. Each runout walks the rank
+DAG of seven_card_dag once for the shared board cards, and every player
+then only adds their two cards: two more dag_next reads and a flush_best
+read for each suit they hold. Boards with more runouts than max_runouts
+are sampled instead.
+
+Runouts are evaluated CHUNK_RUNOUTS at a time (all runouts starting with
+the same card, when enumerating), keeping only win, tie and share
+counts, so memory stays flat however many runouts or samples there are.
+"""
+import math
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from seven_card_dag import NUM_RANKS, _numpy_tables
+
+EXACT_LIMIT = 2000000
+DEFAULT_SAMPLES = 200000
+CHUNK_RUNOUTS = 65536
+
+# bit rank + 13 * suit of each card, so one int64 holds all four suit masks
+CARD_BITS = np.array([1 << ((c >> 2) + 13 * (c & 3)) for c in range(52)], dtype=np.int64)
+
+
+def combinations_array(n: int, k: int) -> np.ndarray:
+    """
+    All k-subsets of range(n) as an (C(n, k), k) int64 array, each row
+    increasing. Built column by column: every row is repeated once for
+    each value above its last entry.
+    """
+    rows = np.zeros((1, 0), dtype=np.int64)
+    for _ in range(k):
+        last = rows[:, -1] if rows.shape[1] else np.full(len(rows), -1)
+        counts = n - 1 - last
+        repeated = np.repeat(rows, counts, axis=0)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        values = np.arange(counts.sum()) - starts + np.repeat(last + 1, counts)
+        rows = np.concatenate([repeated, values[:, None]], axis=1)
+    return rows
+
+
+def _board_states(board: Sequence[int], runouts: np.ndarray):
+    """
+    DAG state and suit-mask bits (see CARD_BITS) of board plus each runout.
+    """
+    dag_next, _, _ = _numpy_tables()
+    state = 0
+    for c in board:
+        state = int(dag_next[state + (c >> 2)])
+    states = np.full(len(runouts), state, dtype=np.int32)
+    # cards are distinct, so summing their bits is OR-ing them
+    bits = np.full(len(runouts), int(CARD_BITS[list(board)].sum()), dtype=np.int64)
+    for i in range(runouts.shape[1]):
+        states = dag_next[states + (runouts[:, i] >> 2)]
+        bits += CARD_BITS[runouts[:, i]]
+    return states, bits
+
+
+def player_ranks(hands: List[Sequence[int]], board: Sequence[int], runouts: np.ndarray) -> List[np.ndarray]:
+    """
+    Each player's hand rank on every runout.
+    """
+    dag_next, dag_value, flush_best = _numpy_tables()
+    states, bits = _board_states(board, runouts)
+    suit_masks = [(bits >> (13 * suit)) & 0x1FFF for suit in range(4)]
+    # a flush in a suit the player holds no card of is the board's own
+    board_flush = {suit: flush_best[suit_masks[suit]] for suit in range(4)}
+
+    ranks = []
+    for a, b in hands:
+        best = dag_value[dag_next[dag_next[states + (a >> 2)] + (b >> 2)] // NUM_RANKS]
+        for suit in range(4):
+            own = (1 << (a >> 2) if a & 3 == suit else 0) | (1 << (b >> 2) if b & 3 == suit else 0)
+            best = np.minimum(best, flush_best[suit_masks[suit] | own] if own else board_flush[suit])
+        ranks.append(best)
+    return ranks
+
+
+def _runouts(live: np.ndarray, need: int, exact: bool, samples: int, seed: Optional[int]):
+    """
+    Chunks of runouts: every need-subset of live, or samples random ones.
+    """
+    if not exact:
+        rng = np.random.default_rng(seed)
+        for start in range(0, samples, CHUNK_RUNOUTS):
+            size = min(CHUNK_RUNOUTS, samples - start)
+            yield live[np.argsort(rng.random((size, len(live))), axis=1)[:, :need]]
+    elif need == 0 or math.comb(len(live), need) <= CHUNK_RUNOUTS:
+        yield live[combinations_array(len(live), need)]
+    else:
+        for first in range(len(live) - need + 1):
+            rest = combinations_array(len(live) - first - 1, need - 1) + first + 1
+            yield live[np.concatenate([np.full((len(rest), 1), first), rest], axis=1)]
+
+
+def showdown(hands: List[Sequence[int]], board: Sequence[int] = (), max_runouts: int = EXACT_LIMIT,
+             samples: int = DEFAULT_SAMPLES, seed: Optional[int] = None) -> dict:
+    """
+    Each player's win, tie and equity share over the runouts of board,
+    hands and board given as card indices.
+    """
+    dead = {c for hand in hands for c in hand} | set(board)
+    live = np.array([c for c in range(52) if c not in dead], dtype=np.int64)
+    need = 5 - len(board)
+    total = math.comb(len(live), need)
+    exact = total <= max_runouts
+    if not exact:
+        total = samples
+
+    wins = [0] * len(hands)
+    ties = [0] * len(hands)
+    shares = [0.0] * len(hands)
+    for runouts in _runouts(live, need, exact, samples, seed):
+        ranks = player_ranks(hands, board, runouts)
+        best = np.minimum.reduce(ranks)
+        winners = [r == best for r in ranks]
+        split = np.add.reduce([w.astype(np.int8) for w in winners])
+        alone = split == 1
+        for p, w in enumerate(winners):
+            won = int(np.count_nonzero(w & alone))
+            wins[p] += won
+            ties[p] += int(np.count_nonzero(w)) - won
+            shares[p] += won + float((1.0 / split[w & ~alone]).sum())
+
+    players = [{
+        "win": round(wins[p] / total * 100, 4),
+        "tie": round(ties[p] / total * 100, 4),
+        "equity": round(shares[p] / total * 100, 4),
+    } for p in range(len(hands))]
+    return {"players": players, "runouts": total, "exact": exact}
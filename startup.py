@@ -0,0 +1,79 @@
+"""
+Startup profile and fast-start mode for the API.
+
+main.py records how long each startup phase takes in PROFILE, which is
+served from /startup_profile/. With RS_FAST_START=1 the evaluator is
+prepared while main.py is imported, so the first request after a cold
+start (a new Lambda container or uvicorn worker) does not pay for it.
+Otherwise the same warm-up runs from the FastAPI startup event.
+
+Build the lookup snapshot ahead of deploying with:
+
+    python startup.py --build-snapshot
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+PROFILE: Dict[str, float] = {}
+
+_process_start = time.perf_counter()
+_warmed_up = False
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Records the wall-clock seconds spent inside the block under name.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PROFILE[name] = round(time.perf_counter() - start, 6)
+
+
+def fast_start_enabled() -> bool:
+    return os.environ.get("RS_FAST_START", "") not in ("", "0")
+
+
+def warm_up() -> None:
+    """
+    Loads the lookup tables and runs each evaluation path once. Safe to call
+    repeatedly, only the first call does any work (Mangum runs the startup
+    event on every invocation).
+    """
+    global _warmed_up
+    if _warmed_up:
+        return
+
+    from card import Card
+    from eval_poker import get_evaluator
+
+    with phase("lookup_tables"):
+        evaluator = get_evaluator()
+
+    with phase("warm_up"):
+        cards = Card.hand_to_binary(["As", "Kd", "7c", "7h", "2s", "Td", "9d"])
+        for n in (5, 6, 7):
+            evaluator.evaluate(cards[:2], cards[2:n])
+
+    PROFILE["since_process_start"] = round(time.perf_counter() - _process_start, 6)
+    _warmed_up = True
+
+
+def build_snapshot() -> None:
+    from eval_poker import LOOKUP_SNAPSHOT
+    from lookup import LookupTable
+
+    LookupTable().write_snapshot(LOOKUP_SNAPSHOT)
+    print("Wrote {}".format(LOOKUP_SNAPSHOT))
+
+
+if __name__ == "__main__":
+    if "--build-snapshot" in sys.argv[1:]:
+        build_snapshot()
+    else:
+        print(__doc__)
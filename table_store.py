@@ -0,0 +1,273 @@
+"""
+Read-only lookup tables shared between worker processes.
+
+Every table is a flat typed array written once to its own file under
+TABLE_DIR and memory-mapped read-only by each process that needs it. The
+pages live in the OS page cache, so N gunicorn workers share one copy
+instead of holding N private Python dicts, and adding a table does not
+grow each worker's RSS by its size.
+
+Tables are produced by builders registered with @register. The evaluator
+tables build in about a second and are built on first use, or by gunicorn
+in the master before forking (see gunicorn.conf.py). Tables registered as
+precomputed (preflop equity, push/fold charts) take a minute or more and
+are a deploy step:
+
+    python table_store.py --build
+
+When one is missing anyway, attach() builds it on the spot, except with
+RS_BUILD_IN_BACKGROUND=1 (set by the web app): then it starts building
+every missing table in a background thread and raises TableNotReady at
+once, which the app answers with 503.
+
+File layout: 16 byte header (b"RSTB", typecode, 3 pad bytes, uint64 item
+count) followed by the raw little-endian array data.
+"""
+import array
+import importlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from lookup import LookupTable
+
+TABLE_DIR = os.environ.get(
+    "RS_TABLE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+)
+
+MAGIC = b"RSTB"
+HEADER = struct.Struct("<4sc3xQ")
+
+# name => (typecode, builder)
+BUILDERS: Dict[str, Tuple[str, Callable[[], array.array]]] = {}
+# names of the slow tables that are built ahead of time
+PRECOMPUTED: Set[str] = set()
+
+# modules whose builders register tables, imported by load_builders()
+TABLE_MODULES = ["five_card_table", "seven_card_dag", "preflop_equity", "push_fold"]
+
+_attached: Dict[str, memoryview] = {}
+_background_build: Optional[threading.Thread] = None
+_background_lock = threading.Lock()
+
+
+class TableNotReady(RuntimeError):
+    """
+    A precomputed table is missing and is being built in the background.
+    """
+
+
+def register(name: str, typecode: str, precomputed: bool = False) -> Callable:
+    """
+    Registers a builder returning an array.array of the given typecode.
+    precomputed marks a table too slow to build on demand.
+    """
+    def decorator(builder: Callable[[], array.array]) -> Callable[[], array.array]:
+        BUILDERS[name] = (typecode, builder)
+        if precomputed:
+            PRECOMPUTED.add(name)
+        return builder
+    return decorator
+
+
+def table_path(name: str) -> str:
+    return os.path.join(TABLE_DIR, name + ".bin")
+
+
+def write_table(name: str, data: array.array) -> None:
+    """
+    Writes data to the table file, atomically so a worker attaching
+    concurrently never sees a partial file.
+    """
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    path = table_path(name)
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    if sys.byteorder != "little":
+        data = array.array(data.typecode, data)
+        data.byteswap()
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, data.typecode.encode(), len(data)))
+        data.tofile(f)
+    os.replace(tmp, path)
+
+
+def build(name: str, force: bool = False) -> None:
+    typecode, builder = BUILDERS[name]
+    if force or not os.path.exists(table_path(name)):
+        data = builder()
+        assert data.typecode == typecode, "builder for {} returned typecode {}".format(name, data.typecode)
+        write_table(name, data)
+
+
+def load_builders() -> None:
+    for module in TABLE_MODULES:
+        importlib.import_module(module)
+
+
+def build_all(force: bool = False, precomputed: bool = True) -> None:
+    """
+    Builds every missing table (all of them with force), leaving out the
+    precomputed ones unless precomputed is set.
+    """
+    load_builders()
+    for name in list(BUILDERS):
+        if precomputed or name not in PRECOMPUTED:
+            build(name, force)
+
+
+def _build_in_background(name: str) -> None:
+    global _background_build
+    with _background_lock:
+        if _background_build is None or not _background_build.is_alive():
+            # everything missing, in registration order, so a table built
+            # from another (push_fold from preflop_equity) finds it on disk
+            _background_build = threading.Thread(target=build_all, name="table-build", daemon=True)
+            _background_build.start()
+    raise TableNotReady("the {} table is being built, retry shortly (or run python table_store.py --build)"
+                        .format(name))
+
+
+def _map(name: str) -> memoryview:
+    """
+    Maps the table file. Raises ValueError when it is not a table file,
+    is truncated, or holds another typecode than its builder's.
+    """
+    path = table_path(name)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise ValueError("{} is truncated".format(path))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, typecode, count = HEADER.unpack_from(mm)
+    if magic != MAGIC:
+        raise ValueError("{} is not a table file".format(path))
+    typecode = typecode.decode("latin-1")
+    if name in BUILDERS and typecode != BUILDERS[name][0]:
+        raise ValueError("{} holds typecode {!r}, expected {!r}".format(path, typecode, BUILDERS[name][0]))
+    if len(mm) != HEADER.size + count * array.array(typecode).itemsize:
+        raise ValueError("{} is truncated".format(path))
+    return memoryview(mm)[HEADER.size:].cast(typecode)
+
+
+def _build_missing(name: str) -> None:
+    if name in PRECOMPUTED and os.environ.get("RS_BUILD_IN_BACKGROUND", "") not in ("", "0"):
+        _build_in_background(name)
+    build(name)
+
+
+def attach(name: str) -> memoryview:
+    """
+    Returns a read-only view of the table, building the file first if it
+    does not exist yet (see the module docstring for precomputed tables).
+    A file that is corrupt, truncated or stale (another typecode) is
+    rebuilt the same way when the table has a builder.
+    Views are cached per process; a mapping made before fork is inherited
+    by the children.
+    """
+    if name not in _attached:
+        if not os.path.exists(table_path(name)):
+            _build_missing(name)
+        try:
+            view = _map(name)
+        except ValueError:
+            if name not in BUILDERS:
+                raise
+            try:
+                os.remove(table_path(name))
+            except FileNotFoundError:
+                # another worker got there first
+                pass
+            _build_missing(name)
+            view = _map(name)
+        _attached[name] = view
+
+    return _attached[name]
+
+
+class PackedLookup:
+    """
+    Read-only mapping over a sorted key table and a parallel value table,
+    so it can stand in for the dicts in LookupTable.
+    """
+
+    def __init__(self, keys: memoryview, values: memoryview) -> None:
+        self.keys = keys
+        self.values = values
+
+    def __getitem__(self, key: int) -> int:
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            raise KeyError(key)
+        return self.values[i]
+
+    def __contains__(self, key: int) -> bool:
+        i = bisect_left(self.keys, key)
+        return i != len(self.keys) and self.keys[i] == key
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class SharedLookupTable(LookupTable):
+    """
+    LookupTable whose flush_lookup and unsuited_lookup are backed by the
+    shared table files instead of per-process dicts.
+    """
+
+    def __init__(self) -> None:
+        self.flush_lookup = PackedLookup(attach("flush_keys"), attach("flush_ranks"))
+        self.unsuited_lookup = PackedLookup(attach("unsuited_keys"), attach("unsuited_ranks"))
+
+
+_lookup_table = None
+
+
+def _generated_lookup_table() -> LookupTable:
+    global _lookup_table
+    if _lookup_table is None:
+        _lookup_table = LookupTable()
+    return _lookup_table
+
+
+@register("flush_keys", "I")
+def _flush_keys() -> array.array:
+    return array.array("I", sorted(_generated_lookup_table().flush_lookup))
+
+
+@register("flush_ranks", "H")
+def _flush_ranks() -> array.array:
+    table = _generated_lookup_table().flush_lookup
+    return array.array("H", [table[k] for k in sorted(table)])
+
+
+@register("unsuited_keys", "I")
+def _unsuited_keys() -> array.array:
+    return array.array("I", sorted(_generated_lookup_table().unsuited_lookup))
+
+
+@register("unsuited_ranks", "H")
+def _unsuited_ranks() -> array.array:
+    table = _generated_lookup_table().unsuited_lookup
+    return array.array("H", [table[k] for k in sorted(table)])
+
+
+def main() -> None:
+    load_builders()
+    if "--build" in sys.argv[1:]:
+        build_all(force="--force" in sys.argv[1:])
+    for name in BUILDERS:
+        path = table_path(name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        print("{:<20} {:>12} bytes  {}".format(name, size, path))
+
+
+if __name__ == "__main__":
+    # go through the importable module, which is the registry that the
+    # TABLE_MODULES register their builders with
+    import table_store
+    table_store.main()
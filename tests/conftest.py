@@ -0,0 +1,26 @@
+"""
+Tests run against lookup tables in a cache directory outside the tree
+(built on first use, about a second each). The precomputed tables
+(preflop equity, push/fold) are never needed here.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE = os.path.join(tempfile.gettempdir(), "rollsolid-test-tables")
+
+# before the engine modules are imported: they read these at import time
+os.environ.setdefault("RS_TABLE_DIR", CACHE)
+os.environ.setdefault("RS_LOOKUP_SNAPSHOT", os.path.join(CACHE, "lookup_snapshot.pkl"))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+    return TestClient(main.app)
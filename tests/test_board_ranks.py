@@ -0,0 +1,28 @@
+import numpy as np
+
+from board_ranks import MASKED_RANK, rank_all_holdings
+from holdings import HOLDING_CARDS, blocked, holding_index
+from seven_card_dag import evaluate_batch
+
+
+def test_ranks_match_direct_evaluation():
+    rng = np.random.default_rng(2)
+    for _ in range(5):
+        board = tuple(rng.choice(52, size=5, replace=False).tolist())
+        ranks = rank_all_holdings(board, cache=False).ranks
+        live = ~blocked(board)
+        cards = np.concatenate([HOLDING_CARDS[live], np.tile(board, (live.sum(), 1))], axis=1)
+        assert (ranks[live] == evaluate_batch(cards)).all()
+        assert (ranks[~live] == MASKED_RANK).all()
+
+
+def swap_spades_and_hearts(card):
+    return card ^ 1 if card & 3 in (0, 1) else card
+
+
+def test_suit_relabeled_boards_agree():
+    board = (0, 9, 22, 35, 50)
+    ranks = rank_all_holdings(board).ranks
+    relabeled = rank_all_holdings([swap_spades_and_hearts(c) for c in board]).ranks
+    for i, (a, b) in enumerate(HOLDING_CARDS):
+        assert relabeled[holding_index(swap_spades_and_hearts(a), swap_spades_and_hearts(b))] == ranks[i]
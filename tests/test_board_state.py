@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from card import Card
+from eval_poker import Evaluator, PLOEvaluator
+from five_card_table import CARDS_BY_INDEX
+from seven_card_dag import DagEvaluator
+
+HEARTS = [c for c in CARDS_BY_INDEX if Card.get_suit_int(c) == Card.CHAR_SUIT_TO_INT_SUIT["h"]]
+
+
+def random_deals(rng, hand_size, count):
+    for _ in range(count):
+        cards = rng.sample(CARDS_BY_INDEX, 5 + 3 * hand_size)
+        yield cards[:5], [cards[5 + i * hand_size:5 + (i + 1) * hand_size] for i in range(3)]
+
+
+def flush_heavy_deals(rng, hand_size, count):
+    """Boards with 3 to 5 hearts, and hands that mostly hold hearts too."""
+    for _ in range(count):
+        hearts = rng.sample(HEARTS, 3 + rng.randrange(3))
+        rest = [c for c in CARDS_BY_INDEX if c not in hearts]
+        board = hearts + rng.sample(rest, 5 - len(hearts))
+        rng.shuffle(board)
+        left = [c for c in HEARTS if c not in board]
+        others = [c for c in CARDS_BY_INDEX if c not in board and c not in left]
+        deck = rng.sample(left, len(left)) + rng.sample(others, len(others))
+        yield board, [deck[i * hand_size:(i + 1) * hand_size] for i in range(3)]
+
+
+@pytest.mark.parametrize("deals", [random_deals, flush_heavy_deals])
+@pytest.mark.parametrize("make", [Evaluator, DagEvaluator])
+def test_holdem_fold_in_matches_evaluate(deals, make):
+    evaluator = make()
+    rng = random.Random(33)
+    for board, hands in deals(rng, 2, 400):
+        state = evaluator.board_state(board)
+        for hand in hands:
+            assert evaluator.evaluate_on_board(state, hand) == evaluator.evaluate(hand, board)
+
+
+@pytest.mark.parametrize("deals", [random_deals, flush_heavy_deals])
+@pytest.mark.parametrize("hand_size", [4, 5])
+def test_plo_fold_in_matches_evaluate(deals, hand_size):
+    evaluator = PLOEvaluator()
+    rng = random.Random(hand_size)
+    for board, hands in deals(rng, hand_size, 150):
+        state = evaluator.board_state(board)
+        for hand in hands:
+            assert evaluator.evaluate_on_board(state, hand) == evaluator.evaluate(hand, board)
+
+
+def test_flush_boards_still_rank_straight_flushes_and_full_houses():
+    evaluator = Evaluator()
+    board = [Card.new(c) for c in ("9h", "Th", "Jh", "9s", "2h")]
+    state = evaluator.board_state(board)
+    straight_flush = [Card.new("Qh"), Card.new("Kh")]
+    full_house = [Card.new("9c"), Card.new("2c")]
+    for hand in (straight_flush, full_house):
+        assert evaluator.evaluate_on_board(state, hand) == evaluator.evaluate(hand, board)
+    assert evaluator.evaluate_on_board(state, straight_flush) < evaluator.evaluate_on_board(state, full_house)
+
+
+def test_other_board_sizes_fall_back_to_evaluate():
+    evaluator = Evaluator()
+    board = [Card.new(c) for c in ("Ah", "Kd", "Jc")]
+    hand = [Card.new("As"), Card.new("Jd")]
+    assert evaluator.evaluate_on_board(evaluator.board_state(board), hand) == evaluator.evaluate(hand, board)
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from coalesce import SingleFlight, spot_key
+
+
+class SlowCount:
+    """A slow computation that counts how often, and from which threads, it runs."""
+
+    def __init__(self, seconds=0.2, error=None):
+        self.seconds = seconds
+        self.error = error
+        self.calls = 0
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            self.threads.add(threading.get_ident())
+        time.sleep(self.seconds)
+        if self.error is not None:
+            raise self.error
+        return {"win_percent": 42.0, "call": self.calls}
+
+
+def gather(flight, key, fn, n):
+    async def callers():
+        return await asyncio.gather(*[flight.do(key, fn) for _ in range(n)], return_exceptions=True)
+    return asyncio.run(callers())
+
+
+def test_slow_function_runs_once_for_concurrent_callers():
+    flight, fn = SingleFlight(window_ms=0), SlowCount()
+    results = gather(flight, "spot", fn, 20)
+    assert fn.calls == 1
+    assert threading.get_ident() not in fn.threads
+    assert results == [{"win_percent": 42.0, "call": 1}] * 20
+    assert all(r is results[0] for r in results)
+    assert flight.stats == {"computations": 1, "coalesced": 19, "window_hits": 0, "errors": 0}
+    assert flight.tasks == {}
+
+
+def test_different_keys_do_not_share():
+    flight, fn = SingleFlight(window_ms=0), SlowCount(seconds=0.05)
+
+    async def callers():
+        return await asyncio.gather(flight.do("a", fn), flight.do("b", fn), flight.do("a", fn))
+    asyncio.run(callers())
+    assert fn.calls == 2
+    assert flight.stats["computations"] == 2 and flight.stats["coalesced"] == 1
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    flight, fn = SingleFlight(window_ms=10000), SlowCount(error=RuntimeError("boom"))
+    results = gather(flight, "spot", fn, 5)
+    assert fn.calls == 1
+    assert all(isinstance(r, RuntimeError) and str(r) == "boom" for r in results)
+    assert flight.stats["errors"] == 1
+    assert flight.tasks == {}
+
+    fn.error = None
+    assert gather(flight, "spot", fn, 1) == [{"win_percent": 42.0, "call": 2}]
+
+
+def test_window_serves_finished_results_until_it_expires():
+    flight, fn = SingleFlight(window_ms=100), SlowCount(seconds=0.01)
+
+    async def sequence():
+        first = await flight.do("spot", fn)
+        hit = await flight.do("spot", fn)
+        await asyncio.sleep(0.2)
+        expired = await flight.do("spot", fn)
+        return first, hit, expired
+    first, hit, expired = asyncio.run(sequence())
+    assert hit is first
+    assert expired["call"] == 2
+    assert fn.calls == 2
+    assert flight.stats == {"computations": 2, "coalesced": 0, "window_hits": 1, "errors": 0}
+
+
+def test_snapshot_reports_savings():
+    flight, fn = SingleFlight(window_ms=0), SlowCount(seconds=0.05)
+    gather(flight, "spot", fn, 4)
+    snapshot = flight.snapshot()
+    assert snapshot["saved"] == 3
+    assert snapshot["saved_ratio"] == 0.75
+    assert snapshot["in_flight"] == 0
+    assert snapshot["window_ms"] == 0
+    assert SingleFlight().snapshot()["saved_ratio"] == 0.0
+
+
+@pytest.mark.parametrize("mode, same", [("exact", False), ("canonical", False), ("isomorphic", True)])
+def test_suit_relabeled_spots_share_only_isomorphic_keys(mode, same):
+    a = spot_key("Ah,Kh", "2h,7c,9d", mode=mode)
+    b = spot_key("Ks,As", "2s,7d,9c", mode=mode)
+    assert (a == b) is same
+    assert spot_key("Ah,Kh", "", mode="canonical") == spot_key("kh, ah", "", mode="canonical")
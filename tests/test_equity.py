@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from equity import equity_curve, sample_equity
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+
+SAMPLES = 20000
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)]
+
+
+@pytest.mark.parametrize("hand, board", [("As,Ac", ""), ("Jh,Th", "9h,8c,2d"), ("7s,7d", "Ks,Qd,7c,2h")])
+def test_curve_agrees_with_sampled_equity(hand, board):
+    curve = equity_curve(cards(hand), cards(board), 6, SAMPLES, np.random.default_rng(44))
+    for point in curve:
+        k = point["opponents"]
+        shares = sample_equity(cards(hand), cards(board), k, SAMPLES, np.random.default_rng(k))
+        # the two estimates are independent, so their difference has twice the variance
+        error = 4 * np.sqrt(2 * shares.var() / SAMPLES)
+        assert point["equity"] == pytest.approx(shares.mean(), abs=error)
+
+
+def test_aces_lose_equity_with_every_opponent():
+    curve = equity_curve(cards("As,Ac"), [], 9, SAMPLES, np.random.default_rng(1))
+    assert [p["opponents"] for p in curve] == list(range(1, 10))
+    equities = [p["equity"] for p in curve]
+    wins = [p["win"] for p in curve]
+    assert equities == sorted(equities, reverse=True)
+    assert wins == sorted(wins, reverse=True)
+    assert curve[0]["equity"] == pytest.approx(0.852, abs=0.01)
+    for p in curve:
+        assert p["win"] + p["tie"] + p["loss"] == pytest.approx(1.0)
+        assert p["win"] <= p["equity"] <= p["win"] + p["tie"]
@@ -0,0 +1,28 @@
+import itertools
+import random
+
+import table_store
+from eval_poker import Evaluator
+from five_card_table import CARDS_BY_INDEX, NUM_HANDS, colex_index, verify
+
+
+def test_colex_index_numbers_every_hand_once():
+    seen = set()
+    for combo in itertools.combinations(range(20), 5):
+        seen.add(colex_index(combo))
+    # the hands of the first n cards are exactly the first C(n, 5) indices
+    assert seen == set(range(len(seen)))
+    assert colex_index((47, 48, 49, 50, 51)) == NUM_HANDS - 1
+
+
+def test_table_matches_the_reference_evaluator_on_every_hand():
+    assert verify(table_store.attach("five_card_ranks")) == 0
+
+
+def test_array_mode_evaluates_like_the_default_on_six_and_seven_cards():
+    reference = Evaluator()
+    fast = Evaluator(reference.table, table_store.attach("five_card_ranks"))
+    rng = random.Random(3)
+    for n in (6, 7) * 500:
+        cards = rng.sample(CARDS_BY_INDEX, n)
+        assert fast.evaluate(cards[:2], cards[2:]) == reference.evaluate(cards[:2], cards[2:])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from board_ranks import rank_class
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+from hand_classes import class_probabilities
+from lookup import LookupTable
+from seven_card_dag import evaluate_batch
+from showdown import combinations_array
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)] if text else []
+
+
+def enumerated(hand, board):
+    live = np.array([c for c in range(52) if c not in hand + board])
+    runouts = live[combinations_array(len(live), 5 - len(board))]
+    known = np.tile(hand + board, (len(runouts), 1))
+    ranks = evaluate_batch(np.concatenate([known, runouts], axis=1))
+    counts = np.bincount([rank_class(int(r)) for r in ranks], minlength=len(LookupTable.RANK_CLASS_TO_STRING))
+    return {LookupTable.RANK_CLASS_TO_STRING[c]: round(n / len(runouts), 6) for c, n in enumerate(counts)}
+
+
+@pytest.mark.parametrize("hand, board", [
+    ("Ah,As", "Kd,7d,2d"),    # hearts and spades are interchangeable
+    ("Jc,Tc", "9c,8h,2s"),
+    ("5s,5d", "Qh,Qc,3d,9s"),
+    ("Ah,Kh", "2c,3c,4d,5s,9h"),
+])
+def test_matches_full_enumeration(hand, board):
+    result = class_probabilities(cards(hand), cards(board))
+    assert result["probabilities"] == enumerated(cards(hand), cards(board))
+
+
+def test_suit_symmetry_evaluates_fewer_runouts_preflop():
+    result = class_probabilities(cards("Ah,Kh"))
+    assert result["runouts"] == 2118760
+    assert result["evaluated"] < result["runouts"] / 4
+    assert sum(result["probabilities"].values()) == pytest.approx(1.0, abs=1e-5)
+    assert class_probabilities(cards("As,Ks"))["probabilities"] == result["probabilities"]
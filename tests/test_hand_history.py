@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+from hand_history import HandSplitter, Summary, analyze_hand, analyze_stream
+from showdown import showdown
+
+ALL_IN_PREFLOP = """\
+PokerStars Hand #1001: Hold'em No Limit ($0.05/$0.10 USD) - 2020/01/01 12:00:00 ET
+Table 'Alpha' 6-max Seat #1 is the button
+Seat 1: Alice ($10 in chips)
+Seat 2: Bob ($12.50 in chips)
+Seat 3: Carol ($8 in chips)
+Bob: posts small blind $0.05
+Carol: posts big blind $0.10
+*** HOLE CARDS ***
+Dealt to Alice [Ah Kd]
+Alice: raises $0.20 to $0.30
+Bob: folds
+Carol: raises $7.70 to $8 and is all-in
+Alice: calls $7.70
+*** FLOP *** [2c 7d Ts]
+*** TURN *** [2c 7d Ts] [Qh]
+*** RIVER *** [2c 7d Ts Qh] [3s]
+*** SHOW DOWN ***
+Carol: shows [Jh Jc] (a pair of Jacks)
+Alice: shows [Ah Kd] (high card Ace)
+Carol collected $15.55 from pot
+*** SUMMARY ***
+Total pot $16.05 | Rake $0.50
+Board [2c 7d Ts Qh 3s]
+"""
+
+OMAHA = """\
+PokerStars Hand #2001: Omaha Pot Limit ($0.05/$0.10 USD) - 2020/01/01 12:00:00 ET
+Seat 1: Alice ($10 in chips)
+Seat 2: Bob ($10 in chips)
+Bob: posts small blind $0.05
+Alice: posts big blind $0.10
+*** HOLE CARDS ***
+Bob: raises $0.20 to $0.30
+Alice: raises $9.70 to $10 and is all-in
+Bob: calls $9.70 and is all-in
+*** FLOP *** [2c 7d Ts]
+*** TURN *** [2c 7d Ts] [Qh]
+*** RIVER *** [2c 7d Ts Qh] [3s]
+*** SHOW DOWN ***
+Alice: shows [Ah Kd Ac Kc]
+Bob: shows [Jh Jc 9s 8s]
+Alice collected $20 from pot
+"""
+
+TRUNCATED = "PokerStars Hand #3001: Hold'em No Limit ($0.05/$0.10 USD) - 2020/01/01 12:00:00 ET"
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)]
+
+
+def test_all_in_hand_gets_nets_and_equity():
+    result = analyze_hand(ALL_IN_PREFLOP)
+    nets = {p["name"]: p["net"] for p in result["players"]}
+    assert nets == {"Alice": -8.0, "Bob": -0.05, "Carol": 7.55}
+    assert result["board"] == ["2c", "7d", "Ts", "Qh", "3s"]
+    assert [s["street"] for s in result["streets"]] == ["FLOP", "TURN", "RIVER"]
+
+    all_in = result["all_in"]
+    assert all_in["street"] == "PREFLOP"
+    # preflop has too many runouts to enumerate, so the analyzer samples them
+    expected = showdown([cards("Ah,Kd"), cards("Jh,Jc")])["players"]
+    assert all_in["equity"]["Alice"] == pytest.approx(expected[0]["equity"], abs=1.5)
+    assert all_in["luck"]["Alice"] == pytest.approx(-all_in["luck"]["Carol"], abs=0.02)
+
+
+def test_omaha_hand_is_analyzed_without_all_in_equity():
+    result = analyze_hand(OMAHA)
+    assert "error" not in result
+    assert result["all_in"] is None
+    assert {p["name"]: p["net"] for p in result["players"]} == {"Alice": 10.0, "Bob": -10.0}
+
+
+def test_truncated_hand_is_reported_as_an_error():
+    result = analyze_hand(TRUNCATED)
+    assert result["hand_id"] == "3001"
+    assert "error" in result
+
+
+def test_splitter_cuts_at_each_header():
+    splitter = HandSplitter(batch_hands=2)
+    batches = [b for line in (ALL_IN_PREFLOP + "\n\n" + OMAHA + TRUNCATED).splitlines(True)
+               for b in [splitter.feed(line)] if b]
+    batches.append(splitter.finish())
+    assert [len(b) for b in batches] == [2, 1]
+    assert batches[1][0] == TRUNCATED
+
+
+def test_parallel_stream_keeps_input_order():
+    text = "\n\n".join([ALL_IN_PREFLOP, OMAHA, TRUNCATED] * 30)
+    serial = list(analyze_stream(text.splitlines(True), workers=1))
+    parallel = list(analyze_stream(text.splitlines(True), workers=2))
+    assert serial == parallel
+    assert [r["hand_id"] for r in serial[:3]] == ["1001", "2001", "3001"]
+
+
+def test_summary_counts_errors_and_adjusts_all_ins():
+    summary = Summary()
+    for text in (ALL_IN_PREFLOP, TRUNCATED):
+        summary.add(analyze_hand(text))
+    totals = summary.to_dict()
+    assert totals["hands"] == 2 and totals["errors"] == 1
+    assert totals["players"]["Alice"]["net"] == -8.0
+    assert totals["players"]["Alice"]["adjusted_net"] == analyze_hand(ALL_IN_PREFLOP)["all_in"]["ev_net"]["Alice"]
+
+
+def test_endpoint_streams_ndjson_and_a_summary(client):
+    response = client.post("/hand_histories/", content="\n".join([ALL_IN_PREFLOP, OMAHA, TRUNCATED]))
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("hand_id") for line in lines[:3]] == ["1001", "2001", "3001"]
+    assert lines[-1]["summary"]["hands"] == 3
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+from heatmap import heatmap
+from holdings import CLASS_INDEX
+from range_equity import range_equity
+from ranges import parse_range
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)]
+
+
+def cell(result, label):
+    c = CLASS_INDEX[label]
+    return result["equity"][c // 13][c % 13]
+
+
+def test_classes_match_range_equity_on_the_river():
+    board = cards("2c,7d,Ts,Qh,3s")
+    opponent = parse_range("QQ+,AKs,TT")
+    result = heatmap(opponent, board)
+    assert result["exact"]
+    for label in ("AA", "KQs", "72o", "TT"):
+        expected = range_equity([parse_range(label), opponent], board)["equities"][0]
+        assert cell(result, label) == pytest.approx(expected * 100, abs=0.01)
+
+
+def test_workers_give_the_same_grid():
+    opponent = parse_range("22+,A2s+,KTo+")
+    board = cards("2c,7d,Ts")
+    assert heatmap(opponent, board, samples=100, seed=2, workers=2) == heatmap(opponent, board, samples=100, seed=2)
+
+
+def test_classes_without_combos_are_none():
+    result = heatmap(parse_range("KK,QQ"), cards("Ah,As,Ad,7c,2s"))
+    assert cell(result, "AA") is None
+    assert np.isfinite(cell(result, "KK"))
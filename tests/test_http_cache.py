@@ -0,0 +1,61 @@
+import http_cache
+
+PARAMS = {"my_hand": "Ah,Kh", "my_board_representation": "2h,7h,9c", "num_sims": 500, "n_other_players": 2}
+
+
+def test_etag_is_strong_and_depends_on_the_request():
+    tag = http_cache.etag("get_win_rate", 1, 2)
+    assert tag.startswith('"') and tag.endswith('"')
+    assert tag == http_cache.etag("get_win_rate", 1, 2)
+    assert tag != http_cache.etag("get_win_rate", 1, 3)
+
+
+def test_if_none_match_comparison():
+    tag = http_cache.etag("x")
+    assert http_cache.not_modified(tag, tag)
+    assert http_cache.not_modified('"other", W/' + tag, tag)
+    assert http_cache.not_modified("*", tag)
+    assert not http_cache.not_modified(None, tag)
+    assert not http_cache.not_modified('"other"', tag)
+
+
+def test_seeded_request_is_cacheable_and_revalidates(client):
+    first = client.get("/get_win_rate/", params={**PARAMS, "seed": 7})
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == http_cache.CACHEABLE
+    tag = first.headers["etag"]
+
+    # card order and case do not change the request
+    again = client.get("/get_win_rate/", params={**PARAMS, "my_hand": "kh,ah", "seed": 7},
+                       headers={"If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == tag
+    assert not again.content
+
+
+def test_unseeded_and_budgeted_requests_are_not_stored(client):
+    for extra in ({}, {"seed": 7, "time_budget_ms": 20}):
+        response = client.get("/get_win_rate/", params={**PARAMS, **extra})
+        assert response.headers["cache-control"] == http_cache.NO_STORE
+        assert "etag" not in response.headers
+
+
+def test_suit_relabeled_seeded_spots_get_their_own_tag(client):
+    hearts = client.get("/get_win_rate/", params={**PARAMS, "seed": 7})
+    spades = client.get("/get_win_rate/", params={**PARAMS, "my_hand": "As,Ks", "my_board_representation": "2s,7s,9c",
+                                                  "seed": 7})
+    assert hearts.headers["etag"] != spades.headers["etag"]
+    # a repeat of the same seeded spot gives the same body
+    assert client.get("/get_win_rate/", params={**PARAMS, "seed": 7}).json() == hearts.json()
+
+
+def test_seeded_requests_are_not_coalesced_across_suits(client, monkeypatch):
+    import coalesce
+
+    monkeypatch.setattr(coalesce, "KEY_MODE", "isomorphic")
+    monkeypatch.setattr(coalesce.win_rates, "window", 60.0)
+    params = {**PARAMS, "num_sims": 501, "seed": 11}
+    before = coalesce.win_rates.stats["computations"]
+    client.get("/get_win_rate/", params=params)
+    client.get("/get_win_rate/", params={**params, "my_hand": "As,Ks", "my_board_representation": "2s,7s,9c"})
+    assert coalesce.win_rates.stats["computations"] == before + 2
@@ -0,0 +1,81 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import icm as icm_module
+from icm import exact_equity, icm, icm_batch, sampled_equity
+
+
+def brute_force(stacks, payouts):
+    """
+    Malmuth-Harville over every finishing order.
+    """
+    equity = np.zeros(len(stacks))
+    for order in itertools.permutations(range(len(stacks))):
+        p, left = 1.0, float(sum(stacks))
+        for place, player in enumerate(order):
+            p *= stacks[player] / left
+            left -= stacks[player]
+        for place, player in enumerate(order[:len(payouts)]):
+            equity[player] += p * payouts[place]
+    return equity
+
+
+@pytest.mark.parametrize("stacks, payouts", [
+    ([5000, 3000, 2000], [50, 30, 20]),
+    ([10, 20, 30, 40, 50, 60], [100, 60, 40]),
+    ([7, 1, 1, 3, 9], [1]),
+    ([4, 8, 2, 6], [10, 5, 2, 1]),
+    ([3, 3], [70, 30, 10]),
+])
+def test_exact_matches_every_finishing_order(stacks, payouts):
+    assert np.allclose(exact_equity(stacks, payouts), brute_force(stacks, payouts[:len(stacks)]))
+
+
+def test_batch_rows_match_single_solves():
+    rng = np.random.default_rng(1)
+    vectors = [rng.integers(1, 100, size=6).tolist() for _ in range(100)] + [[1, 2, 3]]
+    results = icm_batch(vectors, [50, 30, 20])
+    for stacks, result in zip(vectors, results):
+        assert result["exact"]
+        assert result["equity"] == icm(stacks, [50, 30, 20])["equity"]
+
+
+def test_sampled_equity_is_within_its_interval():
+    stacks = [10, 20, 30, 40, 50, 60, 70]
+    payouts = [50, 30, 20]
+    mean, error = sampled_equity(stacks, payouts, samples=40000, rng=np.random.default_rng(3))
+    exact = exact_equity(stacks, payouts)
+    assert (np.abs(mean - exact) <= 2 * error).all()
+    assert mean.sum() == pytest.approx(100)
+
+
+def test_sampling_in_chunks_does_not_change_the_estimate(monkeypatch):
+    stacks = list(range(1, 21))
+    whole = sampled_equity(stacks, [50, 30, 20], samples=5000, rng=np.random.default_rng(7))
+    monkeypatch.setattr(icm_module, "CHUNK_CELLS", 20 * 333)
+    chunked = sampled_equity(stacks, [50, 30, 20], samples=5000, rng=np.random.default_rng(7))
+    # different chunk shapes draw the same numbers in the same order
+    assert np.allclose(whole[0], chunked[0]) and np.allclose(whole[1], chunked[1])
+
+
+def test_large_fields_are_sampled_and_capped():
+    result = icm([1] * 20, [50, 30, 20], samples=2000, seed=1)
+    assert not result["exact"] and result["samples"] == 2000
+    with pytest.raises(ValueError):
+        icm([1] * 1000, [1], samples=icm_module.MAX_SAMPLED_CELLS)
+
+
+def test_more_payouts_than_players_reports_the_places_paid():
+    result = icm([3, 3], [70, 30, 10])
+    assert result["places_paid"] == 2
+    assert result["equity"] == [50.0, 50.0]
+
+
+def test_endpoints_reject_bad_input(client):
+    assert client.get("/icm/", params={"stacks": "10,-1", "payouts": "50,30"}).status_code == 422
+    assert client.get("/icm/", params={"stacks": "10,x", "payouts": "50,30"}).status_code == 422
+    response = client.post("/icm/batch/", json={"stacks": [[10, 20], [5, 5, 5]], "payouts": [60, 40]})
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
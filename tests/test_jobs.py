@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+import pytest
+
+import jobs
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+
+
+def spot(hand, board="", n_other_players=1, num_sims=1000, seed=1):
+    return {"hand": [CARD_INDEX[c] for c in parse_cards(hand)],
+            "board": [CARD_INDEX[c] for c in parse_cards(board)],
+            "n_other_players": n_other_players, "num_sims": num_sims, "seed": seed}
+
+
+@pytest.fixture
+def queued(tmp_path, monkeypatch):
+    """A JobManager whose pool never starts, so jobs stay where submit puts them."""
+    monkeypatch.setattr(jobs.JobManager, "_start", lambda self: None)
+    return jobs.JobManager(job_dir=str(tmp_path))
+
+
+def wait_for(manager, job_id, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        state = manager.get(job_id)
+        if state["status"] in jobs.FINISHED:
+            return state
+        time.sleep(0.05)
+    raise AssertionError("job {} did not finish".format(job_id))
+
+
+def test_submitted_job_runs_to_a_result(tmp_path):
+    manager = jobs.JobManager(workers=1, job_dir=str(tmp_path))
+    try:
+        job = manager.submit("simulation", spot("As,Ac", num_sims=3000), priority=1)
+        assert job["status"] == jobs.QUEUED
+        state = wait_for(manager, job["job_id"])
+    finally:
+        manager.pool.shutdown()
+    assert state["status"] == jobs.DONE
+    assert state["trials"] == 3000
+    assert state["progress"] == 1.0
+    assert state["win_percent"] == pytest.approx(85.2, abs=3)
+    assert state["ci95"] > 0
+
+
+def test_state_is_persisted_for_other_workers(queued, tmp_path):
+    job = queued.submit("simulation", spot("Kd,Qd", "Jd,Td,2c"))
+    with open(os.path.join(str(tmp_path), job["job_id"] + ".json")) as f:
+        assert json.load(f) == job
+    assert jobs.JobManager(job_dir=str(tmp_path)).get(job["job_id"]) == job
+
+
+def test_highest_priority_then_oldest_job_is_next(queued):
+    low = queued.submit("simulation", spot("2c,3d"), priority=10)
+    urgent = queued.submit("simulation", spot("As,Ks"), priority=1)
+    also_urgent = queued.submit("simulation", spot("Qh,Qs"), priority=1)
+    order = []
+    while True:
+        job = queued._next_job()
+        if job is None:
+            break
+        order.append(job.id)
+        job.next_chunk = job.chunks
+    assert order == [urgent["job_id"], also_urgent["job_id"], low["job_id"]]
+
+
+def test_cancel_by_the_owner(queued):
+    job = queued.submit("simulation", spot("As,Ks"))
+    assert queued.cancel(job["job_id"])["status"] == jobs.CANCELLED
+    assert queued._next_job() is None
+    assert queued.get(job["job_id"])["status"] == jobs.CANCELLED
+
+
+def test_cancel_from_another_worker_leaves_a_marker(queued, tmp_path):
+    job = queued.submit("simulation", spot("As,Ks"))
+    other = jobs.JobManager(job_dir=str(tmp_path))
+    assert other.cancel(job["job_id"])["status"] == jobs.QUEUED
+    assert os.path.exists(os.path.join(str(tmp_path), job["job_id"] + ".cancel"))
+    assert queued._next_job() is None
+    assert other.get(job["job_id"])["status"] == jobs.CANCELLED
+
+
+def test_finished_jobs_are_evicted_but_still_answered(queued):
+    old = queued.submit("simulation", spot("As,Ks"))
+    queued.cancel(old["job_id"])
+    queued.jobs[old["job_id"]].finished -= jobs.FINISHED_TTL + 1
+    fresh = queued.submit("simulation", spot("Qh,Qs"))
+    assert old["job_id"] not in queued.jobs
+    assert fresh["job_id"] in queued.jobs
+    assert queued.get(old["job_id"])["status"] == jobs.CANCELLED
+    assert queued._next_job().id == fresh["job_id"]
+
+
+@pytest.mark.parametrize("job_id", ["..", "../jobs", "ABCDEF01" * 4, "0" * 31, "0" * 33, "g" * 32])
+def test_ids_that_are_not_hex_tokens_are_not_looked_up(queued, tmp_path, job_id):
+    with open(os.path.join(str(tmp_path), job_id.replace("/", "_") + ".json"), "w") as f:
+        json.dump({"status": jobs.DONE}, f)
+    assert queued.get(job_id) is None
+    assert queued.cancel(job_id) is None
+
+
+def test_endpoints_404_on_a_bad_job_id(client):
+    assert client.get("/jobs/not-a-job").status_code == 404
+    assert client.delete("/jobs/..%2E").status_code == 404
@@ -0,0 +1,46 @@
+import json
+import random
+import sys
+
+import pytest
+
+import loadtest
+
+
+def test_percentiles_are_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert [loadtest.percentile(values, p) for p in (0, 1, 50, 95, 99, 100)] == [1, 1, 50, 95, 99, 100]
+    assert [loadtest.percentile([1.0, 2.0, 3.0], p) for p in (50, 67, 99)] == [2, 3, 3]
+    assert loadtest.percentile([], 99) == 0.0
+
+
+def test_summary_in_milliseconds():
+    summary = loadtest.summarize([0.001 * i for i in range(1, 101)], errors=5, elapsed=2.0)
+    assert summary["requests"] == 100
+    assert summary["error_rate"] == 0.05
+    assert summary["throughput_rps"] == 50.0
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]) == (50, 95, 99, 100)
+    assert loadtest.summarize([], 0, 0.0)["throughput_rps"] == 0.0
+
+
+@pytest.mark.parametrize("scenario", [n for _, n in loadtest.DEFAULT_MIX])
+def test_every_scenario_is_a_valid_request(client, scenario):
+    rng = random.Random(30)
+    for _ in range(5):
+        endpoint, path = loadtest.make_request(scenario, rng)
+        assert path.startswith(endpoint + "?")
+        response = client.get(path)
+        assert response.status_code == 200, response.text
+
+
+def test_in_process_run_writes_a_report(tmp_path, monkeypatch):
+    out = tmp_path / "report.json"
+    monkeypatch.setattr(sys, "argv", ["loadtest.py", "--in-process", "--duration", "1", "--concurrency", "2",
+                                      "--mix", "pot_odds=1,implied_odds=1", "--out", str(out)])
+    loadtest.main()
+    report = json.loads(out.read_text())
+    assert report["config"]["target"] == "in-process"
+    assert report["overall"]["requests"] > 0
+    assert report["overall"]["errors"] == 0
+    assert set(report["endpoints"]) <= {"/pot_odds/", "/implied_odds/"}
+    assert report["overall"]["p50_ms"] <= report["overall"]["p99_ms"] <= report["overall"]["max_ms"]
@@ -0,0 +1,56 @@
+import time
+
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+from mcts import CHECK_EVERY, MIN_ROOT_VISITS, _recommend, recommend_action
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)]
+
+
+def action(name, visits, ev, amount=0.0):
+    return {"action": name, "amount": amount, "visits": visits, "ev": ev}
+
+
+def test_shallow_search_never_recommends_losing_chips_over_folding():
+    actions = [action("raise", 3, -14.97, 20.0), action("fold", 3, 0.0), action("call", 2, -2.0, 10.0)]
+    assert _recommend(actions, 8, to_call=10.0)["action"] == "fold"
+
+
+def test_shallow_search_recommends_the_best_ev():
+    actions = [action("raise", 3, 1.0, 20.0), action("call", 3, 4.0, 10.0), action("fold", 2, 0.0)]
+    assert _recommend(actions, 8, to_call=10.0)["action"] == "call"
+
+
+def test_deep_search_recommends_the_most_visited():
+    actions = [action("raise", 900, 1.0, 20.0), action("call", 100, 4.0, 10.0)]
+    assert _recommend(actions, MIN_ROOT_VISITS, to_call=10.0)["action"] == "raise"
+
+
+def test_recommendation_is_one_of_the_searched_actions():
+    result = recommend_action(cards("As,Ac"), cards("Ah,Kd,2s"), pot=30, stack=100, to_call=10,
+                              time_budget_ms=100, seed=1)
+    assert result["iterations"] > 0
+    assert result["recommendation"] in result["actions"] or result["recommendation"]["action"] == "fold"
+    visits = [(a["visits"], a["ev"]) for a in result["actions"]]
+    assert visits == sorted(visits, reverse=True)
+    # top set facing a bet: folding is never best
+    assert result["recommendation"]["action"] != "fold"
+
+
+def test_small_budget_is_not_overrun_by_a_batch():
+    recommend_action(cards("As,Ac"), cards("Ah,Kd,2s"), pot=30, stack=100, to_call=10,
+                     n_opponents=9, time_budget_ms=1, seed=2)
+    start = time.perf_counter()
+    result = recommend_action(cards("As,Ac"), cards("Ah,Kd,2s"), pot=30, stack=100, to_call=10,
+                              n_opponents=9, time_budget_ms=1, seed=3)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert 1 <= result["iterations"] < CHECK_EVERY
+    assert elapsed_ms < 5
+
+
+def test_endpoint_rejects_bad_raise_sizes(client):
+    for sizes in ("-1", "0,1", "abc", "nan", ""):
+        response = client.get("/recommend_action/", params={"my_hand": "As,Ac", "raise_sizes": sizes})
+        assert response.status_code == 422, sizes
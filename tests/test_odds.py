@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+
+from odds import check_chance, grid, implied_odds, parse_axis, pot_odds
+
+
+def test_parse_axis_forms():
+    assert parse_axis("10,20,30", "x").tolist() == [10, 20, 30]
+    assert parse_axis("5", "x").tolist() == [5]
+    assert parse_axis("0:1:0.25", "x").tolist() == [0, 0.25, 0.5, 0.75, 1]
+
+
+@pytest.mark.parametrize("text", ["nan", "1,inf", "0:inf:1", "0:10:nan", "-inf:0:1", "1:0:1", "0:1:0", "a,b", ""])
+def test_parse_axis_rejects(text):
+    with pytest.raises(ValueError):
+        parse_axis(text, "x")
+
+
+def test_grid_matches_the_scalar_formulas():
+    axes = {"chance_percent": parse_axis("10:50:10", "c"), "current_pot": parse_axis("1,5", "p"),
+            "amount_to_call": parse_axis("0:3:1", "a")}
+    values = grid(implied_odds, axes)
+    assert values.shape == (5, 2, 4)
+    for i, c in enumerate(axes["chance_percent"]):
+        for j, p in enumerate(axes["current_pot"]):
+            for k, a in enumerate(axes["amount_to_call"]):
+                assert values[i, j, k] == pytest.approx(a / (c / 100) - (p + a))
+
+
+def test_unbounded_odds_are_inf_and_nan():
+    assert math.isinf(pot_odds(1.0, 0.0))
+    assert math.isinf(implied_odds(0, 1.0, 1.0))
+    assert math.isnan(pot_odds(0.0, 0.0))
+
+
+def test_check_chance():
+    check_chance(np.array([0, 50, 100]))
+    for bad in (-1, 101, np.nan):
+        with pytest.raises(ValueError):
+            check_chance(bad)
+
+
+@pytest.mark.parametrize("url", [
+    "/pot_odds/grid/?bet=nan",
+    "/pot_odds/grid/?bet=0:inf:1",
+    "/implied_odds/grid/?chance_percent=nan",
+    "/implied_odds/grid/?chance_percent=-5",
+    "/implied_odds/grid/?chance_percent=0:150:50&format=binary",
+    "/implied_odds/grid/?chance_percent=101&format=xml",
+    "/implied_odds/?chance_percent=-5",
+    "/implied_odds/?chance_percent=101",
+    "/pot_odds/grid/?format=xml",
+])
+def test_endpoints_reject_bad_input(client, url):
+    assert client.get(url).status_code == 422
+
+
+def test_binary_grid_and_exposed_headers(client):
+    response = client.get("/pot_odds/grid/", params={"current_pot": "1,2", "bet": "0:2:1", "format": "binary"},
+                          headers={"Origin": "http://localhost"})
+    assert response.status_code == 200
+    assert response.headers["x-grid-axes"] == "current_pot,bet"
+    assert response.headers["x-grid-shape"] == "2,3"
+    assert "X-Grid-Shape" in response.headers["access-control-expose-headers"]
+    values = np.frombuffer(response.content, dtype="<f8").reshape(2, 3)
+    assert np.isinf(values[:, 0]).all()
+    assert values[1, 2] == pytest.approx(2.0)
+
+
+def test_json_grid_uses_null_for_unbounded(client):
+    body = client.get("/pot_odds/grid/", params={"bet": "0,1"}).json()
+    assert body["shape"] == [1, 2]
+    assert body["values"] == [None, 2.0]
@@ -0,0 +1,39 @@
+import numpy as np
+
+from board_ranks import rank_all_holdings, rank_class
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+from holdings import blocked, holding_index
+from lookup import LookupTable
+from outs import outs
+from seven_card_dag import evaluate_batch
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)]
+
+
+def heads_up_river_equity(hand, board):
+    ranks = rank_all_holdings(board, cache=False).ranks
+    mine = ranks[holding_index(*hand)]
+    theirs = ranks[~blocked(list(hand) + list(board))]
+    return ((theirs > mine).sum() + 0.5 * (theirs == mine).sum()) / len(theirs)
+
+
+def test_flush_draw_has_nine_flush_outs():
+    result = outs(cards("Ah,Kh"), cards("2h,7h,9c"), seed=1)
+    assert result["outs"]["Flush"]["count"] == 9
+    assert all(c.endswith("h") for c in result["outs"]["Flush"]["cards"])
+
+
+def test_turn_card_equity_and_class_match_direct_evaluation():
+    hand, board = cards("Jd,Td"), cards("9d,8s,2c,Kd")
+    result = outs(hand, board, seed=1)
+    assert len(result["cards"]) == 46
+    for entry in result["cards"]:
+        river = board + cards(entry["card"])
+        rank = int(evaluate_batch(np.array([hand + river]))[0])
+        assert entry["rank"] == rank
+        assert entry["hand_class"] == LookupTable.RANK_CLASS_TO_STRING[rank_class(rank)]
+        assert entry["equity"] == round(heads_up_river_equity(hand, river) * 100, 2)
+    assert result["total_outs"] == sum(group["count"] for group in result["outs"].values())
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import preflop_equity
+import table_store
+from holdings import CLASS_LABELS, NUM_CLASSES
+
+
+@pytest.fixture
+def simulated(tmp_path, monkeypatch):
+    """A 40 board simulation in place of the cached one, stored in an empty directory."""
+    table_store.load_builders()
+    monkeypatch.setattr(table_store, "TABLE_DIR", str(tmp_path))
+    monkeypatch.setattr(table_store, "_attached", {})
+    monkeypatch.setattr(preflop_equity, "_simulated", preflop_equity.simulate(boards=40))
+    monkeypatch.setattr(preflop_equity, "_tables", None)
+    return preflop_equity._simulated
+
+
+def test_class_tables_read_back_the_simulation(simulated):
+    for name in ("preflop_equity", "preflop_pairs"):
+        table_store.build(name, force=True)
+
+    equity, pairs = preflop_equity.class_tables()
+    assert equity.shape == pairs.shape == (NUM_CLASSES, NUM_CLASSES)
+    assert equity.dtype == np.float32 and pairs.dtype == np.uint16
+    np.testing.assert_array_equal(equity, simulated[0].astype(np.float32))
+    np.testing.assert_array_equal(pairs, simulated[1])
+    assert preflop_equity.class_tables() is preflop_equity.class_tables()
+
+
+def test_simulated_equity_is_zero_sum(simulated):
+    equity, pairs = simulated
+    assert np.allclose(equity + equity.T, 1.0)
+    assert (pairs == pairs.T).all()
+    # AA and KK share no cards: 6 * 6 combo pairs; AKs blocks 3 combos of each ace
+    aa, kk, aks = (CLASS_LABELS.index(c) for c in ("AA", "KK", "AKs"))
+    assert pairs[aa, kk] == 36
+    assert pairs[aa, aks] == 12
+    assert equity[aa, kk] > 0.7
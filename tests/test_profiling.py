@@ -0,0 +1,59 @@
+import os
+import pstats
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def tokens(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKENS", frozenset(["s3cret"]))
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_only_listed_tokens_are_allowed(tokens):
+    assert profiling.allowed("s3cret")
+    for token in (None, "", "S3CRET", "s3cret,other"):
+        assert not profiling.allowed(token)
+
+
+def test_nothing_is_allowed_without_configured_tokens(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKENS", frozenset())
+    assert not profiling.allowed("")
+    assert not profiling.allowed("anything")
+
+
+def test_profile_writes_a_pstats_trace(tokens):
+    def hot():
+        return sum(i * i for i in range(20000))
+
+    with profiling.profile("unit") as report:
+        hot()
+    assert os.path.dirname(report["trace"]) == str(tokens)
+    assert os.path.basename(report["trace"]).startswith("unit-")
+    assert report["wall_time"] >= 0
+    assert any("hot" in row["function"] for row in report["top_functions"])
+    assert len(report["top_functions"]) <= profiling.TOP_N
+    cumtimes = [row["cumtime"] for row in report["top_functions"]]
+    assert cumtimes == sorted(cumtimes, reverse=True)
+    assert pstats.Stats(report["trace"]).total_calls > 0
+
+
+def test_endpoint_profiles_only_with_an_allowed_header(client, tokens):
+    url = "/get_win_rate/?my_hand=Ah,Kh&my_board_representation=2c,7d,9s&num_sims=200&seed=3"
+    plain = client.get(url)
+    assert "profile" not in plain.json()
+    assert "ETag" in plain.headers
+    assert client.get(url, headers={"X-RS-Profile": "wrong"}).json() == plain.json()
+    assert list(tokens.iterdir()) == []
+
+    profiled = client.get(url, headers={"X-RS-Profile": "s3cret"})
+    body = profiled.json()
+    assert body["win_percent"] == plain.json()["win_percent"]
+    assert "ETag" not in profiled.headers
+    assert profiled.headers["Cache-Control"] == "no-store"
+    assert os.path.exists(body["profile"]["trace"])
+    functions = " ".join(row["function"] for row in body["profile"]["top_functions"])
+    assert "simulate_win_percent" in functions
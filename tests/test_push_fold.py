@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import preflop_equity
+import push_fold
+from holdings import CLASS_LABELS, NUM_HOLDINGS
+
+
+@pytest.fixture(scope="module")
+def matrices():
+    """_Matrices over a 300 board equity table, instead of the stored one."""
+    equity, pairs = preflop_equity.simulate(boards=300)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(push_fold, "class_tables", lambda: (equity.astype(np.float32), pairs))
+        yield push_fold._Matrices()
+
+
+def combo_share(freqs):
+    return float((freqs * push_fold.CLASS_COMBOS).sum() / NUM_HOLDINGS)
+
+
+def test_heads_up_10bb_matches_the_known_equilibrium(matrices):
+    push, (call,) = push_fold.solve(2, 0, stacks=[10], matrices=matrices)
+    assert combo_share(push[0]) == pytest.approx(0.57, abs=0.03)
+    assert combo_share(call[0]) == pytest.approx(0.37, abs=0.03)
+
+    aces, seven_deuce = CLASS_LABELS.index("AA"), CLASS_LABELS.index("72o")
+    assert push[0][aces] > 0.99
+    assert call[0][aces] > 0.99
+    assert call[0][seven_deuce] < 0.01
+
+
+def test_shorter_stacks_push_and_call_wider(matrices):
+    push, (call,) = push_fold.solve(2, 0, stacks=[5, 10, 20], matrices=matrices)
+    pushes = [combo_share(p) for p in push]
+    calls = [combo_share(c) for c in call]
+    assert pushes == sorted(pushes, reverse=True)
+    assert calls == sorted(calls, reverse=True)
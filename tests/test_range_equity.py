@@ -0,0 +1,65 @@
+import numpy as np
+
+from board_ranks import rank_all_holdings
+from holdings import HOLDING_CARDS, NUM_HOLDINGS
+from range_equity import holding_totals, range_equity
+from ranges import parse_range
+
+
+def brute_force_equity(w1, w2, boards):
+    won = weight = 0.0
+    for board in boards:
+        ranks = rank_all_holdings(board, cache=False).ranks.astype(np.int64)
+        for i in np.flatnonzero(w1):
+            for j in np.flatnonzero(w2):
+                cards = set(HOLDING_CARDS[i]) | set(HOLDING_CARDS[j])
+                if len(cards) < 4 or cards & set(board):
+                    continue
+                w = w1[i] * w2[j]
+                won += w * (1.0 if ranks[i] < ranks[j] else 0.5 if ranks[i] == ranks[j] else 0.0)
+                weight += w
+    return won / weight
+
+
+def test_holding_totals_match_pairwise_comparison():
+    board = (3, 14, 27, 38, 49)
+    ranks = rank_all_holdings(board).ranks.astype(np.int64)
+    rng = np.random.default_rng(4)
+    w2 = rng.random(NUM_HOLDINGS) * (rng.random(NUM_HOLDINGS) < 0.3)
+    w2[ranks == ranks.max()] = 0
+    ours = np.flatnonzero(ranks != ranks.max())[::11]
+    won, total = holding_totals(ranks, ours, w2)
+    for k, i in enumerate(ours):
+        expected_won = expected_total = 0.0
+        for j in np.flatnonzero(w2):
+            if set(HOLDING_CARDS[i]) & set(HOLDING_CARDS[j]):
+                continue
+            expected_total += w2[j]
+            expected_won += w2[j] * (1.0 if ranks[i] < ranks[j] else 0.5 if ranks[i] == ranks[j] else 0.0)
+        assert np.isclose(won[k], expected_won)
+        assert np.isclose(total[k], expected_total)
+
+
+def test_river_equity_matches_brute_force():
+    w1, w2 = parse_range("QQ+,AKs"), parse_range("TT-88,AQo:0.5")
+    board = (0, 13, 26, 39, 51)
+    result = range_equity([w1, w2], board)
+    assert result["exact"]
+    assert np.isclose(result["equities"][0], brute_force_equity(w1, w2, [board]))
+    assert np.isclose(sum(result["equities"]), 1.0)
+
+
+def test_turn_equity_enumerates_every_river():
+    w1, w2 = parse_range("AA"), parse_range("KK,QQ")
+    turn = (1, 10, 22, 33)
+    rivers = [turn + (c,) for c in range(52) if c not in turn]
+    result = range_equity([w1, w2], turn)
+    assert result["exact"] and result["boards"] == len(rivers)
+    assert np.isclose(result["equities"][0], brute_force_equity(w1, w2, rivers))
+
+
+def test_multiway_equities_sum_to_one():
+    weights = [parse_range("AA,KK"), parse_range("AKs,AQs"), parse_range("77,66")]
+    result = range_equity(weights, (), samples=2000, seed=3)
+    assert np.isclose(sum(result["equities"]), 1.0)
+    assert result["equities"][0] > max(result["equities"][1:])
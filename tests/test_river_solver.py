@@ -0,0 +1,58 @@
+import pytest
+
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+from ranges import parse_range
+from river_solver import RiverSolver, solve_spot
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)]
+
+
+def test_polarized_toy_game_reaches_the_known_equilibrium():
+    # OOP: top set or air, half each by weight; IP: a bluff catcher; one pot-sized bet, no raises.
+    # OOP bets all value and half its air, IP calls half the time, and OOP's EV is 3/4 of the pot.
+    result = solve_spot(cards("2s,7h,9d,Jc,Kh"), parse_range("KK,54s:0.75"), parse_range("QQ"), pot=1.0, stack=1.0,
+                        bet_sizes=(1.0,), max_raises=0, iterations=2000, target_exploitability=0.001)
+    assert result["ev"]["OOP"] == pytest.approx(0.75, abs=0.005)
+    assert result["ev"]["OOP"] + result["ev"]["IP"] == pytest.approx(1.0)
+    root, _, _, facing_bet = result["nodes"]
+    assert root["classes"]["KK"][1] == pytest.approx(1.0, abs=0.01)
+    assert root["classes"]["54s"][1] == pytest.approx(0.5, abs=0.02)
+    assert facing_bet["frequencies"][1] == pytest.approx(0.5, abs=0.02)
+
+
+def test_exploitability_falls_with_more_iterations():
+    board = cards("Ah,Td,7c,4s,2h")
+    w_oop, w_ip = parse_range("22+,ATs+,KQs,AJo+"), parse_range("55+,A9s+,KTs+,QJs,ATo+")
+    exploitabilities = []
+    for iterations in (10, 100, 400):
+        solver = RiverSolver(board, w_oop, w_ip, stack=2.0)
+        exploitabilities.append(solver.solve(iterations, target=0.0)[1])
+    assert exploitabilities == sorted(exploitabilities, reverse=True)
+    assert exploitabilities[-1] >= 0
+
+
+def test_suit_isomorphic_spots_share_a_solution():
+    ranges = parse_range("QQ+,AK"), parse_range("JJ-99,AQs")
+    first = solve_spot(cards("Ah,Td,7c,4s,2h"), *ranges, pot=10.0, stack=20.0, iterations=50)
+    # hearts and diamonds swapped, everything in chips doubled
+    second = solve_spot(cards("Ad,Th,7c,4s,2d"), *ranges, pot=20.0, stack=40.0, iterations=50)
+    assert second["cached"]
+    assert second["ev"]["OOP"] == pytest.approx(2 * first["ev"]["OOP"], abs=1e-3)
+
+
+def test_time_budget_stops_a_large_tree():
+    result = solve_spot(cards("Ks,8d,5c,3h,2s"), parse_range("22+,A2s+,K9s+,ATo+"), parse_range("22+,A2s+,K9s+,ATo+"),
+                        pot=1.0, stack=20.0, bet_sizes=(0.33, 0.75, 1.5, 3.0), max_raises=3, iterations=5000,
+                        target_exploitability=0.0, time_budget_ms=200)
+    assert result["out_of_time"]
+    assert result["iterations"] < 5000
+
+
+def test_endpoint_validates_the_budget_and_sizes(client):
+    params = {"oop_range": "QQ+", "ip_range": "JJ-99", "my_board_representation": "Ah,Td,7c,4s,2h"}
+    assert client.get("/river_solver/", params={**params, "time_budget_ms": 0}).status_code == 422
+    assert client.get("/river_solver/", params={**params, "bet_sizes": "0,1"}).status_code == 422
+    assert client.get("/river_solver/", params={**params, "iterations": 10}).status_code == 200
@@ -0,0 +1,52 @@
+import pytest
+
+from eval_poker import simulate_win_percent
+from sampling import SAMPLING_MODES, radical_inverse
+
+
+def win_percent(board, hand, num_sims, **kwargs):
+    return simulate_win_percent(board, hand, num_sims, decimal_places=2, **kwargs)
+
+
+def test_radical_inverse():
+    assert [radical_inverse(i, 2) for i in range(1, 5)] == [0.5, 0.25, 0.75, 0.125]
+
+
+@pytest.mark.parametrize("sampling", SAMPLING_MODES)
+def test_every_mode_is_reproducible_and_close(sampling):
+    # AKs against one random hand wins about two thirds of the time
+    first = win_percent(None, ["Ah", "Kh"], 3000, n_other_players=1, sampling=sampling, seed=5)
+    assert first == win_percent(None, ["Ah", "Kh"], 3000, n_other_players=1, sampling=sampling, seed=5)
+    assert first == pytest.approx(66, abs=4)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        win_percent(None, ["Ah", "Kh"], 10, sampling="sobol")
+
+
+def test_time_budget_reports_sims_and_interval():
+    result = win_percent(None, ["Ah", "Kh"], None, n_other_players=2, time_budget_ms=50, seed=1)
+    assert result["num_sims"] > 0
+    assert 0 < result["ci95"] < 100
+
+
+def test_default_decimal_places_returns_a_fraction():
+    fraction = simulate_win_percent(None, ["Ah", "Kh"], 500, n_other_players=1, seed=5)
+    assert 0 < fraction < 1
+    result = simulate_win_percent(None, ["Ah", "Kh"], None, n_other_players=1, time_budget_ms=20, seed=5)
+    assert 0 < result["win_percent"] < 1
+    assert 0 < result["ci95"] < 1
+
+
+@pytest.mark.parametrize("time_budget_ms", [None, 20])
+def test_no_sims_is_rejected(time_budget_ms):
+    with pytest.raises(ValueError, match="num_sims"):
+        win_percent(None, ["Ah", "Kh"], 0, time_budget_ms=time_budget_ms)
+
+
+@pytest.mark.parametrize("query", ["num_sims=0", "num_sims=-5", "num_sims=0&time_budget_ms=20"])
+def test_endpoint_rejects_no_sims(client, query):
+    response = client.get("/get_win_rate/?my_hand=Ah,Kh&" + query)
+    assert response.status_code == 422
+    assert "num_sims" in response.json()["detail"]
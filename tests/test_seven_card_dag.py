@@ -0,0 +1,38 @@
+import itertools
+
+import numpy as np
+
+from card import Card
+from eval_poker import Evaluator
+from five_card_table import CARDS_BY_INDEX
+from seven_card_dag import DagEvaluator, evaluate_batch, verify
+
+
+def test_dag_and_batch_match_the_reference_evaluator():
+    assert verify(2000, seed=1) == 0
+
+
+def test_batch_is_the_best_five_card_subset():
+    reference = Evaluator()
+    rng = np.random.default_rng(5)
+    hands = np.array([rng.choice(52, size=7, replace=False) for _ in range(300)])
+    expected = [
+        min(reference._five([CARDS_BY_INDEX[c] for c in five]) for five in itertools.combinations(hand, 5))
+        for hand in hands
+    ]
+    assert evaluate_batch(hands).tolist() == expected
+
+
+def test_batch_does_not_depend_on_card_order():
+    rng = np.random.default_rng(6)
+    hands = np.array([rng.choice(52, size=7, replace=False) for _ in range(500)])
+    shuffled = rng.permuted(hands, axis=1)
+    assert (evaluate_batch(hands) == evaluate_batch(shuffled)).all()
+
+
+def test_straight_flush_beats_quads_on_the_same_board():
+    dag = DagEvaluator()
+    board = [Card.new(c) for c in ("9h", "Th", "Jh", "9s", "9d")]
+    straight_flush = dag.evaluate([Card.new("Qh"), Card.new("Kh")], board)
+    quads = dag.evaluate([Card.new("9c"), Card.new("2c")], board)
+    assert straight_flush < quads
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import showdown as showdown_module
+from eval_poker import parse_cards
+from five_card_table import CARD_INDEX
+from seven_card_dag import evaluate_batch
+from showdown import combinations_array, showdown
+
+
+def cards(text):
+    return [CARD_INDEX[c] for c in parse_cards(text)] if text else []
+
+
+def brute_force(hands, board):
+    dead = [c for hand in hands for c in hand] + board
+    live = np.array([c for c in range(52) if c not in dead])
+    runouts = live[combinations_array(len(live), 5 - len(board))]
+    ranks = np.array([
+        evaluate_batch(np.concatenate([np.tile(hand + board, (len(runouts), 1)), runouts], axis=1))
+        for hand in hands
+    ])
+    winners = ranks == ranks.min(axis=0)
+    split = winners.sum(axis=0)
+    return [100 * float((w / split).sum()) / len(runouts) for w in winners]
+
+
+def test_combinations_array_lists_every_subset_once():
+    rows = combinations_array(7, 3)
+    assert len(rows) == 35
+    assert len({tuple(r) for r in rows.tolist()}) == 35
+    assert (np.diff(rows, axis=1) > 0).all()
+
+
+@pytest.mark.parametrize("hands, board", [
+    (["Ah,Kh", "Qs,Qd"], "Jh,7c,2h"),
+    (["As,Ad", "Ks,Kd", "8c,9c"], "Tc,Jd,2s"),
+    (["5s,5d", "6h,7h"], "8h,9s,Kd,2c"),
+])
+def test_equity_matches_brute_force(hands, board):
+    hands = [cards(h) for h in hands]
+    result = showdown(hands, cards(board))
+    assert result["exact"]
+    expected = brute_force(hands, cards(board))
+    assert [p["equity"] for p in result["players"]] == [round(e, 4) for e in expected]
+
+
+def test_chunks_do_not_change_the_result(monkeypatch):
+    hands = [cards("Ah,Ad"), cards("Kc,Kd"), cards("7s,8s")]
+    exact = showdown(hands, cards("2h"))
+    sampled = showdown(hands, (), max_runouts=0, samples=5000, seed=9)
+    monkeypatch.setattr(showdown_module, "CHUNK_RUNOUTS", 1000)
+    assert showdown(hands, cards("2h")) == exact
+    assert showdown(hands, (), max_runouts=0, samples=5000, seed=9) == sampled
+
+
+def test_preflop_aces_against_kings():
+    result = showdown([cards("Ah,As"), cards("Kh,Ks")])
+    assert result["runouts"] == 1712304
+    assert result["players"][0]["equity"] == pytest.approx(82.64, abs=0.05)
+    assert result["players"][0]["equity"] + result["players"][1]["equity"] == pytest.approx(100)
+
+
+def test_endpoint_rejects_shared_cards_and_too_many_samples(client):
+    response = client.get("/showdown/", params={"hands": ["Ah,Kh", "Ah,Qd"]})
+    assert response.status_code == 422
+    response = client.get("/showdown/", params={"hands": ["Ah,Kh", "Qs,Qd"], "samples": 2000001})
+    assert response.status_code == 422
@@ -0,0 +1,66 @@
+import pickle
+
+import pytest
+
+import eval_poker
+import startup
+from card import Card
+from lookup import LookupTable
+
+
+@pytest.fixture
+def fresh(tmp_path, monkeypatch):
+    """get_evaluator() with no shared instance yet and a snapshot path in tmp_path."""
+    for name in ("RS_SHARED_TABLES", "RS_FIVE_CARD_ARRAY", "RS_SEVEN_CARD_DAG"):
+        monkeypatch.delenv(name, raising=False)
+    path = tmp_path / "lookup_snapshot.pkl"
+    monkeypatch.setattr(eval_poker, "LOOKUP_SNAPSHOT", str(path))
+    monkeypatch.setattr(eval_poker, "_evaluator", None)
+    return path
+
+
+def royal_flush_rank(evaluator):
+    return evaluator.evaluate(Card.hand_to_binary(["As", "Ks"]), Card.hand_to_binary(["Qs", "Js", "Ts", "2d", "3c"]))
+
+
+def test_evaluator_is_shared_and_silent(fresh, capsys):
+    first = eval_poker.get_evaluator()
+    assert eval_poker.get_evaluator() is first
+    eval_poker.simulate_win_percent(["Ah", "7d", "2c"], ["Qs", "Qd"], 50, n_other_players=2, seed=1)
+    assert capsys.readouterr().out == ""
+
+
+def test_snapshot_round_trip(fresh):
+    LookupTable().write_snapshot(str(fresh))
+    table = LookupTable.from_snapshot(str(fresh))
+    assert len(table.flush_lookup) + len(table.unsuited_lookup) == LookupTable.MAX_HIGH_CARD
+    assert royal_flush_rank(eval_poker.get_evaluator()) == 1
+
+
+@pytest.mark.parametrize("content", [b"not a pickle", b"", pickle.dumps(({}, {})), pickle.dumps([1, 2, 3])])
+def test_corrupt_or_stale_snapshot_is_rebuilt(fresh, content):
+    fresh.write_bytes(content)
+    with pytest.raises(ValueError, match="not a lookup snapshot"):
+        LookupTable.from_snapshot(str(fresh))
+
+    assert royal_flush_rank(eval_poker.get_evaluator()) == 1
+    table = LookupTable.from_snapshot(str(fresh))
+    assert len(table.flush_lookup) + len(table.unsuited_lookup) == LookupTable.MAX_HIGH_CARD
+
+
+def test_warm_up_runs_once_and_records_its_phases(monkeypatch):
+    monkeypatch.setattr(startup, "_warmed_up", False)
+    monkeypatch.setattr(startup, "PROFILE", {})
+    startup.warm_up()
+    assert {"lookup_tables", "warm_up", "since_process_start"} <= set(startup.PROFILE)
+    startup.PROFILE.clear()
+    startup.warm_up()
+    assert startup.PROFILE == {}
+
+
+def test_startup_profile_endpoint(client):
+    response = client.get("/startup_profile/")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["fast_start"] is False
+    assert body["phases"] and all(v >= 0 for v in body["phases"].values())
@@ -0,0 +1,114 @@
+import array
+import os
+
+import pytest
+
+import table_store
+from lookup import LookupTable
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """
+    table_store writing to an empty directory, with only the tables a
+    test registers.
+    """
+    # import the table modules first, so build_all does not register theirs here
+    table_store.load_builders()
+    monkeypatch.setattr(table_store, "TABLE_DIR", str(tmp_path))
+    monkeypatch.setattr(table_store, "BUILDERS", {})
+    monkeypatch.setattr(table_store, "PRECOMPUTED", set())
+    monkeypatch.setattr(table_store, "_attached", {})
+    return table_store
+
+
+def test_write_and_attach_round_trip(store):
+    store.register("squares", "I")(lambda: array.array("I", [i * i for i in range(1000)]))
+    view = store.attach("squares")
+    assert os.path.exists(store.table_path("squares"))
+    assert list(view[:4]) == [0, 1, 4, 9]
+    assert len(view) == 1000
+    assert store.attach("squares") is view
+
+
+def test_attach_rejects_a_truncated_file(store):
+    store.write_table("short", array.array("H", range(10)))
+    path = store.table_path("short")
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 2)
+    with pytest.raises(ValueError, match="truncated"):
+        store.attach("short")
+
+
+@pytest.mark.parametrize("damage", ["magic", "truncate", "header", "empty", "typecode"])
+def test_damaged_or_stale_file_is_rebuilt(store, damage):
+    store.register("squares", "I")(lambda: array.array("I", [i * i for i in range(100)]))
+    path = store.table_path("squares")
+    if damage == "typecode":
+        # written by an older builder that used another element type
+        store.write_table("squares", array.array("H", range(100)))
+    else:
+        store.build("squares")
+        with open(path, "r+b") as f:
+            if damage == "magic":
+                f.write(b"JUNK")
+            elif damage == "truncate":
+                f.truncate(os.path.getsize(path) - 4)
+            elif damage == "header":
+                f.truncate(8)
+            else:
+                f.truncate(0)
+    view = store.attach("squares")
+    assert len(view) == 100 and view[9] == 81
+    assert view.format == "I"
+
+
+def test_damaged_precomputed_table_is_rebuilt_in_the_background(store, monkeypatch):
+    monkeypatch.setenv("RS_BUILD_IN_BACKGROUND", "1")
+    monkeypatch.setattr(table_store, "_background_build", None)
+    store.register("slow", "B", precomputed=True)(lambda: array.array("B", [7]))
+    os.makedirs(store.TABLE_DIR, exist_ok=True)
+    with open(store.table_path("slow"), "wb") as f:
+        f.write(b"garbage that is long enough")
+    with pytest.raises(store.TableNotReady):
+        store.attach("slow")
+    table_store._background_build.join(timeout=30)
+    assert list(store.attach("slow")) == [7]
+
+
+def test_build_all_can_leave_out_precomputed_tables(store):
+    store.register("quick", "B")(lambda: array.array("B", [1]))
+    store.register("slow", "B", precomputed=True)(lambda: array.array("B", [2]))
+    store.build_all(precomputed=False)
+    assert os.path.exists(store.table_path("quick"))
+    assert not os.path.exists(store.table_path("slow"))
+    store.build_all()
+    assert os.path.exists(store.table_path("slow"))
+
+
+def test_missing_precomputed_table_builds_in_the_background(store, monkeypatch):
+    monkeypatch.setenv("RS_BUILD_IN_BACKGROUND", "1")
+    monkeypatch.setattr(table_store, "_background_build", None)
+    store.register("slow", "B", precomputed=True)(lambda: array.array("B", [7]))
+    with pytest.raises(store.TableNotReady):
+        store.attach("slow")
+    table_store._background_build.join(timeout=30)
+    assert list(store.attach("slow")) == [7]
+
+
+def test_missing_precomputed_table_builds_on_the_spot_without_the_flag(store, monkeypatch):
+    monkeypatch.delenv("RS_BUILD_IN_BACKGROUND", raising=False)
+    store.register("slow", "B", precomputed=True)(lambda: array.array("B", [7]))
+    assert list(store.attach("slow")) == [7]
+
+
+def test_shared_lookup_table_matches_the_generated_one():
+    shared = table_store.SharedLookupTable()
+    generated = LookupTable()
+    assert len(shared.flush_lookup) == len(generated.flush_lookup)
+    assert len(shared.unsuited_lookup) == len(generated.unsuited_lookup)
+    for key, rank in list(generated.flush_lookup.items())[::97]:
+        assert shared.flush_lookup[key] == rank
+    for key, rank in list(generated.unsuited_lookup.items())[::97]:
+        assert shared.unsuited_lookup[key] == rank
+    assert 12345 not in shared.flush_lookup